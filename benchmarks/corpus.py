@@ -0,0 +1,132 @@
+import os
+import sys
+import random
+import subprocess
+import configparser
+from concurrent.futures import ThreadPoolExecutor
+
+from sqnotes.user_configuration_helper import CONFIG_FILENAME, SETTINGS_KEY, GLOBAL_KEY
+
+BENCHMARK_DATABASE_FILE_NAME = "sqnotes_index.db"
+BENCHMARK_KEY_EMAIL = "sqnotes-benchmark@example.invalid"
+NOTE_WORDS = ["apple", "pear", "banana", "river", "mountain", "meeting", "invoice",
+              "garden", "kernel", "python", "coffee", "library", "window", "planet",
+              "budget", "recipe", "travel", "ticket", "project", "summary"]
+NOTE_KEYWORDS = ["work", "home", "idea", "todo", "travel", "reading", "music", "health"]
+WORDS_PER_NOTE = 60
+KEYWORDS_PER_NOTE = 2
+
+# a stand-in text editor for `sqnotes new`: writes a fixed note and exits
+FAKE_TEXT_EDITOR_SOURCE = '''import sys
+with open(sys.argv[1], 'w') as note_file:
+    note_file.write("benchmark note from the editor #benchmark")
+'''
+
+
+class BenchmarkSetupException(Exception):
+    """Raise if the benchmark GPG home or note corpus could not be created."""
+
+
+class BenchmarkWorkspace:
+    """A throwaway home directory, GPG home and SQNotes configuration.
+
+    Every path the CLI touches lives under `root`: HOME points at
+    `root/home` so the user configuration is written there, and GNUPGHOME
+    points at a GPG home holding an unprotected test key.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.home_dir = os.path.join(root, 'home')
+        self.gnupg_home = os.path.join(root, 'gnupg')
+        self.notes_dir = os.path.join(root, 'notes')
+        self.config_dir = os.path.join(self.home_dir, '.sqnotes')
+        self.text_editor_path = os.path.join(root, 'fake_text_editor')
+
+    def get_environment(self, src_path):
+        environment = dict(os.environ)
+        environment['HOME'] = self.home_dir
+        environment['GNUPGHOME'] = self.gnupg_home
+        environment['PYTHONPATH'] = src_path
+        environment.pop('TESTING', None)
+        return environment
+
+    def create(self):
+        for directory in [self.home_dir, self.notes_dir, self.config_dir]:
+            os.makedirs(directory, exist_ok=True)
+        os.makedirs(self.gnupg_home, mode=0o700, exist_ok=True)
+        self._create_gpg_key()
+        self._write_fake_text_editor()
+        self._write_user_config()
+
+    def close(self):
+        # stop the gpg-agent started for this GPG home
+        subprocess.call(['gpgconf', '--homedir', self.gnupg_home, '--kill', 'all'],
+                        stdout=subprocess.DEVNULL,
+                        stderr=subprocess.DEVNULL)
+
+    def _run_gpg(self, args, input_data=None):
+        command = ['gpg', '--homedir', self.gnupg_home, '--batch', '--yes', '--quiet'] + args
+        result = subprocess.run(command,
+                                input=input_data,
+                                stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            raise BenchmarkSetupException(result.stderr.decode('utf-8', errors='replace'))
+        return result.stdout
+
+    def _create_gpg_key(self):
+        self._run_gpg(['--passphrase', '',
+                       '--quick-generate-key', BENCHMARK_KEY_EMAIL,
+                       'default', 'default', 'never'])
+
+    def _write_fake_text_editor(self):
+        with open(self.text_editor_path, 'w') as editor_file:
+            editor_file.write(f"#!{sys.executable}\n")
+            editor_file.write(FAKE_TEXT_EDITOR_SOURCE)
+        os.chmod(self.text_editor_path, 0o755)
+
+    def _write_user_config(self):
+        user_config = configparser.ConfigParser()
+        user_config[GLOBAL_KEY] = {
+            'initialized' : 'yes',
+            'database_is_set_up' : 'no'
+        }
+        user_config[SETTINGS_KEY] = {
+            'notes_path' : self.notes_dir,
+            'db_file_path' : os.path.join(self.notes_dir, BENCHMARK_DATABASE_FILE_NAME),
+            'gpg_key_email' : BENCHMARK_KEY_EMAIL,
+            'text_editor' : self.text_editor_path,
+            'gpg_verified' : 'yes',
+            'armor' : 'no'
+        }
+        with open(os.path.join(self.config_dir, CONFIG_FILENAME), 'w') as config_file:
+            user_config.write(config_file)
+
+    def encrypt_note(self, note_path, note_content):
+        self._run_gpg(['--output', note_path,
+                       '--encrypt', '--recipient', BENCHMARK_KEY_EMAIL],
+                      input_data=note_content.encode('utf-8'))
+
+
+def get_synthetic_note_content(note_rng):
+    words = note_rng.choices(NOTE_WORDS, k=WORDS_PER_NOTE)
+    keywords = note_rng.sample(NOTE_KEYWORDS, k=KEYWORDS_PER_NOTE)
+    return " ".join(words) + " " + " ".join(f"#{keyword}" for keyword in keywords)
+
+
+def generate_note_corpus(workspace, num_notes, seed=0, workers=8):
+    """Write `num_notes` encrypted synthetic notes into the workspace notes dir.
+
+    Note contents depend only on `seed` and the note number, so corpora of
+    the same size are identical from run to run.
+    """
+    def write_note(note_number):
+        note_rng = random.Random(f"{seed}-{note_number}")
+        note_path = os.path.join(workspace.notes_dir, f"bench_{note_number:06d}.txt.gpg")
+        workspace.encrypt_note(note_path=note_path,
+                               note_content=get_synthetic_note_content(note_rng))
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for _ in executor.map(write_note, range(num_notes)):
+            pass
@@ -0,0 +1,235 @@
+import os
+import sys
+import json
+import time
+import shutil
+import sqlite3
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+src_path = os.path.join(project_root, 'src')
+
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+if src_path not in sys.path:
+    sys.path.append(src_path)
+
+from benchmarks.corpus import BenchmarkWorkspace, generate_note_corpus
+
+DEFAULT_CORPUS_SIZES = [1000]
+DEFAULT_REPEAT = 3
+DEFAULT_REGRESSION_THRESHOLD = 1.25
+
+# in run order: read-only commands first, then the ones that add notes
+BENCHMARK_COMMANDS = [
+    ('startup', ['-h']),
+    ('rescan-full', ['rescan', '--full']),
+    ('rescan', ['rescan']),
+    ('notes-list', ['notes-list']),
+    ('keywords', ['keywords', '-k', 'travel']),
+    ('search', ['search', '-t', 'mountain coffee']),
+    ('insert', ['-n', 'benchmark note from the command line #benchmark']),
+    ('new', ['new']),
+]
+# commands that add a note; note file names have one-second resolution
+NOTE_ADDING_COMMANDS = ['insert', 'new']
+# the same commands answered by a running `sqnotes daemon`
+DAEMON_BENCHMARK_COMMANDS = [
+    ('daemon-notes-list', ['notes-list']),
+    ('daemon-keywords', ['keywords', '-k', 'travel', '--names-only']),
+]
+
+
+class BenchmarkCommandException(Exception):
+    """Raise if a benchmarked sqnotes command exits with an error."""
+
+
+def run_sqnotes_command(workspace, argv):
+    command = [sys.executable, '-m', 'sqnotes'] + argv
+    start_time = time.perf_counter()
+    result = subprocess.run(command,
+                            cwd=workspace.root,
+                            env=workspace.get_environment(src_path=src_path),
+                            stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE)
+    seconds = time.perf_counter() - start_time
+    if result.returncode != 0:
+        raise BenchmarkCommandException(
+            f"sqnotes {' '.join(argv)} exited with {result.returncode}: "
+            + result.stderr.decode('utf-8', errors='replace')
+        )
+    return seconds
+
+
+def start_daemon(workspace):
+    daemon = subprocess.Popen([sys.executable, '-m', 'sqnotes', 'daemon'],
+                              cwd=workspace.root,
+                              env=workspace.get_environment(src_path=src_path),
+                              stdout=subprocess.PIPE,
+                              stderr=subprocess.DEVNULL)
+    # the daemon prints one line once it is listening
+    daemon.stdout.readline()
+    if daemon.poll() is not None:
+        raise BenchmarkCommandException("sqnotes daemon did not start")
+    return daemon
+
+
+def stop_daemon(daemon):
+    daemon.terminate()
+    daemon.wait()
+    daemon.stdout.close()
+
+
+def wait_for_next_second():
+    time.sleep(1 - (time.time() % 1) + 0.01)
+
+
+def time_command(workspace, name, argv, repeat):
+    timings = []
+    for _ in range(repeat):
+        if name in NOTE_ADDING_COMMANDS:
+            wait_for_next_second()
+        timings.append(run_sqnotes_command(workspace=workspace, argv=argv))
+    return {
+        'command' : name,
+        'argv' : argv,
+        'repeat' : repeat,
+        'seconds' : timings,
+        'min' : min(timings),
+        'median' : statistics.median(timings),
+        'max' : max(timings)
+    }
+
+
+def run_corpus_benchmarks(work_dir, corpus_size, commands, repeat, corpus_workers):
+    workspace = BenchmarkWorkspace(root=os.path.join(work_dir, f"corpus_{corpus_size}"))
+    workspace.create()
+    try:
+        print(f"generating {corpus_size} encrypted notes in {workspace.notes_dir}", file=sys.stderr)
+        start_time = time.perf_counter()
+        generate_note_corpus(workspace=workspace, num_notes=corpus_size, workers=corpus_workers)
+        print(f"generated corpus in {time.perf_counter() - start_time:.1f} s", file=sys.stderr)
+        # index the corpus so keyword search has something to find
+        run_sqnotes_command(workspace=workspace, argv=['rescan'])
+
+        results = []
+        for name, argv in BENCHMARK_COMMANDS:
+            if name not in commands:
+                continue
+            result = time_command(workspace=workspace, name=name, argv=argv, repeat=repeat)
+            result['corpus_size'] = corpus_size
+            print(f"{corpus_size:>7} notes  {name:<12} median {result['median'] * 1000:10.1f} ms", file=sys.stderr)
+            results.append(result)
+
+        daemon_commands = [(name, argv) for name, argv in DAEMON_BENCHMARK_COMMANDS if name in commands]
+        if daemon_commands:
+            daemon = start_daemon(workspace=workspace)
+            try:
+                for name, argv in daemon_commands:
+                    result = time_command(workspace=workspace, name=name, argv=argv, repeat=repeat)
+                    result['corpus_size'] = corpus_size
+                    print(f"{corpus_size:>7} notes  {name:<12} median {result['median'] * 1000:10.1f} ms", file=sys.stderr)
+                    results.append(result)
+            finally:
+                stop_daemon(daemon=daemon)
+    finally:
+        workspace.close()
+    return results
+
+
+def get_gpg_version():
+    try:
+        output = subprocess.run(['gpg', '--version'], stdout=subprocess.PIPE).stdout
+    except Exception:
+        return None
+    return output.decode('utf-8', errors='replace').splitlines()[0]
+
+
+def get_regressions(results, baseline, threshold):
+    baseline_medians = {
+        (result['corpus_size'], result['command']) : result['median']
+        for result in baseline['results']
+    }
+    regressions = []
+    for result in results:
+        baseline_median = baseline_medians.get((result['corpus_size'], result['command']))
+        if baseline_median and result['median'] > baseline_median * threshold:
+            regressions.append({
+                'corpus_size' : result['corpus_size'],
+                'command' : result['command'],
+                'baseline_median' : baseline_median,
+                'median' : result['median'],
+                'ratio' : result['median'] / baseline_median
+            })
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='SQNotes benchmark utility. Times CLI commands against synthetic encrypted note corpora.',
+        )
+    parser.add_argument('--sizes', nargs='+', type=int, default=DEFAULT_CORPUS_SIZES,
+                        help='Corpus sizes (number of notes), for example 1000 10000 100000.')
+    parser.add_argument('--commands', nargs='+', default=[name for name, _ in BENCHMARK_COMMANDS + DAEMON_BENCHMARK_COMMANDS],
+                        choices=[name for name, _ in BENCHMARK_COMMANDS + DAEMON_BENCHMARK_COMMANDS],
+                        help='Commands to time.')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help='Number of timed runs per command.')
+    parser.add_argument('--corpus-workers', type=int, default=os.cpu_count() or 4,
+                        help='Number of parallel gpg processes used to generate a corpus.')
+    parser.add_argument('--output', help='Write JSON results to this file instead of stdout.')
+    parser.add_argument('--baseline', help='JSON results of an earlier run to compare against.')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                        help='Flag a regression if a median is slower than the baseline by this factor.')
+    parser.add_argument('--work-dir', help='Directory for corpora (default: a temporary directory that is removed afterwards).')
+
+    args = parser.parse_args()
+
+    work_dir = args.work_dir if args.work_dir is not None else tempfile.mkdtemp(prefix='sqnotes_benchmarks_')
+    try:
+        results = []
+        for corpus_size in args.sizes:
+            results.extend(run_corpus_benchmarks(work_dir=work_dir,
+                                                 corpus_size=corpus_size,
+                                                 commands=args.commands,
+                                                 repeat=args.repeat,
+                                                 corpus_workers=args.corpus_workers))
+    finally:
+        if args.work_dir is None:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        'timestamp' : datetime.now().isoformat(timespec='seconds'),
+        'python' : platform.python_version(),
+        'platform' : platform.platform(),
+        'sqlite' : sqlite3.sqlite_version,
+        'gpg' : get_gpg_version(),
+        'results' : results
+    }
+    regressions = []
+    if args.baseline is not None:
+        with open(args.baseline, 'r') as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = get_regressions(results=results, baseline=baseline, threshold=args.threshold)
+        report['regressions'] = regressions
+
+    if args.output is not None:
+        with open(args.output, 'w') as output_file:
+            json.dump(report, output_file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    for regression in regressions:
+        print(f"regression: {regression['command']} on {regression['corpus_size']} notes "
+              f"is {regression['ratio']:.2f}x slower than the baseline", file=sys.stderr)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
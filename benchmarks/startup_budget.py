@@ -0,0 +1,102 @@
+import os
+import re
+import sys
+import json
+import argparse
+import subprocess
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+src_path = os.path.join(project_root, 'src')
+
+DEFAULT_IMPORT_BUDGET_MS = 100
+DEFAULT_REPEAT = 5
+# subcommands that must not pay for the SQNotes dependency graph
+FAST_PATH_COMMANDS = [
+    ['-h'],
+    ['man'],
+    ['man', 'encryption'],
+]
+# modules that only subcommands using SQNotes should import
+DEFERRED_MODULES = ['injector', 'yaml', 'dotenv', 'sqlite3', 'pyinputplus', 'subprocess', 'sqnotes.sqnotes_module']
+
+IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def get_import_times(argv):
+    """Run the CLI under `-X importtime` and return {module: cumulative microseconds}."""
+    command = [sys.executable, '-X', 'importtime', '-m', 'sqnotes'] + argv
+    environment = dict(os.environ)
+    environment['PYTHONPATH'] = src_path
+    result = subprocess.run(command,
+                            cwd=project_root,
+                            env=environment,
+                            stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE)
+    import_times = {}
+    top_level_microseconds = 0
+    for line in result.stderr.decode('utf-8', errors='replace').splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match is None:
+            continue
+        cumulative_microseconds = int(match.group(2))
+        import_times[match.group(4)] = cumulative_microseconds
+        # one leading space marks an import made directly by the entry point
+        if len(match.group(3)) == 1:
+            top_level_microseconds += cumulative_microseconds
+    return top_level_microseconds, import_times
+
+
+def measure_command(argv, repeat):
+    totals = []
+    import_times = {}
+    for _ in range(repeat):
+        total, import_times = get_import_times(argv=argv)
+        totals.append(total)
+    slowest_imports = sorted(import_times.items(), key=lambda item: item[1], reverse=True)[:10]
+    return {
+        'argv' : argv,
+        'import_ms' : min(totals) / 1000,
+        'deferred_modules_imported' : [module for module in DEFERRED_MODULES if module in import_times],
+        'slowest_imports_ms' : {module : microseconds / 1000 for module, microseconds in slowest_imports}
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='SQNotes startup budget. Checks the import cost of fast-path CLI subcommands with -X importtime.',
+        )
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_IMPORT_BUDGET_MS,
+                        help='Maximum total import time in milliseconds (best of --repeat runs).')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help='Number of runs per subcommand.')
+    parser.add_argument('--output', help='Write JSON results to this file instead of stdout.')
+
+    args = parser.parse_args()
+
+    results = [measure_command(argv=argv, repeat=args.repeat) for argv in FAST_PATH_COMMANDS]
+    failures = []
+    for result in results:
+        command_string = ' '.join(['sqnotes'] + result['argv'])
+        if result['import_ms'] > args.budget_ms:
+            failures.append(f"{command_string} imports took {result['import_ms']:.1f} ms (budget {args.budget_ms:.1f} ms)")
+        for module in result['deferred_modules_imported']:
+            failures.append(f"{command_string} imported {module}")
+
+    report = {
+        'budget_ms' : args.budget_ms,
+        'results' : results,
+        'failures' : failures
+    }
+    if args.output is not None:
+        with open(args.output, 'w') as output_file:
+            json.dump(report, output_file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    for failure in failures:
+        print(f"over budget: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
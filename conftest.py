@@ -17,7 +17,7 @@ from sqnotes.printer_helper import PrinterHelper
 from sqnotes.path_input_helper import PathInputHelper
 from sqnotes.sqnotes_config_module import SQNotesConfig
 from sqnotes.injection_configuration_module import InjectionConfigurationModule
-from test.test_helper import do_nothing, just_return
+from test.test_helper import do_nothing, just_return, as_chunks
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 root_dir = current_dir
@@ -32,6 +32,12 @@ primary_config_file_path = os.path.join(sqnotes_dir, 'config.yaml')
 @pytest.fixture(scope='session', autouse=True)
 def set_test_environment():
     os.environ['TESTING'] = 'true'
+
+@pytest.fixture(autouse=True)
+def no_running_daemon():
+    # CLI tests must never reach a real `sqnotes daemon` on this machine
+    with patch('sqnotes.daemon_client.get_daemon_socket_path', just_return(os.path.join(test_resources_root, 'no_daemon.sock'))):
+        yield
     
 @pytest.fixture
 def mock_subprocess_call():
@@ -83,13 +89,18 @@ def mock_note_files(test_temp_notes_dir):
             os.remove(p)
         
     
+def load_without_cache(source_path, parse):
+    # mocked config data must not be read from, or written to, the config cache
+    return parse(source_path)
+
 @pytest.fixture
 def sqnotes_config_with_mocked_data(mock_sqnotes_config_test_data):
-    with patch('yaml.safe_load') as mock_yaml_load:
-        with patch('builtins.open'):
-            mock_yaml_load.return_value = mock_sqnotes_config_test_data
-            injector = Injector()
-            sqnotes_config : SQNotesConfig = injector.get(SQNotesConfig)
+    with patch('yaml.safe_load') as mock_yaml_load, \
+            patch('builtins.open'), \
+            patch('sqnotes.sqnotes_config_module.load_cached', load_without_cache):
+        mock_yaml_load.return_value = mock_sqnotes_config_test_data
+        injector = Injector()
+        sqnotes_config : SQNotesConfig = injector.get(SQNotesConfig)
     yield sqnotes_config
     
 @pytest.fixture
@@ -198,6 +209,7 @@ def mock_get_database_file_path(database_service):
 @pytest.fixture
 def database_service_open_in_memory(database_service_connected_in_memory : DatabaseService):
     database_service_connected_in_memory.setup_database()
+    database_service_connected_in_memory.migrate_schema()
     yield database_service_connected_in_memory
 
 
@@ -293,6 +305,23 @@ def mock_get_decrypted_content_in_memory():
         
 
         
+@pytest.fixture
+def mock_get_decrypted_content_chunks():
+    
+    with patch.object(EncryptedNoteHelper, 'get_decrypted_content_chunks') as mock:
+        mock.side_effect = [as_chunks(f"content{x}") for x in range(1, 20)]
+        yield mock
+        
+@pytest.fixture
+def mock_get_decrypted_content_chunks_integration():
+    
+    def mock_get_decrypted_content_chunks_handler(self, note_path):
+        with open(note_path, 'r') as open_file:
+            yield from as_chunks(open_file.read())
+    
+    with patch.object(EncryptedNoteHelper, 'get_decrypted_content_chunks', mock_get_decrypted_content_chunks_handler):
+        yield
+        
 @pytest.fixture
 def mock_get_decrypted_content_in_memory_integration():
     
@@ -315,20 +344,6 @@ def plaintext_temp_file(tmp_path):
     with tempfile.NamedTemporaryFile(mode='w', dir=tmp_path, delete=False) as temp_file:
         yield temp_file
    
-@pytest.fixture
-def mock_write_plaintext_to_temp_file(plaintext_temp_file):
-    plaintext_temp_file_path = plaintext_temp_file.name
-    def handler (_, note_content, config=None):
-        with open(plaintext_temp_file_path, 'w') as file:
-            file.write(note_content)
-        return plaintext_temp_file_path
-    
-    
-    patcher = patch.object(EncryptedNoteHelper, '_write_plaintext_to_temp_file', handler)
-    patcher.start()
-    yield
-    patcher.stop()
-
 @pytest.fixture
 def test_note_filename(test_note_file):
     base_name = os.path.basename(test_note_file)
@@ -400,6 +415,11 @@ def mock_extract_and_save_keywords():
     with patch.object(SQNotes, '_extract_and_save_keywords') as mock:
         yield mock
 
+@pytest.fixture
+def mock_migrate_schema():
+    with patch.object(DatabaseService, 'migrate_schema', return_value=[]) as mock:
+        yield mock
+
 @pytest.fixture
 def mock_commit_transaction():
     with patch.object(DatabaseService, 'commit_transaction') as mock:
@@ -460,12 +480,6 @@ def mock_NamedTemporaryFile_real(temp_note_file):
         mock.return_value.__enter__.return_value = temp_note_file
         yield mock
 
-@pytest.fixture
-def mock_get_temp_plaintext_file(plaintext_temp_file):
-    with patch.object(EncryptedNoteHelper, '_get_temp_plaintext_file') as mock:
-        mock.return_value = plaintext_temp_file.name
-        yield mock
-
 @pytest.fixture
 def mock_NamedTemporaryFile(mock_temp_file):
     with patch('tempfile.NamedTemporaryFile') as mock:
@@ -509,12 +523,13 @@ def sqnotes_config(sqnotes_config_data):
         def provide_config_file_path(self) -> str:
             return test_config_file
         
-    with patch("builtins.open"):
-        with patch("yaml.safe_load") as safe_load:
-            safe_load.return_value = sqnotes_config_data
-            
-            injector = Injector([ConfigurationModule()])
-            sqnotes_config = injector.get(SQNotesConfig)
+    with patch("builtins.open"), \
+            patch("yaml.safe_load") as safe_load, \
+            patch('sqnotes.sqnotes_config_module.load_cached', load_without_cache):
+        safe_load.return_value = sqnotes_config_data
+        
+        injector = Injector([ConfigurationModule()])
+        sqnotes_config = injector.get(SQNotesConfig)
     yield sqnotes_config
 
 
@@ -548,10 +563,10 @@ def user_configuration_helper_for_integration(user_config_data, test_temp_config
     user_config_helper : UserConfigurationHelper = injector.get(UserConfigurationHelper)
     user_config_helper._set_config_dir(config_dir = test_temp_config_dir)
     def get_setting (_, key):
-        return user_config_data['settings'][key]
+        return user_config_data['settings'].get(key)
     
     def get_global (_, key):
-        return user_config_data['global'][key]
+        return user_config_data['global'].get(key)
     
     def set_setting (_, key, value):
         user_config_data['settings'][key] = value
@@ -576,11 +591,9 @@ def user_configuration_helper_for_integration(user_config_data, test_temp_config
 
 def mock_call_gpg_subprocess_write(_, in_commands):
     note_file_path = in_commands['output_path']
-    infile = in_commands['infile']
-    with open(infile, 'r') as in_file:
-        infile_content = in_file.read()
+    plaintext = in_commands['plaintext']
     with open(note_file_path, 'w') as out_file:
-        out_file.write(f"encrypted: {infile_content}")
+        out_file.write(f"encrypted: {plaintext}")
     return 0
 
 @pytest.fixture
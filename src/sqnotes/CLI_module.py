@@ -1,30 +1,114 @@
-
 import argparse
-from injector import Injector
-from sqnotes.sqnotes_module import SQNotes, SET_NOTES_PATH_INTERACTIVE_FLAG,\
-    SET_TEXT_EDITOR_INTERACTIVE_FLAG
-from sqnotes.manual import Manual
-from sqnotes.injection_configuration_module import InjectionConfigurationModule
+
+from sqnotes import interface_copy
+from sqnotes.config_keys import SEARCH_MODES
+from sqnotes.note_filenames import NOTE_SORT_ORDERS, parse_note_date_bound
+from sqnotes.note_watcher import DEFAULT_POLL_INTERVAL
+from sqnotes.environment import (
+    SET_NOTES_PATH_INTERACTIVE_FLAG,
+    SET_TEXT_EDITOR_INTERACTIVE_FLAG,
+    IS_INITIALIZATION_GATE_REFACTORED_INSIDE_SQNOTES,
+)
+
+SET_NOTES_PATH_COMMAND = "set-notes-path"
+DAEMON_COMMAND = "daemon"
+# commands that never prompt, open a text editor or decrypt notes, so a daemon can run them.
+# Commands that decrypt run in-process, so their output streams as notes are
+# decrypted and gpg asks for a passphrase on the user's terminal.
+DAEMON_COMMANDS = ["notes-list", "print-keywords", "diagnostics"]
+
+
+def non_negative_int(value):
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"{value} is negative")
+    return number
+
+
+def positive_int(value):
+    number = int(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"{value} is not positive")
+    return number
+
+
+def positive_float(value):
+    number = float(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"{value} is not positive")
+    return number
+
+
+def note_date_bound(value):
+    try:
+        return parse_note_date_bound(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def add_result_window_arguments(parser, is_names_only_available=True, is_subcommand=False):
+    """Add --limit, --offset and --names-only.
+
+    The main parser holds the defaults. A subcommand's defaults would
+    overwrite values given before the subcommand name, so subcommands
+    only set the arguments they are given.
+    """
+    def get_default(default):
+        return argparse.SUPPRESS if is_subcommand else default
+
+    parser.add_argument(
+        "--limit", type=non_negative_int, default=get_default(None), metavar="N", help="Print at most N results."
+    )
+    parser.add_argument(
+        "--offset", type=non_negative_int, default=get_default(0), metavar="N", help="Skip the first N results."
+    )
+    if is_names_only_available:
+        parser.add_argument(
+            "--names-only",
+            action="store_true",
+            default=get_default(False),
+            help="Print only the file names of matching notes.",
+        )
+
 
 class SQNotesCLI:
-    
-    def __get_sqnotes(self):
+    """Command-line entry point.
+
+    Only argparse and the environment flags are imported up front. The
+    dependency graph behind SQNotes (injector, yaml, sqlite3, gpg
+    helpers) is imported and built only for subcommands that use it, so
+    `sqnotes -h` and `sqnotes man` start quickly.
+    """
+
+    def _get_sqnotes(self):
+        from injector import Injector
+        from sqnotes.injection_configuration_module import InjectionConfigurationModule
+        from sqnotes.sqnotes_module import SQNotes
+
         injector = Injector([InjectionConfigurationModule()])
-    
         sqnotes = injector.get(SQNotes)
         return sqnotes
 
-    def main(self):
+    def _print_manual_page(self, man_subcommand):
+        from sqnotes.manual import Manual
+
+        manual = Manual()
+        if man_subcommand == "encryption":
+            manual.print_encryption_page()
+        else:
+            manual.print_main_page()
+
+    def _get_parser(self):
         parser = argparse.ArgumentParser(
             description="SQNote: Secure note-taking command-line utility.",
         )
-    
+
         parser.add_argument(
             "--debug",
             action="store_true",
             help="Enable debugging mode with detailed log messages",
         )
-    
+
         group = parser.add_mutually_exclusive_group()
         group.add_argument(
             "-k", "--keywords", nargs="+", help="Keywords for keyword search"
@@ -33,47 +117,48 @@ class SQNotesCLI:
             "-s", "--search", nargs="+", help="Search term for full text search."
         )
         group.add_argument("-n", "--new", help="Text for new note.", type=str)
-    
+        add_result_window_arguments(parser)
+
         subparsers = parser.add_subparsers(dest="command", help="Subcommands")
-    
+
         subparsers.add_parser("new", help="Add a new note.")
         subparsers.add_parser("init", help="Initialize app.")
-    
+
         subparsers.add_parser(
             "text-editors", help="Show supported text editors available on your system."
         )
-    
-        SET_NOTES_PATH_COMMAND = "set-notes-path"
+
         if SET_NOTES_PATH_INTERACTIVE_FLAG:
             subparsers.add_parser(
-                "set-notes-path", help="Set the directory path for storing your note files."
+                SET_NOTES_PATH_COMMAND, help="Set the directory path for storing your note files."
             )
-    
+
         if SET_TEXT_EDITOR_INTERACTIVE_FLAG:
             subparsers.add_parser(
                 "config-text-editor", help="Choose your text editor (interactive)."
             )
-    
+
         man_command = subparsers.add_parser("man", help="Show manual.")
         manual_subcommands = man_command.add_subparsers(
             dest="man_subcommand", help="Manual subcommands."
         )
         manual_subcommands.add_parser("encryption", help="Show manual page for encryption.")
         manual_subcommands.add_parser("main", help="Show main manual page.")
-    
+
         search_subparser = subparsers.add_parser(
             "search",
             help="Find notes by full text search. (Slow because requires full decryption.)",
         )
         search_subparser.add_argument("-t", "--text", nargs="+", help="Search strings.")
-    
+        add_result_window_arguments(search_subparser, is_subcommand=True)
+
         set_gpg_key_subparser = subparsers.add_parser(
             "set-gpg-key", help="Set the GPG key."
         )
         set_gpg_key_subparser.add_argument(
             "-i", "--id", help="GPG key email/identifier.", type=str
         )
-    
+
         use_armor_subparser = subparsers.add_parser(
             "use-ascii-armor", help="Configure use of ASCII armor for encryption"
         )
@@ -87,99 +172,244 @@ class SQNotesCLI:
             action="store_true",
             help="Set not to use ASCII armor for encryption",
         )
-    
+
         keyword_search_subparser = subparsers.add_parser(
             "keywords",
             help="Find notes keyword. (Fast because searches plaintext database.)",
         )
         keyword_search_subparser.add_argument(
-            "-k", "--keywords", nargs="+", help="Keywords to search for.", required=True
+            "-k", "--keywords", nargs="+", help="Keywords to search for; combine with AND, OR, NOT and parentheses, end with * to match a prefix (for example: proj* NOT draft).", required=True
         )
-    
-        subparsers.add_parser(
+        add_result_window_arguments(keyword_search_subparser, is_subcommand=True)
+
+        rescan_parser = subparsers.add_parser(
             "rescan",
             help="Rescan notes to populate database (useful for troubleshooting certain errors)",
         )
-        subparsers.add_parser(
+        rescan_parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Decrypt and re-index every note, not only new or changed notes.",
+        )
+        notes_list_parser = subparsers.add_parser(
             "notes-list", help="Show a list of all notes (scans notes directory)"
         )
-        subparsers.add_parser("print-keywords", help="Print all keywords from database.")
-    
+        add_result_window_arguments(notes_list_parser, is_names_only_available=False, is_subcommand=True)
+        notes_list_parser.add_argument(
+            "--sort",
+            choices=NOTE_SORT_ORDERS,
+            help="Order notes by file name (default) or by the date in their file name.",
+        )
+        notes_list_parser.add_argument(
+            "--since",
+            type=note_date_bound,
+            metavar="DATE",
+            help="Only list notes created on or after DATE (YYYY, YYYY-MM, YYYY-MM-DD or YYYY-MM-DDTHH:MM[:SS]).",
+        )
+        notes_list_parser.add_argument(
+            "--until",
+            type=note_date_bound,
+            metavar="DATE",
+            help="Only list notes created on or before DATE; --until 2024-05 includes all of May.",
+        )
+        print_keywords_parser = subparsers.add_parser("print-keywords", help="Print all keywords from database.")
+        print_keywords_parser.add_argument(
+            "--counts",
+            action="store_true",
+            help="Print how many notes use each keyword, most used first.",
+        )
+        print_keywords_parser.add_argument(
+            "--top", type=positive_int, help="Print only the N most used keywords.", metavar="N"
+        )
+        subparsers.add_parser(
+            "diagnostics", help="Show the database location, schema version and SQLite settings in effect."
+        )
+
         subparsers.add_parser(
             "verify-gpg", help="Verify that SQNotes can run GPG for encryption/decryption"
         )
-    
+
         git_parser = subparsers.add_parser("git", help="Passthrough git commands.")
         git_parser.add_argument(
             "git_args", nargs=argparse.REMAINDER, help="Arguments for git command"
         )
-    
+
         edit_parser = subparsers.add_parser("edit", help="Edit a note.")
         edit_parser.add_argument("-n", "--note", help="Note base filename.", type=str)
-    
-        args = parser.parse_args()
-    
-        sqnotes = self.__get_sqnotes()
+
+        search_mode_parser = subparsers.add_parser(
+            "search-mode",
+            help="Choose how full text search finds notes: 'scan' decrypts every note; 'index' uses an encrypted full text index; 'fts' and 'fts-hashed' query the notes database (run rescan after choosing these). 'fts' only finds search terms at the start of a word and 'fts-hashed' only whole words, where 'scan' also finds them inside words.",
+        )
+        search_mode_parser.add_argument("mode", choices=SEARCH_MODES, help="Search mode.")
+
+        note_cache_parser = subparsers.add_parser(
+            "note-cache",
+            help="Keep decrypted notes in memory in a background process so that commands run in quick succession do not decrypt them again. Expired notes are dropped from the cache, but copies of their text may remain in process memory until it is reused.",
+        )
+        note_cache_parser.add_argument(
+            "ttl", type=int, help="Seconds to keep each decrypted note (0 turns the cache off)."
+        )
+        subparsers.add_parser("lock", help="Empty the decrypted note cache and stop its background process.")
+        watch_parser = subparsers.add_parser(
+            "watch",
+            help="Stay in the foreground and re-index notes as they are added, changed or removed (for example by `sqnotes git pull`).",
+        )
+        watch_parser.add_argument(
+            "--interval",
+            type=positive_float,
+            default=DEFAULT_POLL_INTERVAL,
+            metavar="SECONDS",
+            help=f"How often to check the notes directory for changes (default {DEFAULT_POLL_INTERVAL:g}).",
+        )
+        subparsers.add_parser(
+            DAEMON_COMMAND,
+            help="Keep the database open in the foreground so that notes-list, print-keywords, diagnostics and keywords --names-only answer quickly.",
+        )
+        return parser
+
+    def _is_daemon_command(self, args):
+        if args.debug:
+            return False
+        if args.command in DAEMON_COMMANDS:
+            return True
+        # keyword search prints only names from the database with --names-only
+        return (args.command == "keywords" or bool(args.keywords)) and args.names_only
+
+    def _run_in_daemon(self):
+        """Run this command in `sqnotes daemon`; return False if no daemon is running."""
+        import sys
+        from sqnotes.daemon_client import run_in_daemon
+
+        result = run_in_daemon(argv=sys.argv[1:])
+        if result is None:
+            return False
+        stdout, stderr, exit_code = result
+        sys.stdout.write(stdout)
+        sys.stderr.write(stderr)
+        if exit_code != 0:
+            sys.exit(exit_code)
+        return True
+
+    def _run_daemon(self):
+        from sqnotes.daemon import SQNotesDaemonServer
+        from sqnotes.daemon_client import get_daemon_socket_path
+        from sqnotes.local_socket import is_listening
+
+        socket_path = get_daemon_socket_path()
+        if is_listening(socket_path):
+            print(interface_copy.DAEMON_ALREADY_RUNNING().format(socket_path))
+            exit(1)
+        sqnotes = self._get_sqnotes()
         sqnotes.startup()
-    
+        server = SQNotesDaemonServer(socket_path=socket_path,
+                                     sqnotes=sqnotes,
+                                     run_command=self._run_argv)
+        print(interface_copy.DAEMON_LISTENING().format(socket_path))
+        server.serve()
+
+    def _run_argv(self, sqnotes, argv):
+        parser = self._get_parser()
+        args = parser.parse_args(argv)
+        with sqnotes.batched_config_writes():
+            self._run_command(sqnotes=sqnotes, args=args, parser=parser)
+
+    def main(self):
+        parser = self._get_parser()
+        args = parser.parse_args()
+
+        if args.command == "man":
+            self._print_manual_page(args.man_subcommand)
+            return
+        if args.command == DAEMON_COMMAND:
+            self._run_daemon()
+            return
+        if self._is_daemon_command(args) and self._run_in_daemon():
+            return
+
+        sqnotes = self._get_sqnotes()
+        # a command writes config.ini at most once, when it finishes
+        with sqnotes.batched_config_writes():
+            sqnotes.startup()
+            self._run_command(sqnotes=sqnotes, args=args, parser=parser)
+
+    def _run_command(self, sqnotes, args, parser):
         if args.command == "init":
             sqnotes.initialize()
-        elif args.command == "man":
-            manual = Manual()
-            if args.man_subcommand == "encryption":
-                manual.print_encryption_page()
-            else:
-                manual.print_main_page()
         else:
-            initialized = sqnotes._get_is_initialized()
-            if not initialized:
-                print(interface_copy.SQNOTES_NOT_INITIALIZED_MESSAGE)
-                return
+            if not IS_INITIALIZATION_GATE_REFACTORED_INSIDE_SQNOTES:
+                is_initialized = sqnotes._get_is_initialized()
+                if not is_initialized:
+                    print(interface_copy.SQNOTES_NOT_INITIALIZED_MESSAGE())
+                    exit(0)
+
+            if args.command == "new":
+                sqnotes.new_note()
+            elif args.new:
+                sqnotes.directly_insert_note(text=args.new)
+            elif args.search:
+                sqnotes.search_notes(search_queries=args.search,
+                                     limit=args.limit,
+                                     offset=args.offset,
+                                     is_names_only=args.names_only)
+            elif args.keywords:
+                sqnotes.search_keywords(keywords=args.keywords,
+                                        limit=args.limit,
+                                        offset=args.offset,
+                                        is_names_only=args.names_only)
+            elif args.command == "notes-list":
+                sqnotes.notes_list(
+                    limit=args.limit,
+                    offset=args.offset,
+                    sort=args.sort,
+                    since=args.since,
+                    until=args.until,
+                )
+            elif args.command == "verify-gpg":
+                sqnotes.check_gpg_installed()
+
+            elif (
+                SET_TEXT_EDITOR_INTERACTIVE_FLAG
+                and args.command == "config-text-editor"
+            ):
+                sqnotes.choose_text_editor_interactive()
+            elif (
+                SET_NOTES_PATH_INTERACTIVE_FLAG
+                and args.command == SET_NOTES_PATH_COMMAND
+            ):
+                sqnotes.set_notes_path_interactive()
+            elif args.command == "text-editors":
+                sqnotes.check_available_text_editors()
+            elif args.command == "set-gpg-key":
+                sqnotes.set_gpg_key_email(args.id)
+            elif args.command == "use-ascii-armor":
+                if args.yes:
+                    sqnotes._set_use_ascii_armor(isUseArmor=True)
+                elif args.no:
+                    sqnotes._set_use_ascii_armor(isUseArmor=False)
+            elif args.command == "search":
+                sqnotes.search_notes(args.text,
+                                     limit=args.limit,
+                                     offset=args.offset,
+                                     is_names_only=args.names_only)
+            elif args.command == "edit":
+                sqnotes.edit_note(args.note)
+            elif args.command == "git":
+                sqnotes.run_git_command(args.git_args)
+            elif args.command == "print-keywords":
+                sqnotes.print_all_keywords(is_showing_counts=args.counts, top=args.top)
+            elif args.command == "diagnostics":
+                sqnotes.print_database_diagnostics()
+            elif args.command == "rescan":
+                sqnotes.rescan_for_database(is_full_rescan=args.full)
+            elif args.command == "watch":
+                sqnotes.watch_notes(poll_interval=args.interval)
+            elif args.command == "search-mode":
+                sqnotes.set_search_mode(args.mode)
+            elif args.command == "note-cache":
+                sqnotes.set_note_cache_ttl(args.ttl)
+            elif args.command == "lock":
+                sqnotes.lock_note_cache()
+
             else:
-                if args.command == "new":
-                    sqnotes.new_note()
-                elif args.new:
-                    sqnotes.directly_insert_note(text=args.new)
-                elif args.search:
-                    sqnotes.search_notes(search_queries=args.search)
-                elif args.keywords:
-                    sqnotes.search_keywords(keywords=args.keywords)
-                elif args.command == "notes-list":
-                    sqnotes.notes_list()
-                elif args.command == "verify-gpg":
-                    sqnotes.check_gpg_installed()
-    
-                elif (
-                    SET_TEXT_EDITOR_INTERACTIVE_FLAG
-                    and args.command == "config-text-editor"
-                ):
-                    sqnotes.choose_text_editor_interactive()
-                elif (
-                    SET_NOTES_PATH_INTERACTIVE_FLAG
-                    and args.command == SET_NOTES_PATH_COMMAND
-                ):
-                    sqnotes.set_notes_path_interactive()
-                elif args.command == "text-editors":
-                    sqnotes.check_available_text_editors()
-                elif args.command == "set-gpg-key":
-                    sqnotes.set_gpg_key_email(args.id)
-                elif args.command == "use-ascii-armor":
-                    if args.yes:
-                        sqnotes._set_use_ascii_armor(isUseArmor=True)
-                    elif args.no:
-                        sqnotes._set_use_ascii_armor(isUseArmor=False)
-                elif args.command == "search":
-                    sqnotes.search_notes(args.text)
-                elif args.command == "keywords":
-                    sqnotes.search_keywords(args.keywords)
-                elif args.command == "edit":
-                    sqnotes.edit_note(args.note)
-                elif args.command == "git":
-                    sqnotes.run_git_command(args.git_args)
-                elif args.command == "print-keywords":
-                    sqnotes.print_all_keywords()
-                elif args.command == "rescan":
-                    sqnotes.rescan_for_database()
-    
-                else:
-                    parser.print_help()
\ No newline at end of file
+                parser.print_help()
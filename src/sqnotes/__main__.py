@@ -0,0 +1,4 @@
+from sqnotes.CLI_module import SQNotesCLI
+
+if __name__ == "__main__":
+    SQNotesCLI().main()
@@ -0,0 +1,177 @@
+import asyncio
+import codecs
+import time
+from injector import inject
+
+from sqnotes.sqnotes_logger import SQNotesLogger
+from sqnotes.encrypted_note_helper import (
+    GPGSubprocessException,
+    CouldNotReadNoteException,
+    DECRYPTION_CHUNK_SIZE,
+    MAX_BUFFERED_MATCH_CHARS,
+)
+from sqnotes.gpg_session import GPGSessionDecryptionException
+from sqnotes.query_matcher import BufferedNoteMatch
+
+GPG_DECRYPT_COMMAND = ['gpg', '--batch', '--decrypt']
+
+
+class AsyncEncryptedNoteHelper:
+    """Decrypt notes with asyncio subprocesses instead of a thread pool.
+
+    A semaphore bounds how many gpg processes run at once. The public
+    methods are plain generators that drive a private event loop, so the
+    caller gets each note, in order, as soon as it has been decrypted
+    while the notes after it are still being decrypted.
+
+    Given the active GPGSession, notes are decrypted through the GPGME
+    binding when it is installed, in the event loop's thread pool, and
+    each note's latency is recorded in the session.
+    """
+
+    @inject
+    def __init__(self, sqnotes_logger : SQNotesLogger):
+        self.logger = sqnotes_logger.get_logger(__name__)
+
+    async def _decrypt_in_chunks(self, note_path, handle_chunk, session=None, chunk_size=DECRYPTION_CHUNK_SIZE):
+        """Pass the decrypted text of a note to handle_chunk until it returns True."""
+        start_time = time.perf_counter()
+        if session is not None and session.is_using_library():
+            await self._decrypt_with_library(note_path=note_path, handle_chunk=handle_chunk, session=session)
+        else:
+            await self._decrypt_with_subprocess(note_path=note_path, handle_chunk=handle_chunk, chunk_size=chunk_size)
+        if session is not None:
+            session.record_latency(note_path=note_path, seconds=time.perf_counter() - start_time)
+
+    async def _decrypt_with_library(self, note_path, handle_chunk, session):
+        try:
+            with open(note_path, 'rb') as f:
+                encrypted_data = f.read()
+        except Exception as e:
+            self.logger.error("encountered an error attempting to read encrypted note")
+            self.logger.error(e)
+            raise CouldNotReadNoteException()
+        # the GPGME binding blocks, and only decrypts whole buffers
+        loop = asyncio.get_running_loop()
+        try:
+            decrypted_data = await loop.run_in_executor(None, session.decrypt, encrypted_data)
+            decrypted_text = decrypted_data.decode('utf-8')
+        except (GPGSessionDecryptionException, UnicodeDecodeError) as e:
+            self.logger.error("encountered an error while decrypting")
+            self.logger.error(e)
+            raise GPGSubprocessException()
+        if decrypted_text:
+            handle_chunk(decrypted_text)
+
+    async def _decrypt_with_subprocess(self, note_path, handle_chunk, chunk_size=DECRYPTION_CHUNK_SIZE):
+        try:
+            encrypted_file = open(note_path, 'rb')
+        except Exception as e:
+            self.logger.error("encountered an error attempting to read encrypted note")
+            self.logger.error(e)
+            raise CouldNotReadNoteException()
+        with encrypted_file:
+            try:
+                process = await asyncio.create_subprocess_exec(*GPG_DECRYPT_COMMAND,
+                                                               stdin=encrypted_file,
+                                                               stdout=asyncio.subprocess.PIPE,
+                                                               stderr=asyncio.subprocess.PIPE)
+            except Exception as e:
+                self.logger.error("encountered an error while decrypting")
+                self.logger.error(e)
+                raise GPGSubprocessException()
+            # drain stderr alongside stdout, so gpg never blocks on a full stderr pipe
+            error_output_task = asyncio.ensure_future(process.stderr.read())
+            decoder = codecs.getincrementaldecoder('utf-8')()
+            try:
+                while True:
+                    decrypted_data = await process.stdout.read(chunk_size)
+                    if not decrypted_data:
+                        break
+                    decrypted_text = decoder.decode(decrypted_data)
+                    if decrypted_text and handle_chunk(decrypted_text):
+                        return
+                error_output = await error_output_task
+                returncode = await process.wait()
+                if returncode != 0:
+                    self.logger.error(f"GPG failed with return code {returncode}")
+                    self.logger.error("Error message: " + error_output.decode(errors='replace'))
+                    raise GPGSubprocessException()
+                decrypted_text = decoder.decode(b'', final=True)
+                if decrypted_text:
+                    handle_chunk(decrypted_text)
+            except UnicodeDecodeError as e:
+                self.logger.error("encountered an error while decrypting")
+                self.logger.error(e)
+                raise GPGSubprocessException()
+            finally:
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
+                if not error_output_task.done():
+                    error_output_task.cancel()
+
+    async def _get_decrypted_content(self, note_path, semaphore, session=None):
+        chunks = []
+
+        def keep_chunk(chunk):
+            chunks.append(chunk)
+            return False
+
+        async with semaphore:
+            await self._decrypt_in_chunks(note_path=note_path, handle_chunk=keep_chunk, session=session)
+        return "".join(chunks)
+
+    async def _match_note(self, note_path, search_queries, semaphore, session=None):
+        note_match = BufferedNoteMatch(search_queries=search_queries,
+                                       max_buffered_chars=MAX_BUFFERED_MATCH_CHARS)
+        async with semaphore:
+            await self._decrypt_in_chunks(note_path=note_path, handle_chunk=note_match.feed, session=session)
+        return note_match.get_result()
+
+    def _run_in_note_order(self, note_paths, max_concurrency, note_coroutine):
+        loop = asyncio.new_event_loop()
+        try:
+            semaphore = asyncio.Semaphore(max_concurrency)
+            tasks = [loop.create_task(note_coroutine(note_path, semaphore)) for note_path in note_paths]
+            try:
+                for note_path, task in zip(note_paths, tasks):
+                    yield note_path, loop.run_until_complete(task)
+            finally:
+                for task in tasks:
+                    task.cancel()
+                # wait for cancelled notes to stop their gpg processes
+                loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        finally:
+            loop.close()
+
+    def get_decrypted_contents(self, note_paths, max_concurrency, session=None):
+        """Decrypt several notes with at most max_concurrency gpg processes at once.
+
+        Yields (note_path, decrypted_text) pairs in the same order as
+        note_paths. If a decryption fails, the exception is raised when
+        its note is reached and the remaining decryptions are cancelled.
+        """
+        self.logger.debug(f"decrypting {len(note_paths)} notes with up to {max_concurrency} gpg processes")
+        return self._run_in_note_order(
+            note_paths=note_paths,
+            max_concurrency=max_concurrency,
+            note_coroutine=lambda note_path, semaphore: self._get_decrypted_content(note_path=note_path,
+                                                                                    semaphore=semaphore,
+                                                                                    session=session)
+        )
+
+    def match_notes(self, note_paths, search_queries, max_concurrency, session=None):
+        """Like EncryptedNoteHelper.match_notes, on asyncio subprocesses.
+
+        Yields (note_path, (is_match, content)) pairs in note order.
+        """
+        self.logger.debug(f"matching {len(note_paths)} notes with up to {max_concurrency} gpg processes")
+        return self._run_in_note_order(
+            note_paths=note_paths,
+            max_concurrency=max_concurrency,
+            note_coroutine=lambda note_path, semaphore: self._match_note(note_path=note_path,
+                                                                         search_queries=search_queries,
+                                                                         semaphore=semaphore,
+                                                                         session=session)
+        )
@@ -1,7 +1,6 @@
 
 from sqnotes import interface_copy
 from injector import inject
-import pyinputplus
 from sqnotes.printer_helper import PrinterHelper
 
 
@@ -46,6 +45,8 @@ class ChooseTextEditor:
             print(interface_copy.PLEASE_CHOOSE_EDITOR())
                 
             prompt_message = interface_copy.SELECT_ONE_OF_FOLLOWING()
+            # imported here because it is slow to import and only used interactively
+            import pyinputplus
             try:
                 selected_editor = pyinputplus.inputMenu(self.available_editors, 
                                                     prompt = prompt_message, 
@@ -1,15 +1,72 @@
 
+import os
+import json
+import shutil
 import subprocess
+import tempfile
 import logging
 
 
 logger = logging.getLogger('command_validator')
 logger.setLevel(logging.DEBUG)
 
+PROBE_CACHE_FILENAME = "command_probes.json"
+
 class CommandValidator:
     
     @staticmethod
-    def verify_command(command_string):
+    def get_probe_cache_file(cache_dir):
+        return os.path.join(cache_dir, PROBE_CACHE_FILENAME)
+
+    @staticmethod
+    def _read_probe_cache(probe_cache_file):
+        if probe_cache_file is None:
+            return {}
+        try:
+            with open(probe_cache_file, 'r') as cache_file:
+                return json.load(cache_file)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _write_probe_cache(probe_cache_file, probe_cache):
+        if probe_cache_file is None:
+            return
+        cache_dir = os.path.dirname(probe_cache_file)
+        try:
+            file_descriptor, temp_cache_file = tempfile.mkstemp(dir=cache_dir, prefix=PROBE_CACHE_FILENAME)
+            with os.fdopen(file_descriptor, 'w') as cache_file:
+                json.dump(probe_cache, cache_file)
+            os.replace(temp_cache_file, probe_cache_file)
+        except OSError as e:
+            # the probe is simply run again next time
+            logger.error(e)
+
+    @staticmethod
+    def _get_binary_stamp(binary_path):
+        binary_stat = os.stat(binary_path)
+        return [binary_stat.st_mtime_ns, binary_stat.st_size]
+
+    @staticmethod
+    def verify_command(command_string, probe_cache_file=None):
+        """Return whether a command runs, probing it only once while its binary is unchanged.
+
+        Probes are remembered in probe_cache_file; without one the
+        command is probed every time.
+        """
+        binary_path = shutil.which(command_string)
+        if binary_path is None:
+            return False
+        binary_path = os.path.realpath(binary_path)
+        try:
+            binary_stamp = CommandValidator._get_binary_stamp(binary_path)
+        except OSError:
+            binary_stamp = None
+
+        probe_cache = CommandValidator._read_probe_cache(probe_cache_file)
+        if binary_stamp is not None and probe_cache.get(binary_path) == binary_stamp:
+            return True
+
         command = [command_string, '--version']
         try:
             subprocess.call(command,
@@ -18,15 +75,19 @@ class CommandValidator:
         except Exception as e:
             logger.error(e)
             return False
+
+        if binary_stamp is not None:
+            probe_cache[binary_path] = binary_stamp
+            CommandValidator._write_probe_cache(probe_cache_file, probe_cache)
         return True
     
     @staticmethod
-    def verify_vim():
-        return CommandValidator.verify_command(command_string='vim')
+    def verify_vim(probe_cache_file=None):
+        return CommandValidator.verify_command(command_string='vim', probe_cache_file=probe_cache_file)
 
     @staticmethod
-    def verify_nano():
-        return CommandValidator.verify_command(command_string='nano')
+    def verify_nano(probe_cache_file=None):
+        return CommandValidator.verify_command(command_string='nano', probe_cache_file=probe_cache_file)
     
     @staticmethod
     def get_validator_by_command(command_string):
@@ -0,0 +1,65 @@
+import os
+import marshal
+
+CACHE_DIR_NAME = "__pycache__"
+CACHE_FILE_SUFFIX = ".sqnotes-cache"
+CACHE_FORMAT_VERSION = 1
+
+
+def get_cache_path(source_path):
+    source_dir, source_name = os.path.split(os.path.abspath(source_path))
+    return os.path.join(source_dir, CACHE_DIR_NAME, source_name + CACHE_FILE_SUFFIX)
+
+
+def _read_cache(cache_path, source_stat):
+    try:
+        with open(cache_path, 'rb') as cache_file:
+            format_version, mtime_ns, size, data = marshal.load(cache_file)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if (format_version, mtime_ns, size) != (CACHE_FORMAT_VERSION, source_stat.st_mtime_ns, source_stat.st_size):
+        return None
+    return data
+
+
+def _write_cache(cache_path, source_stat, data):
+    # tempfile is slow to import and only needed on a cache miss
+    import tempfile
+    try:
+        serialized = marshal.dumps((CACHE_FORMAT_VERSION, source_stat.st_mtime_ns, source_stat.st_size, data))
+        cache_dir = os.path.dirname(cache_path)
+        os.makedirs(cache_dir, exist_ok=True)
+        file_descriptor, temp_path = tempfile.mkstemp(dir=cache_dir)
+        with os.fdopen(file_descriptor, 'wb') as temp_file:
+            temp_file.write(serialized)
+        os.replace(temp_path, cache_path)
+    except (OSError, ValueError):
+        # an unwritable install only costs a re-parse on the next start
+        pass
+
+
+def parse_yaml_file(source_path):
+    # imported here so that a cached file does not pay for PyYAML
+    import yaml
+    with open(source_path, 'r') as source_file:
+        return yaml.safe_load(source_file)
+
+
+def load_cached(source_path, parse):
+    """Return `parse(source_path)`, reusing a compiled snapshot if the file is unchanged.
+
+    Like a .pyc file, the snapshot is stored in a __pycache__ directory
+    next to the source and is keyed on the source's mtime and size. It
+    is written with marshal, so `parse` must return plain built-in
+    values (dicts, lists, strings, numbers, booleans, None).
+    """
+    try:
+        source_stat = os.stat(source_path)
+    except OSError:
+        return parse(source_path)
+    cache_path = get_cache_path(source_path)
+    data = _read_cache(cache_path=cache_path, source_stat=source_stat)
+    if data is None:
+        data = parse(source_path)
+        _write_cache(cache_path=cache_path, source_stat=source_stat, data=data)
+    return data
@@ -0,0 +1,21 @@
+SEARCH_MODE_KEY = "search_mode"
+SEARCH_MODE_SCAN = "scan"
+SEARCH_MODE_INDEX = "index"
+SEARCH_MODE_FTS = "fts"
+SEARCH_MODE_FTS_HASHED = "fts-hashed"
+SEARCH_MODES = [SEARCH_MODE_SCAN, SEARCH_MODE_INDEX, SEARCH_MODE_FTS, SEARCH_MODE_FTS_HASHED]
+ASCII_ARMOR_CONFIG_KEY = "armor"
+GPG_VERIFIED_KEY = "gpg_verified"
+INITIALIZED = "initialized"
+DATABASE_IS_SET_UP_KEY = "database_is_set_up"
+NOTES_PATH_KEY = "notes_path"
+GPG_KEY_EMAIL_KEY = "gpg_key_email"
+TEXT_EDITOR_KEY = "text_editor"
+DECRYPTION_WORKERS_KEY = "decryption_workers"
+DECRYPTION_ENGINE_KEY = "decryption_engine"
+DECRYPTION_ENGINE_THREADS = "threads"
+DECRYPTION_ENGINE_ASYNCIO = "asyncio"
+DECRYPTION_ENGINES = [DECRYPTION_ENGINE_THREADS, DECRYPTION_ENGINE_ASYNCIO]
+NOTE_CACHE_TTL_KEY = "note_cache_ttl"
+FTS_HASH_KEY_KEY = "fts_hash_key"
+DB_FILE_PATH_KEY = "DB_FILE_PATH"
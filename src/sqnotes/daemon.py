@@ -0,0 +1,72 @@
+import io
+import os
+import signal
+import contextlib
+
+from sqnotes.local_socket import PrivateUnixServer
+from sqnotes.daemon_client import DAEMON_PROTOCOL_VERSION
+
+
+def _get_exit_code(system_exit, stderr):
+    if system_exit.code is None:
+        return 0
+    if isinstance(system_exit.code, int):
+        return system_exit.code
+    # exit("message") prints the message and exits with status 1
+    stderr.write(f"{system_exit.code}\n")
+    return 1
+
+
+def _stop_on_sigterm(signum, frame):
+    raise KeyboardInterrupt()
+
+
+class SQNotesDaemonServer(PrivateUnixServer):
+    """Runs CLI commands sent by thin clients against one long-lived SQNotes.
+
+    The SQNotes instance keeps its database connection and settings
+    snapshot from one command to the next. Commands run one at a time,
+    in the client's working directory, and their output is sent back to
+    the client instead of being printed here.
+    """
+
+    def __init__(self, socket_path, sqnotes, run_command):
+        self.sqnotes = sqnotes
+        self.run_command = run_command
+        super().__init__(socket_path)
+
+    def handle_json_request(self, request):
+        if request.get('version') != DAEMON_PROTOCOL_VERSION:
+            return {'version' : DAEMON_PROTOCOL_VERSION}
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        exit_code = 0
+        previous_cwd = os.getcwd()
+        try:
+            os.chdir(request['cwd'])
+            with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+                self.sqnotes.reset_between_commands()
+                self.run_command(sqnotes=self.sqnotes, argv=request['argv'])
+        except SystemExit as e:
+            exit_code = _get_exit_code(system_exit=e, stderr=stderr)
+        except Exception as e:
+            self.sqnotes.logger.error(e)
+            stderr.write(f"{e}\n")
+            exit_code = 1
+        finally:
+            os.chdir(previous_cwd)
+        return {
+            'version' : DAEMON_PROTOCOL_VERSION,
+            'stdout' : stdout.getvalue(),
+            'stderr' : stderr.getvalue(),
+            'exit_code' : exit_code
+        }
+
+    def serve(self):
+        signal.signal(signal.SIGTERM, _stop_on_sigterm)
+        try:
+            self.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.remove_socket()
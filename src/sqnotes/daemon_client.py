@@ -0,0 +1,41 @@
+import os
+
+from sqnotes.config_cache import load_cached, parse_yaml_file
+from sqnotes.local_socket import send_request
+
+DAEMON_SOCKET_NAME = "daemon.sock"
+DAEMON_PROTOCOL_VERSION = 1
+USER_CONFIG_DIR_KEY = 'USER_CONFIG_DIR'
+
+config_file_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.yaml')
+
+
+def get_daemon_socket_path():
+    config = load_cached(source_path=config_file_path, parse=parse_yaml_file)
+    user_config_dir = os.path.expanduser(config[USER_CONFIG_DIR_KEY])
+    return os.path.join(user_config_dir, DAEMON_SOCKET_NAME)
+
+
+def run_in_daemon(argv):
+    """Run a CLI command in `sqnotes daemon`.
+
+    Returns (stdout, stderr, exit_code), or None if no daemon is running
+    or it could not run the command, in which case the caller runs the
+    command itself.
+    """
+    socket_path = get_daemon_socket_path()
+    if not os.path.exists(socket_path):
+        return None
+    request = {
+        'version' : DAEMON_PROTOCOL_VERSION,
+        'argv' : argv,
+        'cwd' : os.getcwd()
+    }
+    try:
+        # commands such as rescan can run for a long time, so there is no timeout
+        response = send_request(socket_path=socket_path, request=request, timeout=None)
+    except (OSError, ValueError):
+        return None
+    if response.get('version') != DAEMON_PROTOCOL_VERSION:
+        return None
+    return response['stdout'], response['stderr'], response['exit_code']
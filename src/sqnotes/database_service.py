@@ -1,20 +1,89 @@
 
 
 import sqlite3
+import time
 from injector import inject
 
+from sqnotes.sqnotes_logger import SQNotesLogger
+from sqnotes.keyword_query import parse_keyword_query, get_prefix_upper_bound, KeywordQueryPlanner
+
+DEFAULT_CONNECTION_PRAGMAS = {
+    'journal_mode' : 'WAL',
+    'synchronous' : 'NORMAL',
+    'cache_size' : -8000,
+    'temp_store' : 'MEMORY',
+    'mmap_size' : 268435456
+}
+FETCH_BATCH_SIZE = 256
+CONNECTION_PRAGMA_NAMES = ('journal_mode', 'synchronous', 'cache_size', 'temp_store', 'mmap_size')
+# SQLite reports these pragmas as numbers
+CONNECTION_PRAGMA_VALUE_NAMES = {
+    'synchronous' : {0 : 'OFF', 1 : 'NORMAL', 2 : 'FULL', 3 : 'EXTRA'},
+    'temp_store' : {0 : 'DEFAULT', 1 : 'FILE', 2 : 'MEMORY'}
+}
+
 class NoteNotFoundInDatabaseException(Exception):
     """Raise when could not find a note reference in the database."""
     
+class NoteFileManifestEntry:
+    
+    def __init__(self, size, mtime_ns, content_hash):
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.content_hash = content_hash
+        
+    def is_same_stat(self, other):
+        return self.size == other.size and self.mtime_ns == other.mtime_ns
+
+    def get_stamp(self):
+        return [self.size, self.mtime_ns]
+
+class FullTextSearchNotAvailableException(Exception):
+    """Raise if SQLite was built without the FTS5 extension."""
+    
+class SchemaMigrationException(Exception):
+    """Raise if a schema migration fails; the database is left at the previous version."""
+    
 class DatabaseService:
     @inject
-    def __init__(self):
+    def __init__(self, sqnotes_logger : SQNotesLogger):
         self.connected = False
+        self.is_full_text_search_available = None
+        self.logger = sqnotes_logger.get_logger(__name__)
         
-    def connect(self, db_file_path):
+    def connect(self, db_file_path, pragmas = None):
         self.db_file_path = db_file_path
         self.conn = sqlite3.connect(self.db_file_path)
         self.cursor = self.conn.cursor()
+        self.is_full_text_search_available = None
+        self._configure_connection(
+            pragmas=DEFAULT_CONNECTION_PRAGMAS if pragmas is None else pragmas
+        )
+        self.connected = True
+
+    def is_connected_to(self, db_file_path):
+        return self.connected and self.db_file_path == db_file_path
+        
+    def _configure_connection(self, pragmas):
+        for name, value in pragmas.items():
+            if name not in CONNECTION_PRAGMA_NAMES:
+                self.logger.warning(f"ignoring unsupported database pragma: {name}")
+                continue
+            value = str(value)
+            # PRAGMA statements do not accept bound parameters
+            if not value.lstrip('-').isalnum():
+                self.logger.warning(f"ignoring invalid value for database pragma {name}: {value}")
+                continue
+            self.cursor.execute(f'PRAGMA {name} = {value}')
+            self.cursor.fetchall()
+            
+    def get_connection_pragmas(self):
+        effective_pragmas = {}
+        for name in CONNECTION_PRAGMA_NAMES:
+            self.cursor.execute(f'PRAGMA {name}')
+            value = self.cursor.fetchone()[0]
+            effective_pragmas[name] = CONNECTION_PRAGMA_VALUE_NAMES.get(name, {}).get(value, value)
+        return effective_pragmas
         
     def _get_connection(self):
         return self.conn
@@ -29,6 +98,10 @@ class DatabaseService:
         return keywords
     
     def setup_database(self):
+        self._create_base_tables()
+        self.commit_transaction()
+        
+    def _create_base_tables(self):
         self.cursor.execute('''
             CREATE TABLE IF NOT EXISTS notes (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -52,9 +125,257 @@ class DatabaseService:
                 PRIMARY KEY (note_id, keyword_id)
             )
         ''')
-        self.commit_transaction()
         
+    def get_schema_version(self):
+        self.cursor.execute('PRAGMA user_version')
+        return self.cursor.fetchone()[0]
+    
+    def _set_schema_version(self, version):
+        # PRAGMA statements do not accept bound parameters
+        self.cursor.execute(f'PRAGMA user_version = {int(version)}')
+        
+    def _is_table_exists(self, table_name):
+        self.cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = ?", (table_name,))
+        return self.cursor.fetchone() is not None
+        
+    def _get_migrations(self):
+        """Ordered (version, description, step) schema migrations.
+        
+        Append new steps with the next version number; never change or
+        reorder a step that has shipped.
+        """
+        return [
+            (1, 'merge duplicates and add lookup indexes', self._migrate_add_lookup_indexes),
+            (2, 'add note files manifest', self._migrate_add_note_files_manifest),
+            (3, 'add full text search table', self._migrate_add_full_text_search),
+            (4, 'add keyword statistics', self._migrate_add_keyword_stats),
+        ]
+    
+    def get_latest_schema_version(self):
+        return self._get_migrations()[-1][0]
+    
+    def _create_migrations_table(self):
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                description TEXT NOT NULL,
+                applied_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                duration_ms REAL NOT NULL
+            )
+        ''')
+        
+    def get_applied_migrations(self):
+        self.cursor.execute('''
+            SELECT version, description, applied_at, duration_ms
+            FROM schema_migrations
+            ORDER BY version
+        ''')
+        return self.cursor.fetchall()
+        
+    def migrate_schema(self):
+        """Apply pending migrations, each in its own transaction.
+        
+        Returns (version, description, duration_ms) for each migration
+        applied.
+        """
+        if self.conn.in_transaction:
+            self.commit_transaction()
+        schema_version = self.get_schema_version()
+        applied_migrations = []
+        for version, description, step in self._get_migrations():
+            if version <= schema_version:
+                continue
+            self.logger.debug(f"applying schema migration {version}: {description}")
+            start_time = time.perf_counter()
+            self.cursor.execute('BEGIN')
+            try:
+                self._create_base_tables()
+                self._create_migrations_table()
+                step()
+                duration_ms = (time.perf_counter() - start_time) * 1000
+                self.cursor.execute('''
+                        INSERT OR REPLACE INTO schema_migrations (version, description, duration_ms)
+                        VALUES (?, ?, ?)
+                    ''', (version, description, duration_ms))
+                self._set_schema_version(version)
+                self.commit_transaction()
+            except sqlite3.Error as e:
+                self.conn.rollback()
+                self.logger.error(f"schema migration {version} failed")
+                self.logger.error(e)
+                raise SchemaMigrationException(e)
+            self.logger.debug(f"applied schema migration {version} in {duration_ms:.1f} ms")
+            applied_migrations.append((version, description, duration_ms))
+        return applied_migrations
+        
+    def _migrate_add_lookup_indexes(self):
+        self._remove_duplicate_keywords()
+        self._remove_duplicate_notes()
+        self._add_lookup_indexes()
+        
+    def _migrate_add_note_files_manifest(self):
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS note_files (
+                filename TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                content_hash TEXT NOT NULL
+            )
+        ''')
+        
+    def _migrate_add_full_text_search(self):
+        # optional: SQLite builds without FTS5 simply do without the table
+        self.setup_full_text_search()
+        
+    def _migrate_add_keyword_stats(self):
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS keyword_stats (
+                keyword_id INTEGER PRIMARY KEY,
+                note_count INTEGER NOT NULL,
+                last_used INTEGER,
+                FOREIGN KEY (keyword_id) REFERENCES keywords(id)
+            )
+        ''')
+        self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_keyword_stats_note_count ON keyword_stats (note_count)')
+        # when existing keywords were last used is not recorded
+        self.cursor.execute('''
+            INSERT OR REPLACE INTO keyword_stats (keyword_id, note_count, last_used)
+            SELECT keyword_id, COUNT(*), NULL
+            FROM note_keywords
+            GROUP BY keyword_id
+        ''')
+        
+    def _remove_duplicate_keywords(self):
+        # point links at the first row of each keyword, then drop the other rows
+        self.cursor.execute('''
+            INSERT OR IGNORE INTO note_keywords (note_id, keyword_id)
+            SELECT nk.note_id, kept.id
+            FROM note_keywords nk
+            JOIN keywords k ON k.id = nk.keyword_id
+            JOIN (SELECT keyword, MIN(id) AS id FROM keywords GROUP BY keyword) kept
+                ON kept.keyword = k.keyword
+            WHERE k.id != kept.id
+        ''')
+        self.cursor.execute('''
+            DELETE FROM note_keywords
+            WHERE keyword_id NOT IN (SELECT MIN(id) FROM keywords GROUP BY keyword)
+        ''')
+        self.cursor.execute('''
+            DELETE FROM keywords
+            WHERE id NOT IN (SELECT MIN(id) FROM keywords GROUP BY keyword)
+        ''')
+        
+    def _remove_duplicate_notes(self):
+        self.cursor.execute('''
+            INSERT OR IGNORE INTO note_keywords (note_id, keyword_id)
+            SELECT kept.id, nk.keyword_id
+            FROM note_keywords nk
+            JOIN notes n ON n.id = nk.note_id
+            JOIN (SELECT filename, MIN(id) AS id FROM notes GROUP BY filename) kept
+                ON kept.filename = n.filename
+            WHERE n.id != kept.id
+        ''')
+        self.cursor.execute('''
+            DELETE FROM note_keywords
+            WHERE note_id NOT IN (SELECT MIN(id) FROM notes GROUP BY filename)
+        ''')
+        self.cursor.execute('''
+            DELETE FROM notes
+            WHERE id NOT IN (SELECT MIN(id) FROM notes GROUP BY filename)
+        ''')
+        if self._is_table_exists('note_text'):
+            self.cursor.execute('DELETE FROM note_text WHERE rowid NOT IN (SELECT id FROM notes)')
+        
+    def _add_lookup_indexes(self):
+        self.cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_notes_filename ON notes (filename)')
+        self.cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_keywords_keyword ON keywords (keyword)')
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_note_keywords_keyword_id_note_id
+            ON note_keywords (keyword_id, note_id)
+        ''')
+        
+    def get_note_files_manifest(self):
+        self.cursor.execute('SELECT filename, size, mtime_ns, content_hash FROM note_files')
+        rows = self.cursor.fetchall()
+        return {row[0] : NoteFileManifestEntry(size=row[1], mtime_ns=row[2], content_hash=row[3]) for row in rows}
+    
+    def upsert_note_file_manifest_entry(self, filename, manifest_entry):
+        self.cursor.execute('''
+                INSERT OR REPLACE INTO note_files (filename, size, mtime_ns, content_hash)
+                VALUES (?, ?, ?, ?)
+            ''', (filename, manifest_entry.size, manifest_entry.mtime_ns, manifest_entry.content_hash))
+        
+    def clear_note_files_manifest(self):
+        self.cursor.execute('DELETE FROM note_files')
+        
+    def get_all_notes(self):
+        self.cursor.execute('SELECT id, filename FROM notes')
+        return self.cursor.fetchall()
+    
+    def delete_note_from_database(self, note_id, filename):
+        self._decrement_keyword_stats_for_note(note_id=note_id)
+        self.cursor.execute('DELETE FROM note_keywords WHERE note_id = ?', (note_id,))
+        self.cursor.execute('DELETE FROM notes WHERE id = ?', (note_id,))
+        self.cursor.execute('DELETE FROM note_files WHERE filename = ?', (filename,))
+        if self._get_is_full_text_search_available():
+            self.cursor.execute('DELETE FROM note_text WHERE rowid = ?', (note_id,))
+        
+    def setup_full_text_search(self):
+        try:
+            self.cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS note_text USING fts5 (
+                    content
+                )
+            ''')
+            self.is_full_text_search_available = True
+        except sqlite3.OperationalError:
+            # SQLite was compiled without FTS5
+            self.is_full_text_search_available = False
+        return self.is_full_text_search_available
+    
+    def _get_is_full_text_search_available(self):
+        if self.is_full_text_search_available is None:
+            self.is_full_text_search_available = self._is_table_exists('note_text')
+        return self.is_full_text_search_available
+    
+    def _check_full_text_search_available(self):
+        if not self._get_is_full_text_search_available():
+            raise FullTextSearchNotAvailableException()
+        
+    def upsert_note_text(self, note_id, text):
+        self._check_full_text_search_available()
+        self.cursor.execute('DELETE FROM note_text WHERE rowid = ?', (note_id,))
+        self.cursor.execute('''
+                INSERT INTO note_text (rowid, content)
+                VALUES (?, ?)
+            ''', (note_id, text))
+        
+    def clear_note_text(self):
+        if self._get_is_full_text_search_available():
+            self.cursor.execute('DELETE FROM note_text')
+        
+    def query_notes_by_text(self, match_expression):
+        self._check_full_text_search_available()
+        self.cursor.execute('''
+                SELECT n.filename
+                FROM note_text
+                JOIN notes n ON n.id = note_text.rowid
+                WHERE note_text MATCH ?
+                ORDER BY note_text.rank
+            ''', (match_expression,))
+        results = self.cursor.fetchall()
+        return results
         
+        
+    def get_filenames_with_note_text(self):
+        self._check_full_text_search_available()
+        self.cursor.execute('''
+                SELECT n.filename
+                FROM notes n
+                WHERE n.id IN (SELECT rowid FROM note_text)
+            ''')
+        return {row[0] for row in self.cursor.fetchall()}
+
     def insert_new_note_into_database(self, note_filename_base):
         self.cursor.execute('''
                 INSERT INTO notes (filename)
@@ -65,18 +386,66 @@ class DatabaseService:
         return note_id
     
     
-    def query_notes_by_keywords(self, keywords):
-        self.cursor.execute('''
-                SELECT n.filename
-                FROM notes n
-                JOIN note_keywords nk ON n.id = nk.note_id
-                JOIN keywords k ON nk.keyword_id = k.id
-                WHERE k.keyword IN ({})
-                GROUP BY n.filename
-                HAVING COUNT(*) = {}
-            '''.format(  ', '.join('?' for _ in keywords) , len(keywords)), keywords)
-        results = self.cursor.fetchall()
-        return results
+    def query_notes_by_keywords(self, keywords, limit=None, offset=0):
+        """Return an iterator of (filename,) rows of the notes matching a keyword query, by filename.
+
+        keywords are command-line arguments in the query language of
+        parse_keyword_query; plain keywords must all match. The query is
+        parsed and run straight away, so a malformed query raises here,
+        but rows are fetched from SQLite only as the iterator is consumed.
+        """
+        query = parse_keyword_query(keywords)
+        planner = KeywordQueryPlanner(get_note_count=self.get_keyword_note_count,
+                                      get_num_notes=self.get_num_notes)
+        if planner.is_known_empty(query):
+            return iter([])
+        note_ids_query, parameters = planner.compile(query)
+        # a cursor of its own, so the rows can be read while other queries run
+        cursor = self.conn.cursor()
+        cursor.execute(f'''
+                SELECT filename
+                FROM notes
+                WHERE id IN ({note_ids_query})
+                ORDER BY filename
+                LIMIT ? OFFSET ?
+            ''', parameters + [-1 if limit is None else limit, offset])
+        return self._iterate_rows(cursor=cursor)
+
+    def _iterate_rows(self, cursor):
+        try:
+            while True:
+                rows = cursor.fetchmany(FETCH_BATCH_SIZE)
+                if not rows:
+                    return
+                yield from rows
+        finally:
+            cursor.close()
+
+    def get_keyword_note_count(self, keyword_term):
+        if not keyword_term.is_prefix:
+            self.cursor.execute('''
+                SELECT s.note_count
+                FROM keywords k
+                JOIN keyword_stats s ON s.keyword_id = k.id
+                WHERE k.keyword = ?
+            ''', (keyword_term.keyword,))
+        elif keyword_term.keyword == "":
+            self.cursor.execute('SELECT SUM(note_count) FROM keyword_stats')
+        else:
+            self.cursor.execute('''
+                SELECT SUM(s.note_count)
+                FROM keywords k
+                JOIN keyword_stats s ON s.keyword_id = k.id
+                WHERE k.keyword >= ? AND k.keyword < ?
+            ''', (keyword_term.keyword, get_prefix_upper_bound(keyword_term.keyword)))
+        result = self.cursor.fetchone()
+        if result is None or result[0] is None:
+            return 0
+        return result[0]
+
+    def get_num_notes(self):
+        self.cursor.execute('SELECT COUNT(*) FROM notes')
+        return self.cursor.fetchone()[0]
     
     def insert_note_keyword_into_database(self, note_id, keyword_id):
         query = '''
@@ -85,6 +454,30 @@ class DatabaseService:
                 '''
         
         self.cursor.execute(query, (note_id, keyword_id))
+        self._increment_keyword_stats(keyword_ids=[keyword_id])
+        
+    def insert_note_keywords_into_database(self, note_id, keyword_ids):
+        self.cursor.execute('SELECT keyword_id FROM note_keywords WHERE note_id = ?', (note_id,))
+        linked_keyword_ids = {row[0] for row in self.cursor.fetchall()}
+        new_keyword_ids = [keyword_id for keyword_id in dict.fromkeys(keyword_ids)
+                           if keyword_id not in linked_keyword_ids]
+        query = '''
+                    INSERT INTO note_keywords (note_id, keyword_id)
+                    VALUES (?, ?)
+                '''
+        self.cursor.executemany(query, [(note_id, keyword_id) for keyword_id in new_keyword_ids])
+        self._increment_keyword_stats(keyword_ids=new_keyword_ids)
+        
+    def get_keyword_ids(self):
+        self.cursor.execute('SELECT keyword, id FROM keywords')
+        return {row[0] : row[1] for row in self.cursor.fetchall()}
+    
+    def insert_new_keyword_into_database(self, keyword):
+        self.cursor.execute('''
+                INSERT INTO keywords (keyword)
+                VALUES (?)
+            ''', (keyword,))
+        return self.cursor.lastrowid
         
     def insert_keyword_into_database(self, keyword):
         self.cursor.execute('SELECT id FROM keywords WHERE keyword = ?', (keyword,))
@@ -120,10 +513,44 @@ class DatabaseService:
             raise NoteNotFoundInDatabaseException()
         
     def delete_keywords_from_database_for_note(self, note_id):
+        self._decrement_keyword_stats_for_note(note_id=note_id)
         self.cursor.execute('DELETE FROM note_keywords WHERE note_id = ?', (note_id,))
+
+    def _decrement_keyword_stats_for_note(self, note_id):
+        # must run before the note's keyword links are deleted
+        self.cursor.execute('''
+            UPDATE keyword_stats
+            SET note_count = note_count - 1
+            WHERE keyword_id IN (SELECT keyword_id FROM note_keywords WHERE note_id = ?)
+        ''', (note_id,))
+
+    def _increment_keyword_stats(self, keyword_ids):
+        last_used = int(time.time())
+        self.cursor.executemany('''
+            INSERT INTO keyword_stats (keyword_id, note_count, last_used)
+            VALUES (?, 1, ?)
+            ON CONFLICT (keyword_id) DO UPDATE
+            SET note_count = note_count + 1, last_used = excluded.last_used
+        ''', [(keyword_id, last_used) for keyword_id in keyword_ids])
+
+    def get_keyword_counts(self, limit=None):
+        """Return (keyword, note_count) for keywords used by any note, most used first."""
+        self.cursor.execute('''
+            SELECT k.keyword, s.note_count
+            FROM keyword_stats s
+            JOIN keywords k ON k.id = s.keyword_id
+            WHERE s.note_count > 0
+            ORDER BY s.note_count DESC, k.keyword
+            LIMIT ?
+        ''', (-1 if limit is None else limit,))
+        return self.cursor.fetchall()
         
     def commit_transaction(self):
         self.conn.commit()
+
+    def rollback_transaction(self):
+        if self.connected and self.conn.in_transaction:
+            self.conn.rollback()
         
         
         
@@ -1,10 +1,22 @@
 
+import codecs
 import tempfile
 import subprocess
 import os
+import threading
+import time
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from injector import inject
 
 from sqnotes.sqnotes_logger import SQNotesLogger
+from sqnotes.gpg_session import GPGSession, GPGSessionDecryptionException
+from sqnotes.query_matcher import BufferedNoteMatch
+
+TEMP_NOTE_FILE_SUFFIX = ".tmp"
+DECRYPTION_CHUNK_SIZE = 64 * 1024
+# matching notes up to this size are kept so they can be printed without decrypting twice
+MAX_BUFFERED_MATCH_CHARS = 1024 * 1024
 
 class GPGSubprocessException(Exception):
     """Raise when an exception or error occurs in calling gpg in a subprocess."""
@@ -17,12 +29,28 @@ class EncryptedNoteHelper:
     @inject
     def __init__(self, sqnotes_logger : SQNotesLogger):
         self.logger = sqnotes_logger.get_logger(__name__)
+        self.session = None
+        
+    @contextmanager
+    def decryption_session(self):
+        """Record decryption latency, and share a GPGME context if installed, inside the block."""
+        if self.session is not None:
+            yield self.session
+            return
+        session = GPGSession(logger=self.logger)
+        session.start()
+        self.session = session
+        try:
+            yield session
+        finally:
+            self.session = None
+            session.end()
         
     
     def _call_gpg_subprocess_to_write_encrypted(self, in_commands):
         note_file_path = in_commands['output_path']
         GPG_KEY_EMAIL = in_commands['GPG_KEY_EMAIL']
-        infile = in_commands['infile']
+        plaintext = in_commands['plaintext']
         subprocess_command = ['gpg', 
                               '--yes',
                               '--quiet', 
@@ -31,51 +59,56 @@ class EncryptedNoteHelper:
                               note_file_path, 
                               '--encrypt', 
                               '--recipient', 
-                              GPG_KEY_EMAIL, 
-                              infile]
+                              GPG_KEY_EMAIL]
         
         if 'USE_ASCII_ARMOR' in in_commands and in_commands['USE_ASCII_ARMOR'] == 'yes':
             subprocess_command.insert(1, '--armor')
         
-        return subprocess.call(subprocess_command)
-        
-        
-    def _get_temp_plaintext_file(self):
-        with tempfile.NamedTemporaryFile(delete=False) as temp_plaintext_file:
-            temp_file_path = temp_plaintext_file.name
-        return temp_file_path
+        # with no input file gpg encrypts stdin, so the plaintext never touches disk
+        process = subprocess.run(subprocess_command,
+                                 input=plaintext.encode('utf-8'),
+                                 stdout=subprocess.DEVNULL)
+        return process.returncode
         
         
-    def _write_plaintext_to_temp_file(self, note_content, config=None):
-        self.logger.debug(f"about to write  '{note_content}' to temp file")
-            
-        temp_enc_filename = self._get_temp_plaintext_file()
-        self.logger.debug(f"tempfile name: {temp_enc_filename}")
-        with open(temp_enc_filename, 'w') as open_tempfile:
-            open_tempfile.write(note_content)
-        return temp_enc_filename
+    def _get_temp_note_file_path(self, note_file_path):
+        """Reserve a temp file next to the note so it can be renamed over it atomically."""
+        note_dir, note_name = os.path.split(os.path.abspath(note_file_path))
+        file_descriptor, temp_note_file_path = tempfile.mkstemp(dir=note_dir,
+                                                                prefix=f".{note_name}.",
+                                                                suffix=TEMP_NOTE_FILE_SUFFIX)
+        os.close(file_descriptor)
+        return temp_note_file_path
     
     def write_encrypted_note(self, note_file_path, note_content, config):
-        temp_enc_filename = self._write_plaintext_to_temp_file(
-                                            note_content = note_content, 
-                                            config = config)
-        self.logger.debug(f"printed to temp file: {temp_enc_filename}")
+        """Encrypt note_content into note_file_path.
+
+        The plaintext is piped to gpg on stdin and the ciphertext is
+        written to a sibling temp file that replaces the note in one
+        rename, so a failed write leaves any existing note untouched.
+        """
+        try:
+            temp_note_file_path = self._get_temp_note_file_path(note_file_path=note_file_path)
+        except OSError as e:
+            self.logger.error(e)
+            raise GPGSubprocessException()
+        self.logger.debug(f"encrypting note into temp file: {temp_note_file_path}")
         gpg_in_commands = {
             'GPG_KEY_EMAIL' : config['GPG_KEY_EMAIL'],
-            'output_path' : note_file_path,
-            'infile' : str(temp_enc_filename)
+            'output_path' : temp_note_file_path,
+            'plaintext' : note_content
         }
         if 'USE_ASCII_ARMOR' in config:
             gpg_in_commands['USE_ASCII_ARMOR'] = config['USE_ASCII_ARMOR']
             
         try:
             response = self._call_gpg_subprocess_to_write_encrypted(in_commands = gpg_in_commands)
-            self._delete_temp_file(temp_file=temp_enc_filename)
             if response != 0:
                 raise GPGSubprocessException()
+            os.replace(temp_note_file_path, note_file_path)
         except Exception as e:
             self.logger.error(e)
-            self._delete_temp_file(temp_file=temp_enc_filename)
+            self._delete_temp_file(temp_file=temp_note_file_path)
             raise GPGSubprocessException()
         
         
@@ -89,6 +122,17 @@ class EncryptedNoteHelper:
             self.logger.error("encountered an error attempting to read encrypted note")
             self.logger.error(e)
             raise CouldNotReadNoteException()
+        session = self.session
+        start_time = time.perf_counter()
+        if session is not None and session.is_using_library():
+            try:
+                decrypted_text = session.decrypt(encrypted_data).decode('utf-8')
+            except (GPGSessionDecryptionException, UnicodeDecodeError) as e:
+                self.logger.error("encountered an error while decrypting")
+                self.logger.error(e)
+                raise GPGSubprocessException()
+            session.record_latency(note_path=note_path, seconds=time.perf_counter() - start_time)
+            return decrypted_text
         try:
             gpg_command = ['gpg','--batch', '--decrypt']
             process = subprocess.run(
@@ -104,6 +148,8 @@ class EncryptedNoteHelper:
             
             decrypted_data = process.stdout
             decrypted_text = decrypted_data.decode('utf-8')
+            if session is not None:
+                session.record_latency(note_path=note_path, seconds=time.perf_counter() - start_time)
             return decrypted_text
         except subprocess.CalledProcessError as e:
             self.logger.error(f"GPG failed with return code {e.returncode}")
@@ -116,6 +162,141 @@ class EncryptedNoteHelper:
             raise GPGSubprocessException()
         
         
+    def get_decrypted_content_chunks(self, note_path, chunk_size=DECRYPTION_CHUNK_SIZE):
+        """Yield the decrypted text of a note in chunks as gpg produces it.
+
+        The ciphertext is handed to gpg as an open file and the plaintext
+        is decoded incrementally, so neither is held in memory in full.
+        Closing the generator before the end stops gpg.
+        """
+        session = self.session
+        if session is not None and session.is_using_library():
+            # the GPGME binding only decrypts whole buffers
+            yield self.get_decrypted_content_in_memory(note_path=note_path)
+            return
+        try:
+            encrypted_file = open(note_path, 'rb')
+        except Exception as e:
+            self.logger.error("encountered an error attempting to read encrypted note")
+            self.logger.error(e)
+            raise CouldNotReadNoteException()
+        start_time = time.perf_counter()
+        with encrypted_file:
+            try:
+                process = subprocess.Popen(['gpg', '--batch', '--decrypt'],
+                                           stdin=encrypted_file,
+                                           stdout=subprocess.PIPE,
+                                           stderr=subprocess.PIPE)
+            except Exception as e:
+                self.logger.error("encountered an error while decrypting")
+                self.logger.error(e)
+                raise GPGSubprocessException()
+            decoder = codecs.getincrementaldecoder('utf-8')()
+            try:
+                while True:
+                    decrypted_data = process.stdout.read(chunk_size)
+                    if not decrypted_data:
+                        break
+                    decrypted_text = decoder.decode(decrypted_data)
+                    if decrypted_text:
+                        yield decrypted_text
+                _, error_output = process.communicate()
+                if process.returncode != 0:
+                    self.logger.error(f"GPG failed with return code {process.returncode}")
+                    self.logger.error("Error message: " + error_output.decode(errors='replace'))
+                    raise GPGSubprocessException()
+                decrypted_text = decoder.decode(b'', final=True)
+                if decrypted_text:
+                    yield decrypted_text
+            except UnicodeDecodeError as e:
+                self.logger.error("encountered an error while decrypting")
+                self.logger.error(e)
+                raise GPGSubprocessException()
+            finally:
+                if process.returncode is None:
+                    process.kill()
+                    process.communicate()
+        if session is not None:
+            session.record_latency(note_path=note_path, seconds=time.perf_counter() - start_time)
+        
+        
+    def match_note(self, note_path, search_queries, max_buffered_chars=MAX_BUFFERED_MATCH_CHARS):
+        """Decrypt a note only as far as needed to tell whether it matches.
+
+        Returns (is_match, content). content is the decrypted text of a
+        matching note no longer than max_buffered_chars and None
+        otherwise. Past that size the note is matched on a sliding
+        window and gpg is stopped as soon as every query has been found.
+        """
+        note_match = BufferedNoteMatch(search_queries=search_queries,
+                                       max_buffered_chars=max_buffered_chars)
+        chunks = self.get_decrypted_content_chunks(note_path=note_path)
+        try:
+            for chunk in chunks:
+                if note_match.feed(chunk):
+                    break
+        finally:
+            chunks.close()
+        return note_match.get_result()
+        
+        
+    def _map_notes_in_pool(self, note_paths, max_workers, note_function):
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = []
+            failed = threading.Event()
+            
+            def cancel_pending_on_error(done_future):
+                if not done_future.cancelled() and done_future.exception() is not None:
+                    failed.set()
+                    for future in futures:
+                        future.cancel()
+            
+            for note_path in note_paths:
+                if failed.is_set():
+                    break
+                future = executor.submit(note_function, note_path)
+                futures.append(future)
+                future.add_done_callback(cancel_pending_on_error)
+            try:
+                for note_path, future in zip(note_paths, futures):
+                    yield note_path, future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
+        
+        
+    def get_decrypted_contents_in_memory(self, note_paths, max_workers):
+        """Decrypt several notes on a bounded pool of gpg subprocesses.
+
+        Yields (note_path, decrypted_text) pairs in the same order as
+        note_paths. If any decryption fails, decryptions that have not
+        started yet are cancelled and the exception is raised when its
+        note is reached.
+        """
+        self.logger.debug(f"decrypting {len(note_paths)} notes with {max_workers} workers")
+        return self._map_notes_in_pool(
+            note_paths=note_paths,
+            max_workers=max_workers,
+            note_function=lambda note_path: self.get_decrypted_content_in_memory(note_path=note_path)
+        )
+        
+        
+    def match_notes(self, note_paths, search_queries, max_workers):
+        """Run match_note over several notes on a bounded pool of gpg subprocesses.
+
+        Yields (note_path, (is_match, content)) pairs in the same order
+        as note_paths, with the same cancellation on error as
+        get_decrypted_contents_in_memory.
+        """
+        self.logger.debug(f"matching {len(note_paths)} notes with {max_workers} workers")
+        return self._map_notes_in_pool(
+            note_paths=note_paths,
+            max_workers=max_workers,
+            note_function=lambda note_path: self.match_note(note_path=note_path,
+                                                            search_queries=search_queries)
+        )
+        
+        
     def decrypt_note_into_temp_file(self, note_path):
         with tempfile.NamedTemporaryFile(delete=False) as temp_dec_file:
             temp_dec_filename = temp_dec_file.name
@@ -0,0 +1,34 @@
+import os
+
+from sqnotes.config_cache import load_cached
+
+
+class EnvironmentConfigurationNotFound(Exception):
+    """Raise if the environment configuration file is not found."""
+
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "../../"))
+if os.getenv("TESTING") == "true":
+    env_file_path = os.path.join(project_root, ".test.env")
+else:
+    env_file_path = os.path.join(project_root, ".env.production")
+if not os.path.exists(env_file_path):
+    raise EnvironmentConfigurationNotFound()
+
+
+def _parse_env_file(env_file_path):
+    # imported here so that a cached environment does not pay for python-dotenv
+    from dotenv import dotenv_values
+    return dict(dotenv_values(env_file_path))
+
+
+# same as load_dotenv: variables already set in the environment win
+for key, value in load_cached(source_path=env_file_path, parse=_parse_env_file).items():
+    if key not in os.environ and value is not None:
+        os.environ[key] = value
+
+
+SET_NOTES_PATH_INTERACTIVE_FLAG = (os.getenv("SET_NOTES_PATH_INTERACTIVE") == 'yes')
+IS_INITIALIZATION_GATE_REFACTORED_INSIDE_SQNOTES = (os.getenv("IS_INITIALIZATION_GATE_REFACTORED_INSIDE_SQNOTES") == 'yes')
+SET_TEXT_EDITOR_INTERACTIVE_FLAG = True
@@ -0,0 +1,190 @@
+import json
+import os
+import re
+from injector import inject
+
+from sqnotes.encrypted_note_helper import EncryptedNoteHelper
+from sqnotes.sqnotes_logger import SQNotesLogger
+
+TERM_PATTERN = re.compile(r"\w+")
+INDEX_FORMAT_VERSION = 2
+
+
+class FullTextIndexNotOpenException(Exception):
+    """Raise if the full text index is used before it has been opened."""
+
+
+class FullTextIndex:
+    """Inverted index of note text (term -> note filename -> positions).
+
+    The index is stored encrypted with the user's GPG key next to the
+    notes database and is decrypted at most once per session. Each note
+    is stored with the [size, mtime_ns] stamp of the file it was indexed
+    from, so notes changed outside SQNotes can be told apart.
+    """
+
+    @inject
+    def __init__(self,
+                 encrypted_note_helper : EncryptedNoteHelper,
+                 sqnotes_logger : SQNotesLogger):
+        self.encrypted_note_helper = encrypted_note_helper
+        self.logger = sqnotes_logger.get_logger(__name__)
+        self.index_path = None
+        self.notes = None
+        self.terms = None
+        self.stamps = None
+        self.is_modified = False
+
+    def open(self, index_path):
+        if index_path != self.index_path:
+            self.index_path = index_path
+            self.notes = None
+            self.terms = None
+            self.stamps = None
+            self.is_modified = False
+
+    def close(self):
+        """Forget the loaded index, discarding any unsaved changes."""
+        self.index_path = None
+        self.notes = None
+        self.terms = None
+        self.stamps = None
+        self.is_modified = False
+
+    def delete(self):
+        """Delete the stored index, so the next search starts a new one."""
+        if self.index_path is None:
+            raise FullTextIndexNotOpenException()
+        if os.path.exists(self.index_path):
+            os.remove(self.index_path)
+        self.notes = None
+        self.terms = None
+        self.stamps = None
+        self.is_modified = False
+
+    def is_open(self):
+        return self.index_path is not None
+
+    def _load(self):
+        if self.index_path is None:
+            raise FullTextIndexNotOpenException()
+        if self.notes is not None:
+            return
+        self.notes = {}
+        self.terms = {}
+        self.stamps = {}
+        if os.path.exists(self.index_path):
+            self.logger.debug(f"decrypting full text index {self.index_path}")
+            serialized_index = self.encrypted_note_helper.get_decrypted_content_in_memory(
+                note_path=self.index_path
+            )
+            try:
+                data = json.loads(serialized_index)
+            except ValueError as e:
+                # notes missing from the index are re-indexed on the next search
+                self.logger.error("could not parse full text index; starting a new one")
+                self.logger.error(e)
+                data = {}
+            for filename, note_terms in data.get('notes', {}).items():
+                self._add_note_terms(filename=filename, note_terms=note_terms)
+            # notes indexed before stamps were kept have none, and are indexed again
+            self.stamps = data.get('stamps', {})
+
+    @staticmethod
+    def _get_term_positions(content):
+        term_positions = {}
+        for position, match in enumerate(TERM_PATTERN.finditer(content.lower())):
+            term_positions.setdefault(match.group(), []).append(position)
+        return term_positions
+
+    def _add_note_terms(self, filename, note_terms):
+        self.notes[filename] = note_terms
+        for term, positions in note_terms.items():
+            self.terms.setdefault(term, {})[filename] = positions
+
+    def get_indexed_notes(self):
+        self._load()
+        return set(self.notes.keys())
+
+    def is_note_indexed(self, filename):
+        self._load()
+        return filename in self.notes
+
+    def get_note_stamp(self, filename):
+        self._load()
+        return self.stamps.get(filename)
+
+    def update_note(self, filename, content, stamp=None):
+        self.remove_note(filename=filename)
+        self._add_note_terms(filename=filename, note_terms=self._get_term_positions(content))
+        if stamp is not None:
+            self.stamps[filename] = stamp
+        self.is_modified = True
+
+    def remove_note(self, filename):
+        self._load()
+        self.stamps.pop(filename, None)
+        note_terms = self.notes.pop(filename, None)
+        if note_terms is None:
+            return
+        for term in note_terms:
+            postings = self.terms[term]
+            postings.pop(filename, None)
+            if not postings:
+                del self.terms[term]
+        self.is_modified = True
+
+    def clear(self):
+        if self.index_path is None:
+            raise FullTextIndexNotOpenException()
+        self.notes = {}
+        self.terms = {}
+        self.stamps = {}
+        self.is_modified = True
+
+    def _get_notes_containing_token(self, token):
+        matching_notes = set()
+        for term, postings in self.terms.items():
+            if token in term:
+                matching_notes.update(postings.keys())
+        return matching_notes
+
+    def find_candidate_notes(self, search_queries):
+        """Return filenames of indexed notes that may contain every query.
+
+        Queries are matched as case-insensitive substrings, so candidates
+        must still be checked against the decrypted text. Returns None if
+        a query has no word characters and so cannot be narrowed by the
+        index.
+        """
+        self._load()
+        candidate_notes = None
+        for query in search_queries:
+            tokens = TERM_PATTERN.findall(query.lower())
+            if len(tokens) == 0:
+                return None
+            for token in tokens:
+                matching_notes = self._get_notes_containing_token(token)
+                if candidate_notes is None:
+                    candidate_notes = matching_notes
+                else:
+                    candidate_notes &= matching_notes
+                if not candidate_notes:
+                    return set()
+        return candidate_notes if candidate_notes is not None else set()
+
+    def save(self, config):
+        if not self.is_modified:
+            return
+        data = {
+            'version' : INDEX_FORMAT_VERSION,
+            'notes' : self.notes,
+            'stamps' : self.stamps
+        }
+        self.logger.debug(f"encrypting full text index with {len(self.notes)} notes")
+        self.encrypted_note_helper.write_encrypted_note(
+            note_file_path=self.index_path,
+            note_content=json.dumps(data),
+            config=config
+        )
+        self.is_modified = False
@@ -0,0 +1,67 @@
+import threading
+
+try:
+    import gpg as gpgme
+except ImportError:
+    gpgme = None
+
+
+class GPGSessionDecryptionException(Exception):
+    """Raise when the GPG library binding fails to decrypt a note."""
+
+
+class GPGSession:
+    """Per-note latency reporting for a command that decrypts many notes.
+
+    The session records how long each note took to decrypt and logs a
+    summary when it ends. If the optional GPGME Python binding (`gpg`)
+    is installed, each worker thread also keeps one GPGME context for
+    the whole command instead of starting a gpg process per note.
+    Without it, which is the default install, every note is still
+    decrypted by its own gpg process.
+    """
+
+    def __init__(self, logger):
+        self.logger = logger
+        self.latencies = []
+        self._lock = threading.Lock()
+        self._thread_state = threading.local()
+
+    def is_using_library(self):
+        return gpgme is not None
+
+    def start(self):
+        if self.is_using_library():
+            self.logger.debug("decryption session using the GPGME library binding")
+        else:
+            self.logger.debug("decryption session using one gpg subprocess per note")
+
+    def _get_context(self):
+        context = getattr(self._thread_state, 'context', None)
+        if context is None:
+            context = gpgme.Context()
+            self._thread_state.context = context
+        return context
+
+    def decrypt(self, encrypted_data):
+        try:
+            decrypted_data, _, _ = self._get_context().decrypt(encrypted_data)
+        except Exception as e:
+            raise GPGSessionDecryptionException(e)
+        return decrypted_data
+
+    def record_latency(self, note_path, seconds):
+        with self._lock:
+            self.latencies.append(seconds)
+        self.logger.debug(f"decrypted {note_path} in {seconds * 1000:.1f} ms")
+
+    def end(self):
+        if len(self.latencies) == 0:
+            return
+        total_ms = sum(self.latencies) * 1000
+        mean_ms = total_ms / len(self.latencies)
+        max_ms = max(self.latencies) * 1000
+        self.logger.debug(
+            f"decrypted {len(self.latencies)} notes: "
+            f"mean {mean_ms:.1f} ms/note, max {max_ms:.1f} ms, total {total_ms:.1f} ms"
+        )
@@ -29,4 +29,23 @@ TEXT_EDITOR_WAS_CONFIGURED = lambda : 'Set text editor for use with SQNotes: {}'
 INITIALIZATION_COMPLETE = lambda : 'Initialization completed.'
 PROMPT_FOR_PATH = lambda : 'Please enter a path. > '
 SETTING_THE_NOTES_PATH = lambda : 'Setting the path for the directory in which we will store your notes.'
-PATH_INPUT_COULD_NOT_BE_VERIFIED = lambda : 'Input path {} could not be verified as an available path on this system.'
\ No newline at end of file
+PATH_INPUT_COULD_NOT_BE_VERIFIED = lambda : 'Input path {} could not be verified as an available path on this system.'
+SEARCH_MODE_SET = lambda : 'Search mode set to: {}'
+FULL_TEXT_INDEX_NOT_UPDATED = lambda : 'Could not update the encrypted full text index. Notes missing from the index will be indexed on the next search.'
+FULL_TEXT_SEARCH_NOT_AVAILABLE = lambda : 'Full text search in the database is not available with this version of SQLite; searching by decrypting notes instead.'
+RESCAN_TO_BUILD_SEARCH_INDEX = lambda : 'Run `sqnotes rescan` to add your existing notes to the search index.'
+DATABASE_PATH_DIAGNOSTIC = lambda : 'database: {}'
+SCHEMA_VERSION_DIAGNOSTIC = lambda : 'schema version: {}'
+DATABASE_PRAGMA_DIAGNOSTIC = lambda : '{}: {}'
+NOTE_CACHE_ENABLED = lambda : 'Decrypted notes will be cached in memory for {} seconds. Run `sqnotes lock` to empty the cache. Copies of note text may remain in process memory until it is reused.'
+NOTE_CACHE_DISABLED = lambda : 'Decrypted notes will not be cached.'
+NOTE_CACHE_WIPED = lambda : 'Note cache wiped ({} notes).'
+NOTE_CACHE_NOT_RUNNING = lambda : 'No note cache is running.'
+DAEMON_LISTENING = lambda : 'SQNotes daemon listening on {}. Press Ctrl-C to stop.'
+DAEMON_ALREADY_RUNNING = lambda : 'An SQNotes daemon is already listening on {}.'
+INVALID_KEYWORD_QUERY = lambda : 'Invalid keyword query: {}. Combine keywords with AND, OR, NOT and parentheses; end a keyword with * to match a prefix.'
+KEYWORD_NOTE_COUNT = lambda : '{:>6}  {}'
+WATCHING_NOTES = lambda : 'Watching {} for changed notes. Press Ctrl-C to stop.'
+NOTE_CHANGES_INDEXED = lambda : 'Indexed {} changed notes; removed {} deleted notes.'
+NO_RESULTS_IN_WINDOW = lambda : 'Notes match, but none fall within the requested --offset and --limit.'
+NOTE_CHANGES_NOT_INDEXED = lambda : 'Could not decrypt a changed note, so this batch of changes was not indexed. Run `sqnotes rescan` to retry.'
@@ -0,0 +1,246 @@
+import re
+
+AND_OPERATOR = "AND"
+OR_OPERATOR = "OR"
+NOT_OPERATOR = "NOT"
+PREFIX_WILDCARD = "*"
+KEYWORD_QUERY_TOKEN_PATTERN = re.compile(r"\(|\)|[^\s()]+")
+ALL_NOTES_QUERY = 'SELECT id AS note_id FROM notes'
+
+
+class KeywordQueryException(Exception):
+    """Raise if a keyword query cannot be parsed."""
+
+
+class KeywordTerm:
+
+    def __init__(self, keyword, is_prefix=False):
+        self.keyword = keyword
+        self.is_prefix = is_prefix
+
+    def __eq__(self, other):
+        return isinstance(other, KeywordTerm) and (self.keyword, self.is_prefix) == (other.keyword, other.is_prefix)
+
+    def __repr__(self):
+        return f"KeywordTerm({self.keyword!r}{', is_prefix=True' if self.is_prefix else ''})"
+
+
+class AndQuery:
+
+    def __init__(self, children):
+        self.children = children
+
+    def __eq__(self, other):
+        return isinstance(other, AndQuery) and self.children == other.children
+
+    def __repr__(self):
+        return f"AndQuery({self.children!r})"
+
+
+class OrQuery:
+
+    def __init__(self, children):
+        self.children = children
+
+    def __eq__(self, other):
+        return isinstance(other, OrQuery) and self.children == other.children
+
+    def __repr__(self):
+        return f"OrQuery({self.children!r})"
+
+
+class NotQuery:
+
+    def __init__(self, child):
+        self.child = child
+
+    def __eq__(self, other):
+        return isinstance(other, NotQuery) and self.child == other.child
+
+    def __repr__(self):
+        return f"NotQuery({self.child!r})"
+
+
+class _KeywordQueryParser:
+    """Recursive descent parser; NOT binds tighter than AND, AND tighter than OR."""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.position = 0
+
+    def _peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None
+
+    def _take(self):
+        token = self._peek()
+        self.position += 1
+        return token
+
+    def parse(self):
+        if len(self.tokens) == 0:
+            raise KeywordQueryException("empty keyword query")
+        query = self._parse_or()
+        if self._peek() is not None:
+            raise KeywordQueryException(f"unexpected '{self._peek()}' in keyword query")
+        return query
+
+    def _parse_or(self):
+        children = [self._parse_and()]
+        while self._peek() == OR_OPERATOR:
+            self._take()
+            children.append(self._parse_and())
+        return children[0] if len(children) == 1 else OrQuery(children)
+
+    def _parse_and(self):
+        children = [self._parse_not()]
+        while self._peek() not in (None, OR_OPERATOR, ")"):
+            # keywords next to each other are joined by an implicit AND
+            if self._peek() == AND_OPERATOR:
+                self._take()
+            children.append(self._parse_not())
+        return children[0] if len(children) == 1 else AndQuery(children)
+
+    def _parse_not(self):
+        if self._peek() == NOT_OPERATOR:
+            self._take()
+            return NotQuery(self._parse_not())
+        return self._parse_term()
+
+    def _parse_term(self):
+        token = self._take()
+        if token is None:
+            raise KeywordQueryException("keyword query ends where a keyword was expected")
+        if token == "(":
+            query = self._parse_or()
+            if self._take() != ")":
+                raise KeywordQueryException("missing ')' in keyword query")
+            return query
+        if token in (")", AND_OPERATOR, OR_OPERATOR):
+            raise KeywordQueryException(f"unexpected '{token}' in keyword query")
+        keyword = token.lstrip("#")
+        is_prefix = keyword.endswith(PREFIX_WILDCARD)
+        keyword = keyword.rstrip(PREFIX_WILDCARD)
+        if keyword == "" and not is_prefix:
+            raise KeywordQueryException(f"'{token}' is not a keyword")
+        return KeywordTerm(keyword=keyword, is_prefix=is_prefix)
+
+
+def parse_keyword_query(keyword_arguments):
+    """Parse command-line keyword arguments into a query tree.
+
+    Keywords may be written with or without their '#'. A trailing '*'
+    matches every keyword with that prefix. Keywords next to each other
+    must all match; AND, OR, NOT (upper case) and parentheses combine
+    them, so `-k proj* NOT (#draft OR #old)` is a valid query.
+    """
+    tokens = []
+    for argument in keyword_arguments:
+        tokens.extend(KEYWORD_QUERY_TOKEN_PATTERN.findall(argument))
+    return _KeywordQueryParser(tokens).parse()
+
+
+def get_prefix_upper_bound(prefix):
+    # every keyword starting with prefix sorts at or after prefix and before this
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def get_keyword_term_query(term):
+    if not term.is_prefix:
+        return ('SELECT nk.note_id AS note_id FROM note_keywords nk '
+                'WHERE nk.keyword_id = (SELECT id FROM keywords WHERE keyword = ?)'), [term.keyword]
+    if term.keyword == "":
+        return 'SELECT DISTINCT nk.note_id AS note_id FROM note_keywords nk', []
+    # a range on the keyword index instead of LIKE, which cannot use it
+    return ('SELECT DISTINCT nk.note_id AS note_id FROM keywords k '
+            'JOIN note_keywords nk ON nk.keyword_id = k.id '
+            'WHERE k.keyword >= ? AND k.keyword < ?'), [term.keyword, get_prefix_upper_bound(term.keyword)]
+
+
+class KeywordQueryPlanner:
+    """Compile a keyword query tree into one compound SELECT of note ids.
+
+    AND becomes INTERSECT, OR becomes UNION and NOT becomes EXCEPT. The
+    parts of an AND are ordered by their estimated number of notes, most
+    selective first, so each INTERSECT works on the smallest set so far.
+    `get_note_count(term)` returns the number of notes having a keyword
+    term (an upper bound for prefixes) and `get_num_notes()` the number
+    of notes in the database; each is called at most once per term.
+    """
+
+    def __init__(self, get_note_count, get_num_notes):
+        self.get_note_count = get_note_count
+        self.get_num_notes = get_num_notes
+        self.note_counts = {}
+        self.num_notes = None
+
+    def _get_num_notes(self):
+        if self.num_notes is None:
+            self.num_notes = self.get_num_notes()
+        return self.num_notes
+
+    def _get_term_note_count(self, term):
+        term_key = (term.keyword, term.is_prefix)
+        if term_key not in self.note_counts:
+            self.note_counts[term_key] = self.get_note_count(term)
+        return self.note_counts[term_key]
+
+    def estimate_note_count(self, query):
+        if isinstance(query, KeywordTerm):
+            return self._get_term_note_count(query)
+        if isinstance(query, NotQuery):
+            return max(self._get_num_notes() - self.estimate_note_count(query.child), 0)
+        if isinstance(query, OrQuery):
+            return sum(self.estimate_note_count(child) for child in query.children)
+        positive_children = [child for child in query.children if not isinstance(child, NotQuery)]
+        if len(positive_children) == 0:
+            return self._get_num_notes()
+        return min(self.estimate_note_count(child) for child in positive_children)
+
+    def is_known_empty(self, query):
+        """Return True if the counts alone show that nothing can match, so the query need not run."""
+        if isinstance(query, KeywordTerm):
+            return self._get_term_note_count(query) == 0
+        if isinstance(query, NotQuery):
+            return False
+        if isinstance(query, OrQuery):
+            return all(self.is_known_empty(child) for child in query.children)
+        return any(self.is_known_empty(child) for child in query.children if not isinstance(child, NotQuery))
+
+    def _compile_operand(self, query):
+        sql, parameters = self.compile(query)
+        if isinstance(query, KeywordTerm) and not query.is_prefix:
+            return sql, parameters
+        # compound selects cannot be nested directly, only as subqueries
+        return f'SELECT note_id FROM ({sql})', parameters
+
+    def _compile_compound(self, operands, operator):
+        parts = []
+        parameters = []
+        for operand_sql, operand_parameters in operands:
+            parts.append(operand_sql)
+            parameters.extend(operand_parameters)
+        return f' {operator} '.join(parts), parameters
+
+    def compile(self, query):
+        """Return (sql, parameters) selecting the note_id of every matching note."""
+        if isinstance(query, KeywordTerm):
+            return get_keyword_term_query(query)
+        if isinstance(query, NotQuery):
+            return self._compile_compound([(ALL_NOTES_QUERY, []), self._compile_operand(query.child)], 'EXCEPT')
+        if isinstance(query, OrQuery):
+            return self._compile_compound([self._compile_operand(child) for child in query.children], 'UNION')
+
+        positive_children = [child for child in query.children if not isinstance(child, NotQuery)]
+        negated_children = [child.child for child in query.children if isinstance(child, NotQuery)]
+        positive_children.sort(key=self.estimate_note_count)
+        operands = [self._compile_operand(child) for child in positive_children]
+        if len(operands) == 0:
+            operands.append((ALL_NOTES_QUERY, []))
+        sql, parameters = self._compile_compound(operands, 'INTERSECT')
+        if len(negated_children) == 0:
+            return sql, parameters
+        # SQLite applies compound operators left to right
+        return self._compile_compound(
+            [(sql, parameters)] + [self._compile_operand(child) for child in negated_children], 'EXCEPT')
@@ -0,0 +1,76 @@
+import abc
+import os
+import json
+import socket
+import struct
+import socketserver
+
+
+def is_same_user(connection):
+    if not hasattr(socket, 'SO_PEERCRED'):
+        # the socket file's 0600 mode is the only check available
+        return True
+    credentials = connection.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+    _, uid, _ = struct.unpack('3i', credentials)
+    return uid == os.getuid()
+
+
+def is_listening(socket_path):
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client_socket:
+            client_socket.connect(socket_path)
+        return True
+    except OSError:
+        return False
+
+
+def send_request(socket_path, request, timeout):
+    """Send one JSON request line and return the decoded JSON response line."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client_socket:
+        client_socket.settimeout(timeout)
+        client_socket.connect(socket_path)
+        client_socket.sendall(json.dumps(request).encode('utf-8') + b"\n")
+        with client_socket.makefile('rb') as response_file:
+            return json.loads(response_file.readline())
+
+
+class _JsonLineRequestHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        if not is_same_user(self.connection):
+            return
+        try:
+            request = json.loads(self.rfile.readline())
+        except ValueError:
+            return
+        response = self.server.handle_json_request(request)
+        self.wfile.write(json.dumps(response).encode('utf-8') + b"\n")
+
+
+class PrivateUnixServer(socketserver.UnixStreamServer, metaclass=abc.ABCMeta):
+    """A Unix socket server that only its owner can connect to.
+
+    Each connection carries one JSON request line, answered with one
+    JSON response line by `handle_json_request`. A stale socket file
+    left by a server that did not shut down cleanly is replaced.
+    """
+
+    def __init__(self, socket_path):
+        self.socket_path = socket_path
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        previous_umask = os.umask(0o177)
+        try:
+            super().__init__(socket_path, _JsonLineRequestHandler)
+        finally:
+            os.umask(previous_umask)
+        os.chmod(socket_path, 0o600)
+
+    @abc.abstractmethod
+    def handle_json_request(self, request):
+        """Return the JSON response to one JSON request."""
+
+    def remove_socket(self):
+        self.server_close()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
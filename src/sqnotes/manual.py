@@ -19,6 +19,16 @@ To search your notes by keyword:
 
 `sqnotes -k [keyword1] ([keyword2] ...)`
 
+Keywords listed together must all match. Combine them with AND, OR, \
+NOT and parentheses, and end a keyword with * to match every keyword \
+with that prefix (quote the query so your shell leaves it alone):
+
+`sqnotes -k 'proj* NOT (draft OR old)'`
+
+To list the notes you created in May 2024, in date order:
+
+`sqnotes notes-list --sort date --since 2024-05 --until 2024-05`
+
 
 
 SQNotes is a note-keeping utility for helping you keep useful \
@@ -44,6 +54,11 @@ and close the editor, and SQNotes will index, encrypt, and save your note.
 Find your note later using either full text search (`search`) or \
 keyword search (`keyword`).
 
+If your notes change outside SQNotes (for example after \
+`sqnotes git pull`), run `sqnotes rescan` to index them, or leave \
+`sqnotes watch` running in a terminal to index changed notes as \
+they appear.
+
 """
 
 
@@ -69,6 +84,29 @@ temporary file which is then opened in your text editor. After editing, \
 the contents are encrypted and saved back to the original note file \
 and the temporary file is deleted.
 
+If you set the search mode to `index` (`sqnotes search-mode index`), \
+SQNotes keeps a full text index of your notes so that full text \
+search only needs to decrypt notes that may match. The index is \
+encrypted with your GPG key like your notes and is stored next to \
+the SQNotes database.
+
+The search modes `fts` and `fts-hashed` instead keep a search index \
+inside the SQNotes database, which is not encrypted. In `fts` mode \
+the database holds the plaintext of your notes, and searches match \
+the start of a word: `sqnotes search -t note` finds "notes" but not \
+"keynote", which `scan` mode would find. In `fts-hashed` mode the \
+database holds only keyed hashes of the words in your notes, so \
+searches match whole words only. After choosing either mode, run \
+`sqnotes rescan` to index your existing notes.
+
+If you turn on the note cache (`sqnotes note-cache [seconds]`), a \
+background process keeps decrypted notes in memory so that commands \
+run in quick succession do not decrypt them again. Notes are dropped \
+from the cache when they expire or when you run `sqnotes lock`, but \
+this is not a secure wipe: copies of their text can stay in the \
+memory of the cache process and of the SQNotes commands that used \
+them until that memory is reused.
+
 To use SQNotes, you will need to have GPG installed on your machine \
 and you will need a GPG key to use for encryption and decryption. \
 SQNotes will ask you to select your choice of key by configuring \
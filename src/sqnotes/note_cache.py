@@ -0,0 +1,231 @@
+import os
+import sys
+import time
+import argparse
+import subprocess
+from collections import OrderedDict
+
+from sqnotes.local_socket import PrivateUnixServer, is_listening, send_request
+
+NOTE_CACHE_SOCKET_NAME = "note_cache.sock"
+DEFAULT_MAX_CACHED_NOTES = 500
+CLIENT_TIMEOUT_SECONDS = 2
+DAEMON_START_TIMEOUT_SECONDS = 2
+DAEMON_POLL_SECONDS = 1
+
+GET_COMMAND = "get"
+PUT_COMMAND = "put"
+LOCK_COMMAND = "lock"
+
+
+class DecryptedNoteCache:
+    """Decrypted note bodies kept for at most `ttl_seconds`, least recently used first out.
+
+    Entries are keyed on the note path and the note file's (mtime_ns,
+    size) stamp, so an edited note is never served stale. Bodies are
+    held as bytearrays and overwritten with zeros when they expire, are
+    evicted or the cache is wiped. This is not secure eviction: bodies
+    arrive as str from the JSON request and `get` returns a new str,
+    and those immutable copies stay in the memory of the daemon and of
+    its clients until Python reuses it.
+    """
+
+    def __init__(self, ttl_seconds, max_notes=DEFAULT_MAX_CACHED_NOTES, clock=time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.max_notes = max_notes
+        self.clock = clock
+        self.entries = OrderedDict()
+
+    def _wipe_entry(self, note_path):
+        _, _, content = self.entries.pop(note_path)
+        content[:] = bytes(len(content))
+
+    def _wipe_expired(self):
+        now = self.clock()
+        expired_paths = [note_path for note_path, (_, expires_at, _) in self.entries.items() if expires_at <= now]
+        for note_path in expired_paths:
+            self._wipe_entry(note_path)
+
+    def get(self, note_path, stamp):
+        self._wipe_expired()
+        entry = self.entries.get(note_path)
+        if entry is None:
+            return None
+        cached_stamp, _, content = entry
+        if cached_stamp != stamp:
+            self._wipe_entry(note_path)
+            return None
+        self.entries.move_to_end(note_path)
+        return content.decode('utf-8')
+
+    def put(self, note_path, stamp, content):
+        self._wipe_expired()
+        if note_path in self.entries:
+            self._wipe_entry(note_path)
+        self.entries[note_path] = (stamp, self.clock() + self.ttl_seconds, bytearray(content.encode('utf-8')))
+        while len(self.entries) > self.max_notes:
+            self._wipe_entry(next(iter(self.entries)))
+
+    def wipe(self):
+        num_wiped = len(self.entries)
+        for note_path in list(self.entries):
+            self._wipe_entry(note_path)
+        return num_wiped
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class NoteCacheServer(PrivateUnixServer):
+    """Serves one DecryptedNoteCache over a Unix socket readable only by its owner.
+
+    Requests are handled one at a time. The daemon exits when it is
+    locked, or once it has had no requests for `ttl_seconds`, by which
+    time every entry it held has expired.
+    """
+
+    timeout = DAEMON_POLL_SECONDS
+
+    def __init__(self, socket_path, note_cache):
+        self.note_cache = note_cache
+        self.last_request_time = time.monotonic()
+        self.is_locked = False
+        super().__init__(socket_path)
+
+    def handle_json_request(self, request):
+        self.last_request_time = time.monotonic()
+        command = request.get('command')
+        if command == GET_COMMAND:
+            return {'contents' : [self.note_cache.get(note_path=note_path, stamp=stamp)
+                                  for note_path, stamp in request['notes']]}
+        if command == PUT_COMMAND:
+            self.note_cache.put(note_path=request['note_path'],
+                                stamp=request['stamp'],
+                                content=request['content'])
+            return {'ok' : True}
+        if command == LOCK_COMMAND:
+            self.is_locked = True
+            return {'ok' : True, 'wiped' : self.note_cache.wipe()}
+        return {'ok' : False}
+
+    def serve_until_idle(self):
+        try:
+            while (not self.is_locked
+                   and time.monotonic() - self.last_request_time < self.note_cache.ttl_seconds):
+                self.handle_request()
+        finally:
+            self.note_cache.wipe()
+            self.remove_socket()
+
+
+def get_note_stamp(note_path):
+    note_stat = os.stat(note_path)
+    return [note_stat.st_mtime_ns, note_stat.st_size]
+
+
+class NoteCacheClient:
+    """Talks to the note cache daemon, starting it on first use.
+
+    Any problem reaching the daemon is treated as a cache miss, so a
+    command never fails because of the cache.
+    """
+
+    def __init__(self, socket_path, ttl_seconds, logger):
+        self.socket_path = socket_path
+        self.ttl_seconds = ttl_seconds
+        self.logger = logger
+        self.is_daemon_start_attempted = False
+
+    def _send(self, request):
+        return send_request(socket_path=self.socket_path, request=request, timeout=CLIENT_TIMEOUT_SECONDS)
+
+    def _request(self, request, is_starting_daemon=True):
+        try:
+            return self._send(request=request)
+        except (FileNotFoundError, ConnectionRefusedError):
+            if not is_starting_daemon or not self._start_daemon():
+                return None
+        except (OSError, ValueError) as e:
+            self.logger.debug(f"note cache request failed: {e}")
+            return None
+        try:
+            return self._send(request=request)
+        except (OSError, ValueError) as e:
+            self.logger.debug(f"note cache request failed: {e}")
+            return None
+
+    def _start_daemon(self):
+        if self.is_daemon_start_attempted:
+            return False
+        self.is_daemon_start_attempted = True
+        self.logger.debug(f"starting note cache daemon at {self.socket_path}")
+        command = [sys.executable, '-m', 'sqnotes.note_cache',
+                   '--socket', self.socket_path,
+                   '--ttl', str(self.ttl_seconds)]
+        try:
+            subprocess.Popen(command,
+                             stdin=subprocess.DEVNULL,
+                             stdout=subprocess.DEVNULL,
+                             stderr=subprocess.DEVNULL,
+                             start_new_session=True)
+        except OSError as e:
+            self.logger.debug(f"could not start note cache daemon: {e}")
+            return False
+        deadline = time.monotonic() + DAEMON_START_TIMEOUT_SECONDS
+        while time.monotonic() < deadline:
+            if is_listening(self.socket_path):
+                return True
+            time.sleep(0.02)
+        return False
+
+    def get_many(self, note_paths):
+        """Return {note_path: content} for the notes the daemon holds unchanged."""
+        notes = []
+        for note_path in note_paths:
+            try:
+                notes.append([note_path, get_note_stamp(note_path)])
+            except OSError:
+                continue
+        if len(notes) == 0:
+            return {}
+        response = self._request({'command' : GET_COMMAND, 'notes' : notes})
+        if response is None:
+            return {}
+        return {note_path : content
+                for (note_path, _), content in zip(notes, response.get('contents', []))
+                if content is not None}
+
+    def put(self, note_path, content):
+        try:
+            stamp = get_note_stamp(note_path)
+        except OSError:
+            return
+        self._request({'command' : PUT_COMMAND,
+                       'note_path' : note_path,
+                       'stamp' : stamp,
+                       'content' : content})
+
+    def lock(self):
+        """Wipe the cache and stop the daemon; return the number of notes wiped, or None if none is running."""
+        response = self._request({'command' : LOCK_COMMAND}, is_starting_daemon=False)
+        if response is None:
+            return None
+        return response.get('wiped', 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SQNotes decrypted note cache daemon.')
+    parser.add_argument('--socket', required=True, help='Path of the Unix socket to listen on.')
+    parser.add_argument('--ttl', type=int, required=True, help='Seconds to keep each decrypted note.')
+    parser.add_argument('--max-notes', type=int, default=DEFAULT_MAX_CACHED_NOTES,
+                        help='Most notes to keep before evicting the least recently used.')
+    args = parser.parse_args()
+
+    if is_listening(args.socket):
+        return
+    note_cache = DecryptedNoteCache(ttl_seconds=args.ttl, max_notes=args.max_notes)
+    NoteCacheServer(socket_path=args.socket, note_cache=note_cache).serve_until_idle()
+
+
+if __name__ == '__main__':
+    main()
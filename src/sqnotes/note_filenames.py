@@ -0,0 +1,58 @@
+from datetime import datetime
+
+NOTE_EXTENSIONS = (".txt.gpg", ".txt")
+NOTE_TIMESTAMP_FORMAT = "%Y%m%d%H%M%S"
+NOTE_TIMESTAMP_LENGTH = 14
+# strptime format for each precision a date bound may be given in
+NOTE_DATE_BOUND_FORMATS = {4 : "%Y", 6 : "%Y%m", 8 : "%Y%m%d", 10 : "%Y%m%d%H", 12 : "%Y%m%d%H%M", 14 : NOTE_TIMESTAMP_FORMAT}
+SORT_BY_NAME = "name"
+SORT_BY_DATE = "date"
+NOTE_SORT_ORDERS = [SORT_BY_NAME, SORT_BY_DATE]
+
+
+def is_note_filename(filename):
+    return not filename.startswith(".") and filename.endswith(NOTE_EXTENSIONS)
+
+
+def get_note_timestamp(filename):
+    """Return the YYYYMMDDHHMMSS prefix of a note named by sqnotes, or None."""
+    timestamp = filename[:NOTE_TIMESTAMP_LENGTH]
+    if len(timestamp) != NOTE_TIMESTAMP_LENGTH or not timestamp.isdigit():
+        return None
+    return timestamp
+
+
+def parse_note_date_bound(value):
+    """Parse a --since/--until date into the digits it fixes of a note timestamp.
+
+    Accepts a year, month, day, hour, minute or second, with or without
+    separators (2024, 2024-05, 2024-05-17, 2024-05-17T09:30, ...). The
+    result is compared with the same number of leading timestamp digits,
+    so `--until 2024-05` includes every note from May 2024.
+    """
+    digits = "".join(character for character in value if character not in "-: T")
+    if not digits.isdigit() or len(digits) not in NOTE_DATE_BOUND_FORMATS:
+        raise ValueError(f"'{value}' is not a date")
+    try:
+        datetime.strptime(digits, NOTE_DATE_BOUND_FORMATS[len(digits)])
+    except ValueError:
+        raise ValueError(f"'{value}' is not a date")
+    return digits
+
+
+def is_note_in_date_range(filename, since=None, until=None):
+    if since is None and until is None:
+        return True
+    timestamp = get_note_timestamp(filename)
+    if timestamp is None:
+        return False
+    if since is not None and timestamp[:len(since)] < since:
+        return False
+    return until is None or timestamp[:len(until)] <= until
+
+
+def get_note_sort_key(sort):
+    if sort == SORT_BY_DATE:
+        # notes without a timestamp in their name go last
+        return lambda filename: (get_note_timestamp(filename) is None, get_note_timestamp(filename) or "", filename)
+    return lambda filename: filename
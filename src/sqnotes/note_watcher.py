@@ -0,0 +1,116 @@
+import os
+import time
+
+from sqnotes.note_filenames import is_note_filename
+
+DEFAULT_POLL_INTERVAL = 2.0
+# changes are reported once the notes directory has been quiet this long
+SETTLE_INTERVAL = 0.5
+# ...or this long after they started, if files keep changing
+MAX_SETTLE_TIME = 30.0
+
+
+def get_note_files_snapshot(notes_dir):
+    """Return {filename: (size, mtime_ns)} for the notes in notes_dir, from one os.scandir pass."""
+    snapshot = {}
+    with os.scandir(notes_dir) as entries:
+        for entry in entries:
+            if not is_note_filename(entry.name):
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                entry_stat = entry.stat()
+            except OSError:
+                # removed since the directory was read
+                continue
+            snapshot[entry.name] = (entry_stat.st_size, entry_stat.st_mtime_ns)
+    return snapshot
+
+
+class NoteFileChanges:
+
+    def __init__(self, added=(), changed=(), removed=()):
+        self.added = sorted(added)
+        self.changed = sorted(changed)
+        self.removed = sorted(removed)
+
+    def is_empty(self):
+        return len(self.added) + len(self.changed) + len(self.removed) == 0
+
+    def __eq__(self, other):
+        return isinstance(other, NoteFileChanges) and (self.added, self.changed, self.removed) == (other.added, other.changed, other.removed)
+
+    def __repr__(self):
+        return f"NoteFileChanges(added={self.added!r}, changed={self.changed!r}, removed={self.removed!r})"
+
+
+def get_note_file_changes(previous_snapshot, snapshot):
+    return NoteFileChanges(
+        added=snapshot.keys() - previous_snapshot.keys(),
+        changed=[filename for filename in snapshot.keys() & previous_snapshot.keys()
+                 if snapshot[filename] != previous_snapshot[filename]],
+        removed=previous_snapshot.keys() - snapshot.keys(),
+    )
+
+
+class NoteDirectoryWatcher:
+    """Poll a notes directory for added, changed and removed notes.
+
+    The standard library has no inotify binding, so each poll is one
+    os.scandir pass comparing sizes and mtimes with the last pass.
+    Changes are held back until the directory has been quiet for
+    SETTLE_INTERVAL, so a `git pull` that writes many notes is reported
+    as one batch and no note is read while it is still being written.
+    """
+
+    def __init__(self, notes_dir, poll_interval=DEFAULT_POLL_INTERVAL, clock=time.monotonic, sleep=time.sleep):
+        self.notes_dir = notes_dir
+        self.poll_interval = poll_interval
+        self.clock = clock
+        self.sleep = sleep
+        self.snapshot = get_note_files_snapshot(notes_dir)
+        # the snapshot the last batch was reported against
+        self.reported_snapshot = self.snapshot
+        self.last_poll_time = self.clock()
+        self.first_change_time = None
+
+    def _get_interval(self):
+        if self.first_change_time is None:
+            return self.poll_interval
+        return min(SETTLE_INTERVAL, self.poll_interval)
+
+    def get_time_until_poll(self):
+        return max(self.last_poll_time + self._get_interval() - self.clock(), 0)
+
+    def poll(self):
+        """Scan the notes directory if a poll is due.
+
+        Returns the NoteFileChanges since the last batch once they have
+        settled, or None.
+        """
+        if self.get_time_until_poll() > 0:
+            return None
+        now = self.clock()
+        self.last_poll_time = now
+        snapshot = get_note_files_snapshot(self.notes_dir)
+        if snapshot != self.snapshot:
+            self.snapshot = snapshot
+            if self.first_change_time is None:
+                self.first_change_time = now
+            if now - self.first_change_time < MAX_SETTLE_TIME:
+                return None
+        elif self.first_change_time is None:
+            return None
+        changes = get_note_file_changes(previous_snapshot=self.reported_snapshot, snapshot=self.snapshot)
+        self.reported_snapshot = self.snapshot
+        self.first_change_time = None
+        # a note added and removed again within one burst is no change
+        return None if changes.is_empty() else changes
+
+    def wait_for_changes(self):
+        while True:
+            self.sleep(self.get_time_until_poll())
+            changes = self.poll()
+            if changes is not None:
+                return changes
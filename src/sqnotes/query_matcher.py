@@ -0,0 +1,54 @@
+class IncrementalQueryMatcher:
+    """Case-insensitive substring matching over text that arrives in chunks.
+
+    Only the last (longest query - 1) characters are carried from one
+    chunk to the next, which is enough to find a query that straddles a
+    chunk boundary without holding the whole text.
+    """
+
+    def __init__(self, search_queries):
+        self.remaining_queries = {query.lower() for query in search_queries}
+        longest_query_length = max((len(query) for query in self.remaining_queries), default=0)
+        self.overlap_length = max(longest_query_length - 1, 0)
+        self.tail = ""
+
+    def feed(self, text_chunk):
+        """Match a chunk and return whether every query has now been found."""
+        if self.is_matched():
+            return True
+        window = self.tail + text_chunk.lower()
+        self.remaining_queries = {query for query in self.remaining_queries if query not in window}
+        self.tail = window[-self.overlap_length:] if self.overlap_length > 0 else ""
+        return self.is_matched()
+
+    def is_matched(self):
+        return len(self.remaining_queries) == 0
+
+
+class BufferedNoteMatch:
+    """Match one note chunk by chunk, keeping its text while it is small enough to print."""
+
+    def __init__(self, search_queries, max_buffered_chars):
+        self.matcher = IncrementalQueryMatcher(search_queries=search_queries)
+        self.max_buffered_chars = max_buffered_chars
+        self.buffered_chunks = []
+        self.buffered_chars = 0
+
+    def feed(self, text_chunk):
+        """Take the next chunk and return whether the rest of the note can be skipped."""
+        if self.buffered_chunks is not None:
+            self.buffered_chars += len(text_chunk)
+            if self.buffered_chars > self.max_buffered_chars:
+                self.buffered_chunks = None
+            else:
+                self.buffered_chunks.append(text_chunk)
+        is_match = self.matcher.feed(text_chunk)
+        return is_match and self.buffered_chunks is None
+
+    def get_result(self):
+        """Return (is_match, content); content is None unless the whole matching note was kept."""
+        if not self.matcher.is_matched():
+            return False, None
+        if self.buffered_chunks is None:
+            return True, None
+        return True, "".join(self.buffered_chunks)
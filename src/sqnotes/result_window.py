@@ -0,0 +1,21 @@
+class ResultWindow:
+    """The --offset/--limit slice of a command's results, counted as they are found."""
+
+    def __init__(self, limit=None, offset=0):
+        self.limit = limit
+        self.offset = offset
+        self.num_results = 0
+
+    def take(self):
+        """Count one more result and return whether it falls inside the window."""
+        if self.is_full():
+            return False
+        self.num_results += 1
+        return self.num_results > self.offset
+
+    def is_empty(self):
+        """Return whether no result has fallen inside the window."""
+        return self.num_results <= self.offset or self.limit == 0
+
+    def is_full(self):
+        return self.limit is not None and self.num_results >= self.offset + self.limit
@@ -1,15 +1,15 @@
-
-import yaml
 from injector import inject
 
+from sqnotes.config_cache import load_cached, parse_yaml_file
+
+
 class SQNotesConfig:
     @inject
     def __init__(self, config_file_path : str):
-        with open(config_file_path, 'r') as file:
-            self.data = yaml.safe_load(file)
+        self.data = load_cached(source_path=config_file_path, parse=parse_yaml_file)
             
     def get(self, key):
         if key in self.data:
             return self.data[key]
         else: 
-            return None
\ No newline at end of file
+            return None
@@ -1,28 +1,73 @@
-import argparse
 import os
-import glob
 import subprocess
 import tempfile
 from datetime import datetime
 import sqlite3
 import re
 import sys
+import hmac
+import hashlib
+import secrets
+import itertools
 
-from dotenv import load_dotenv
 from sqnotes import interface_copy
 from sqnotes.printer_helper import PrinterHelper
-
-from sqnotes.manual import Manual
+from sqnotes.environment import (
+    SET_NOTES_PATH_INTERACTIVE_FLAG,
+    SET_TEXT_EDITOR_INTERACTIVE_FLAG,
+    IS_INITIALIZATION_GATE_REFACTORED_INSIDE_SQNOTES,
+)
+from sqnotes.config_keys import (
+    SEARCH_MODE_KEY,
+    SEARCH_MODE_SCAN,
+    SEARCH_MODE_INDEX,
+    SEARCH_MODE_FTS,
+    SEARCH_MODE_FTS_HASHED,
+    SEARCH_MODES,
+    ASCII_ARMOR_CONFIG_KEY,
+    GPG_VERIFIED_KEY,
+    INITIALIZED,
+    DATABASE_IS_SET_UP_KEY,
+    NOTES_PATH_KEY,
+    GPG_KEY_EMAIL_KEY,
+    TEXT_EDITOR_KEY,
+    DECRYPTION_WORKERS_KEY,
+    DECRYPTION_ENGINE_KEY,
+    DECRYPTION_ENGINE_THREADS,
+    DECRYPTION_ENGINE_ASYNCIO,
+    NOTE_CACHE_TTL_KEY,
+    FTS_HASH_KEY_KEY,
+    DB_FILE_PATH_KEY,
+)
+from sqnotes.user_settings import UserSettings, YES
 from sqnotes.command_validator import CommandValidator
-from sqnotes.encrypted_note_helper import EncryptedNoteHelper, GPGSubprocessException
-from injector import inject, Injector
-from sqnotes.injection_configuration_module import InjectionConfigurationModule
+from sqnotes.encrypted_note_helper import (
+    EncryptedNoteHelper,
+    GPGSubprocessException,
+    CouldNotReadNoteException,
+)
+from sqnotes.full_text_index import FullTextIndex, TERM_PATTERN
+from sqnotes.keyword_query import KeywordQueryException
+from injector import inject
 from sqnotes.sqnotes_logger import SQNotesLogger
 from sqnotes.user_configuration_helper import UserConfigurationHelper
-from sqnotes.database_service import DatabaseService
+from sqnotes.database_service import (
+    DatabaseService,
+    FullTextSearchNotAvailableException,
+    NoteFileManifestEntry,
+    SchemaMigrationException,
+)
 from sqnotes.choose_text_editor import ChooseTextEditor, MaxInputAttemptsException
 from sqnotes.path_input_helper import PathInputHelper
 from sqnotes.fileinfo import FileInfo
+from sqnotes.result_window import ResultWindow
+from sqnotes.note_watcher import NoteDirectoryWatcher, DEFAULT_POLL_INTERVAL
+from sqnotes.note_filenames import (
+    NOTE_TIMESTAMP_FORMAT,
+    is_note_filename,
+    is_note_in_date_range,
+    get_note_sort_key,
+)
 from sqnotes.sqnotes_config_module import SQNotesConfig
 
 from sqnotes.custom_exceptions import (
@@ -38,42 +83,28 @@ from sqnotes.custom_exceptions import (
 
 VERSION = "0.2"
 DEBUGGING = "--debug" in sys.argv
-ASCII_ARMOR_CONFIG_KEY = "armor"
-GPG_VERIFIED_KEY = "gpg_verified"
-SET_TEXT_EDITOR_INTERACTIVE_FLAG = True
 
 VIM = "vim"
 NANO = "nano"
 GPG = "gpg"
-INITIALIZED = "initialized"
-DATABASE_IS_SET_UP_KEY = "database_is_set_up"
 NO = "no"
-NOTES_PATH_KEY = "notes_path"
-GPG_KEY_EMAIL_KEY = "gpg_key_email"
-TEXT_EDITOR_KEY = "text_editor"
+DEFAULT_DECRYPTION_WORKERS = 4
+RESCAN_CHECKPOINT_INTERVAL = 500
+# notes read from the database and decrypted together by keyword search
+NOTE_BATCH_SIZE = 64
 
 SUPPORTED_TEXT_EDITORS = [VIM, NANO]
 
 
-class EnvironmentConfigurationNotFound(Exception):
-    """Raise if the environment configuration file is not found."""
-
-
-current_dir = os.path.dirname(os.path.abspath(__file__))
-project_root = os.path.abspath(os.path.join(current_dir, "../../"))
-env_file_path = os.path.join(project_root, ".production.env")
-if os.getenv("TESTING") == "true":
-    env_file_path = os.path.join(project_root, ".test.env")
-else:
-    env_file_path = os.path.join(project_root, ".env.production")
-if not os.path.exists(env_file_path):
-    raise EnvironmentConfigurationNotFound()
-else:
-    load_dotenv(env_file_path)
 
 
-SET_NOTES_PATH_INTERACTIVE_FLAG = (os.getenv("SET_NOTES_PATH_INTERACTIVE") == 'yes')
-IS_INITIALIZATION_GATE_REFACTORED_INSIDE_SQNOTES = (os.getenv("IS_INITIALIZATION_GATE_REFACTORED_INSIDE_SQNOTES") == 'yes')
+def _get_batches(items, batch_size):
+    iterator = iter(items)
+    while True:
+        batch = list(itertools.islice(iterator, batch_size))
+        if len(batch) == 0:
+            return
+        yield batch
 
 
 class SQNotes:
@@ -84,9 +115,11 @@ class SQNotes:
     USER_CONFIG_DIR_KEY = 'USER_CONFIG_DIR'
     INIT_GLOBALS_KEY = 'INIT_GLOBALS'
     INIT_USER_SETTINGS_KEY = 'INIT_USER_SETTINGS'
-    DB_FILE_PATH_KEY = 'DB_FILE_PATH'
+    DB_FILE_PATH_KEY = DB_FILE_PATH_KEY
     DATABASE_FILE_NAME_KEY = 'DATABASE_FILE_NAME'
+    DATABASE_PRAGMAS_KEY = 'DATABASE_PRAGMAS'
     DATABASE_IS_SET_UP_KEY = 'DATABASE_IS_SET_UP'
+    FULL_TEXT_INDEX_FILE_NAME_KEY = 'FULL_TEXT_INDEX_FILE_NAME'
     @inject
     def __init__(
         self,
@@ -97,7 +130,8 @@ class SQNotes:
         choose_text_editor: ChooseTextEditor,
         printer_helper: PrinterHelper,
         path_input_helper: PathInputHelper,
-        sqnotes_config : SQNotesConfig
+        sqnotes_config : SQNotesConfig,
+        full_text_index : FullTextIndex
     ):
 
         self.encrypted_note_helper = encrypted_note_helper
@@ -110,6 +144,12 @@ class SQNotes:
         self.printer_helper = printer_helper
         self.path_input_helper = path_input_helper
         self.sqnotes_config = sqnotes_config
+        self.full_text_index = full_text_index
+        self.async_encrypted_note_helper = None
+        self.note_cache_client = None
+        self.settings = None
+        self.user_config_stamp = None
+        self.probe_cache_file = None
 
 
     def new_note(self):
@@ -166,38 +206,68 @@ class SQNotes:
 
         self._insert_new_note(note_content=text, notes_dir=NOTES_DIR)
 
-    def search_keywords(self, keywords):
+    def search_keywords(self, keywords, limit=None, offset=0, is_names_only=False):
+        if is_names_only:
+            # names come from the database, so nothing is decrypted
+            self._search_keywords(keywords=keywords, limit=limit, offset=offset, is_names_only=True)
+            return
+        with self.encrypted_note_helper.decryption_session():
+            self._search_keywords(keywords=keywords, limit=limit, offset=offset)
+
+    def _search_keywords(self, keywords, limit=None, offset=0, is_names_only=False):
         NOTES_DIR = self.get_notes_dir_from_config()
         self.open_database()
-        results = self.database_service.query_notes_by_keywords(keywords=keywords)
-        if results:
-            print("")  # blank line
-            for result in results:
-                note_path = os.path.join(NOTES_DIR, result[0])
-                try:
-                    decrypted_content = (
-                        self.encrypted_note_helper.get_decrypted_content_in_memory(
-                            note_path=note_path
-                        )
-                    )
-                except GPGSubprocessException:
-                    message = (
-                        interface_copy.GPG_SUBPROCESS_ERROR_MESSAGE()
-                        + "\n"
-                        + interface_copy.EXITING()
+        try:
+            results = self.database_service.query_notes_by_keywords(
+                keywords=keywords, limit=limit, offset=offset
+            )
+        except KeywordQueryException as e:
+            print(interface_copy.INVALID_KEYWORD_QUERY().format(e))
+            exit(1)
+        is_found_any_notes = False
+        # rows are read from the database a batch at a time, and each batch
+        # is printed before the next is read
+        for filenames in _get_batches((result[0] for result in results), NOTE_BATCH_SIZE):
+            if is_names_only:
+                for filename in filenames:
+                    print(filename)
+                is_found_any_notes = True
+                continue
+            if not is_found_any_notes:
+                print("")  # blank line
+                is_found_any_notes = True
+            note_paths = [os.path.join(NOTES_DIR, filename) for filename in filenames]
+            try:
+                # each note is printed as soon as it and the notes before it are decrypted
+                for note_path, decrypted_content in self._get_decrypted_notes(
+                    note_paths=note_paths
+                ):
+                    self._print_note(
+                        note_path=note_path, decrypted_content=decrypted_content
                     )
-                    print(message)
-                    self.logger.error(message)
-                    exit(1)
-
-                self._print_note(
-                    note_path=note_path, decrypted_content=decrypted_content
+                    print("")  # blank line
+            except GPGSubprocessException:
+                message = (
+                    interface_copy.GPG_SUBPROCESS_ERROR_MESSAGE()
+                    + "\n"
+                    + interface_copy.EXITING()
                 )
-                print("")  # blank line
+                print(message)
+                self.logger.error(message)
+                exit(1)
 
+        if is_found_any_notes:
+            return
+        # an empty window does not mean no note matches
+        if (limit == 0 or offset > 0) and self._is_any_note_matching_keywords(keywords=keywords):
+            print(interface_copy.NO_RESULTS_IN_WINDOW())
         else:
             print(f"No notes found with keywords: {keywords}")
 
+    def _is_any_note_matching_keywords(self, keywords):
+        results = self.database_service.query_notes_by_keywords(keywords=keywords, limit=1)
+        return next(iter(results), None) is not None
+
     def edit_note(self, filename):
         initialization_gate_toggle = self.sqnotes_config.get("IS_INITIALIZATION_GATE_REFACTORED_INSIDE_SQNOTES") == "yes"
         if initialization_gate_toggle and not self._get_is_initialized():
@@ -229,9 +299,7 @@ class SQNotes:
 
         temp_dec_filename = ""
         try:
-            temp_dec_filename = self.encrypted_note_helper.decrypt_note_into_temp_file(
-                note_path=note_path
-            )
+            temp_dec_filename = self._decrypt_note_into_temp_file(note_path=note_path)
             edited_content = self._get_edited_note_from_text_editor(
                 temp_filename=temp_dec_filename
             )
@@ -241,6 +309,9 @@ class SQNotes:
             self.encrypted_note_helper.write_encrypted_note(
                 note_file_path=note_path, note_content=edited_content, config=config
             )
+            note_cache_client = self._get_note_cache_client()
+            if note_cache_client is not None:
+                note_cache_client.put(note_path=note_path, content=edited_content)
 
         except GPGSubprocessException as e:
             self.logger.error(e)
@@ -266,98 +337,510 @@ class SQNotes:
             self._extract_and_save_keywords(
                 note_id=note_id, note_content=edited_content
             )
+            self._save_note_text(note_id=note_id, note_content=edited_content)
             self.database_service.commit_transaction()
 
         except Exception:
             raise DatabaseException()
 
+        self._update_full_text_index(filename=filename, content=edited_content)
         print(f"Note edited: {filename}")
 
-    def search_notes(self, search_queries):
-        print(interface_copy.SOME_DELAY_FOR_DECRYPTION())
+    def search_notes(self, search_queries, limit=None, offset=0, is_names_only=False):
+        with self.encrypted_note_helper.decryption_session():
+            self._search_notes(
+                search_queries=search_queries,
+                result_window=ResultWindow(limit=limit, offset=offset),
+                is_names_only=is_names_only,
+            )
+
+    def _search_notes(self, search_queries, result_window=None, is_names_only=False):
+        if result_window is None:
+            result_window = ResultWindow()
+        search_mode = self._get_search_mode()
+        is_full_text_index_enabled = search_mode == SEARCH_MODE_INDEX
+        if search_mode == SEARCH_MODE_SCAN and not is_names_only:
+            print(interface_copy.SOME_DELAY_FOR_DECRYPTION())
         is_found_any_matches = False
-        notes_dir = self.get_notes_dir_from_config()
 
-        note_paths = self._get_all_note_paths()
         queries_in_lower_case = [query.lower() for query in search_queries]
-        for note_path in note_paths:
-            try:
-                decrypted_content = (
-                    self.encrypted_note_helper.get_decrypted_content_in_memory(
-                        note_path=note_path
-                    )
+        stale_note_stamps = None
+        try:
+            if is_full_text_index_enabled:
+                note_paths, stale_note_stamps = self._get_note_paths_from_full_text_index(
+                    search_queries=search_queries
                 )
-            except GPGSubprocessException as e:
-                self.logger.error(e)
-                message = (
-                    interface_copy.GPG_SUBPROCESS_ERROR_MESSAGE()
-                    + " "
-                    + interface_copy.EXITING()
+            elif self._is_database_full_text_search_enabled():
+                note_paths = self._get_note_paths_from_database_full_text_search(
+                    search_queries=search_queries
+                )
+            else:
+                note_paths = self._get_all_note_paths()
+            if is_full_text_index_enabled or self._get_note_cache_client() is not None:
+                is_found_any_matches = self._search_whole_notes(
+                    note_paths=note_paths,
+                    queries_in_lower_case=queries_in_lower_case,
+                    stale_note_stamps=stale_note_stamps,
+                    result_window=result_window,
+                    is_names_only=is_names_only,
                 )
-                self.printer_helper.print_to_so(message)
-                exit(self.GPG_ERROR)
+            else:
+                is_found_any_matches = self._search_notes_streaming(
+                    note_paths=note_paths,
+                    search_queries=search_queries,
+                    result_window=result_window,
+                    is_names_only=is_names_only,
+                )
+        except (GPGSubprocessException, CouldNotReadNoteException) as e:
+            self.logger.error(e)
+            message = (
+                interface_copy.GPG_SUBPROCESS_ERROR_MESSAGE()
+                + " "
+                + interface_copy.EXITING()
+            )
+            self.printer_helper.print_to_so(message)
+            exit(self.GPG_ERROR)
 
-            content_in_lower_case = decrypted_content.lower()
-            if all(
-                lowercase_query in content_in_lower_case
-                for lowercase_query in queries_in_lower_case
-            ):
-                print(f"\n{note_path}:\n{decrypted_content}")
-                is_found_any_matches = True
+        if is_full_text_index_enabled:
+            self._save_full_text_index()
 
         if not is_found_any_matches:
             print("no notes match search query")
+        elif result_window.is_empty():
+            print(interface_copy.NO_RESULTS_IN_WINDOW())
+
+    def _print_search_match(self, note_path, decrypted_content, is_names_only):
+        if is_names_only:
+            print(os.path.basename(note_path))
+        elif decrypted_content is None:
+            self._print_note_in_chunks(note_path=note_path)
+        else:
+            print(f"\n{note_path}:\n{decrypted_content}")
+
+    def _search_whole_notes(self, note_paths, queries_in_lower_case, stale_note_stamps=None,
+                            result_window=None, is_names_only=False):
+        """Search decrypted notes, re-indexing the notes in stale_note_stamps on the way."""
+        # the full text index and the note cache both need each note's full text
+        if result_window is None:
+            result_window = ResultWindow()
+        is_found_any_matches = False
+        decrypted_notes = self._get_decrypted_notes(note_paths=note_paths)
+        try:
+            for note_path, decrypted_content in decrypted_notes:
+                filename = os.path.basename(note_path)
+                if stale_note_stamps is not None and filename in stale_note_stamps:
+                    self.logger.debug(f"updating note in full text index: {filename}")
+                    self.full_text_index.update_note(
+                        filename=filename, content=decrypted_content, stamp=stale_note_stamps[filename]
+                    )
+                content_in_lower_case = decrypted_content.lower()
+                if not all(
+                    lowercase_query in content_in_lower_case
+                    for lowercase_query in queries_in_lower_case
+                ):
+                    continue
+                is_found_any_matches = True
+                if result_window.take():
+                    self._print_search_match(note_path=note_path,
+                                             decrypted_content=decrypted_content,
+                                             is_names_only=is_names_only)
+                if result_window.is_full():
+                    break
+        finally:
+            decrypted_notes.close()
+        return is_found_any_matches
 
+    def _search_notes_streaming(self, note_paths, search_queries, result_window=None, is_names_only=False):
+        if result_window is None:
+            result_window = ResultWindow()
+        is_found_any_matches = False
+        matched_notes = self._match_notes(
+            note_paths=note_paths, search_queries=search_queries
+        )
+        try:
+            for note_path, (is_match, decrypted_content) in matched_notes:
+                if not is_match:
+                    continue
+                is_found_any_matches = True
+                if result_window.take():
+                    self._print_search_match(note_path=note_path,
+                                             decrypted_content=decrypted_content,
+                                             is_names_only=is_names_only)
+                if result_window.is_full():
+                    # the notes after the window are not decrypted
+                    break
+        finally:
+            matched_notes.close()
+        return is_found_any_matches
 
-    def rescan_for_database(self):
+    def _print_note_in_chunks(self, note_path):
+        print(f"\n{note_path}:")
+        chunks = self.encrypted_note_helper.get_decrypted_content_chunks(
+            note_path=note_path
+        )
+        try:
+            for chunk in chunks:
+                print(chunk, end="")
+        finally:
+            chunks.close()
+        print()
+
+    def _get_note_paths_from_full_text_index(self, search_queries):
+        """Return the note paths that may match, and the stamps of notes the index is stale for.
+
+        Notes added or changed outside SQNotes do not match the stamp they
+        were indexed with (or have none), so they are searched too and
+        re-indexed as they are decrypted.
+        """
+        self.open_full_text_index()
+        note_paths = self._get_all_note_paths()
+        existing_notes = {os.path.basename(note_path) for note_path in note_paths}
+        indexed_notes = self.full_text_index.get_indexed_notes()
+        for removed_note in indexed_notes - existing_notes:
+            self.full_text_index.remove_note(filename=removed_note)
+
+        stale_note_stamps = {}
+        for note_path in note_paths:
+            filename = os.path.basename(note_path)
+            stamp = self._get_note_file_stamp(note_path=note_path)
+            if filename not in indexed_notes or stamp != self.full_text_index.get_note_stamp(filename=filename):
+                stale_note_stamps[filename] = stamp
+        candidate_notes = self.full_text_index.find_candidate_notes(
+            search_queries=search_queries
+        )
+        if candidate_notes is None:
+            return note_paths, stale_note_stamps
+        return [
+            note_path
+            for note_path in note_paths
+            if os.path.basename(note_path) in candidate_notes
+            or os.path.basename(note_path) in stale_note_stamps
+        ], stale_note_stamps
+
+    def _get_note_paths_from_database_full_text_search(self, search_queries):
+        match_expression = self._get_full_text_match_expression(
+            search_queries=search_queries
+        )
+        if match_expression is None:
+            return self._get_all_note_paths()
+        self.open_database()
+        try:
+            results = self.database_service.query_notes_by_text(
+                match_expression=match_expression
+            )
+            indexed_notes = self.database_service.get_filenames_with_note_text()
+        except FullTextSearchNotAvailableException:
+            self.printer_helper.print_to_so(interface_copy.FULL_TEXT_SEARCH_NOT_AVAILABLE())
+            return self._get_all_note_paths()
+        note_paths = self._get_all_note_paths()
+        existing_notes = {os.path.basename(note_path) for note_path in note_paths}
+        notes_dir = self.get_notes_dir_from_config()
+        matching_note_paths = [
+            os.path.join(notes_dir, result[0]) for result in results if result[0] in existing_notes
+        ]
+        # notes added outside SQNotes have no text in the database yet, so they are searched too
+        return matching_note_paths + [
+            note_path
+            for note_path in note_paths
+            if os.path.basename(note_path) not in indexed_notes
+        ]
+
+    def rescan_for_database(self, is_full_rescan=False):
+        with self.encrypted_note_helper.decryption_session():
+            self._rescan_for_database(is_full_rescan=is_full_rescan)
+
+    def _rescan_for_database(self, is_full_rescan=False):
         NOTES_DIR = self.get_notes_dir_from_config()
         self.open_database()
         files = self._get_all_note_paths()
         files_info = [
             FileInfo(path=file, base_name=os.path.basename(file)) for file in files
         ]
+        if is_full_rescan:
+            self.database_service.clear_note_files_manifest()
+        manifest = self.database_service.get_note_files_manifest()
+
+        is_full_text_index_enabled = self._is_full_text_index_enabled()
+        if is_full_text_index_enabled:
+            self.open_full_text_index()
+            if is_full_rescan:
+                self.full_text_index.clear()
+        if is_full_rescan and self._is_database_full_text_search_enabled():
+            self.database_service.clear_note_text()
+
+        num_removed = self._remove_deleted_notes_from_database(
+            existing_filenames={file_info.base_name for file_info in files_info}
+        )
 
+        keyword_ids = self.database_service.get_keyword_ids()
+        num_unchanged = 0
+        num_uncommitted = 0
+        changed_files = {}
         for file_info in files_info:
-            content = self.encrypted_note_helper.get_decrypted_content_in_memory(
-                note_path=file_info.path
+            manifest_entry = self._get_note_file_manifest_entry(note_path=file_info.path)
+            if self._is_note_file_unchanged(
+                filename=file_info.base_name,
+                manifest_entry=manifest_entry,
+                previous_manifest_entry=manifest.get(file_info.base_name),
+            ):
+                num_unchanged += 1
+                continue
+            changed_files[file_info.path] = (file_info, manifest_entry)
+
+        decrypted_notes = self._get_decrypted_notes(note_paths=list(changed_files))
+        for note_path, content in decrypted_notes:
+            file_info, manifest_entry = changed_files[note_path]
+            self._index_decrypted_note(
+                file_info=file_info,
+                manifest_entry=manifest_entry,
+                content=content,
+                keyword_ids=keyword_ids,
+                is_full_text_index_enabled=is_full_text_index_enabled,
             )
-            try:
-                note_id = self.database_service.get_note_id_from_database_or_none(
-                    filename=file_info
+            num_uncommitted += 1
+            if num_uncommitted >= RESCAN_CHECKPOINT_INTERVAL:
+                self.database_service.commit_transaction()
+                num_uncommitted = 0
+        self.database_service.commit_transaction()
+        if is_full_text_index_enabled:
+            self._save_full_text_index()
+        self.logger.debug(
+            f"rescan: {len(files_info) - num_unchanged} notes updated, "
+            f"{num_unchanged} unchanged, {num_removed} removed"
+        )
+        print("rescan complete")
+
+    def _index_decrypted_note(self, file_info, manifest_entry, content, keyword_ids, is_full_text_index_enabled):
+        if is_full_text_index_enabled:
+            self.full_text_index.update_note(
+                filename=file_info.base_name,
+                content=content,
+                stamp=None if manifest_entry is None else manifest_entry.get_stamp(),
+            )
+        try:
+            note_id = self.database_service.get_note_id_from_database_or_none(
+                filename=file_info.base_name
+            )
+
+            if note_id is None:
+                note_id = self.database_service.insert_new_note_into_database(
+                    note_filename_base=file_info.base_name
                 )
 
-                if note_id is None:
-                    note_id = self.database_service.insert_new_note_into_database(
-                        note_filename_base=file_info.base_name
-                    )
+            self.database_service.delete_keywords_from_database_for_note(
+                note_id=note_id
+            )
+            self._extract_and_save_keywords(
+                note_id=note_id, note_content=content, keyword_ids=keyword_ids
+            )
+            self._save_note_text(note_id=note_id, note_content=content)
+            if manifest_entry is not None:
+                self.database_service.upsert_note_file_manifest_entry(
+                    filename=file_info.base_name, manifest_entry=manifest_entry
+                )
+        except Exception:
+            raise DatabaseException()
+
+    def watch_notes(self, poll_interval=DEFAULT_POLL_INTERVAL):
+        """Keep the database in step with the notes directory until interrupted.
 
-                self.database_service.delete_keywords_from_database_for_note(
-                    note_id=note_id
+        Starts with an incremental rescan, then re-indexes only the notes
+        that are added, changed or removed, one batch per burst of changes.
+        """
+        notes_dir = self.get_notes_dir_from_config()
+        # snapshot before the rescan, so notes changed during it are not missed
+        watcher = NoteDirectoryWatcher(notes_dir=notes_dir, poll_interval=poll_interval)
+        self.rescan_for_database()
+        print(interface_copy.WATCHING_NOTES().format(notes_dir))
+        try:
+            while True:
+                self._index_note_file_changes(changes=watcher.wait_for_changes())
+        except KeyboardInterrupt:
+            pass
+
+    def _index_note_file_changes(self, changes):
+        try:
+            with self.encrypted_note_helper.decryption_session():
+                num_indexed = self._reindex_note_files(
+                    changed_filenames=changes.added + changes.changed,
+                    removed_filenames=changes.removed,
                 )
-                self._extract_and_save_keywords(note_id=note_id, note_content=content)
-                self.database_service.commit_transaction()
+        except (GPGSubprocessException, CouldNotReadNoteException) as e:
+            self.logger.error(e)
+            self.database_service.rollback_transaction()
+            # drop this batch's unsaved full text index changes along with the database's
+            self.full_text_index.close()
+            self.printer_helper.print_to_so(interface_copy.NOTE_CHANGES_NOT_INDEXED())
+            return
+        print(interface_copy.NOTE_CHANGES_INDEXED().format(num_indexed, len(changes.removed)))
+
+    def _reindex_note_files(self, changed_filenames, removed_filenames):
+        """Re-index the given note files in one transaction; return how many were decrypted.
+
+        Notes whose content hash matches the manifest (a `touch`, or a
+        checkout that rewrote the same bytes) are not decrypted.
+        """
+        notes_dir = self.get_notes_dir_from_config()
+        self.open_database()
+        manifest = self.database_service.get_note_files_manifest()
+        is_full_text_index_enabled = self._is_full_text_index_enabled()
+        if is_full_text_index_enabled:
+            self.open_full_text_index()
+
+        for filename in removed_filenames:
+            note_id = self.database_service.get_note_id_from_database_or_none(filename=filename)
+            if note_id is not None:
+                self._remove_note_from_database(note_id=note_id, filename=filename)
+
+        changed_files = {}
+        for filename in changed_filenames:
+            note_path = os.path.join(notes_dir, filename)
+            manifest_entry = self._get_note_file_manifest_entry(note_path=note_path)
+            if manifest_entry is None or self._is_note_file_unchanged(
+                filename=filename,
+                manifest_entry=manifest_entry,
+                previous_manifest_entry=manifest.get(filename),
+            ):
+                continue
+            changed_files[note_path] = (FileInfo(path=note_path, base_name=filename), manifest_entry)
+
+        keyword_ids = self.database_service.get_keyword_ids()
+        for note_path, content in self._get_decrypted_notes(note_paths=list(changed_files)):
+            file_info, manifest_entry = changed_files[note_path]
+            self._index_decrypted_note(
+                file_info=file_info,
+                manifest_entry=manifest_entry,
+                content=content,
+                keyword_ids=keyword_ids,
+                is_full_text_index_enabled=is_full_text_index_enabled,
+            )
+        self.database_service.commit_transaction()
+        if is_full_text_index_enabled:
+            self._save_full_text_index()
+        return len(changed_files)
 
-            except Exception:
-                raise DatabaseException()
-        print("rescan complete")
+    def _get_note_file_manifest_entry(self, note_path):
+        try:
+            file_stat = os.stat(note_path)
+        except OSError as e:
+            self.logger.error(e)
+            return None
+        return NoteFileManifestEntry(
+            size=file_stat.st_size,
+            mtime_ns=file_stat.st_mtime_ns,
+            content_hash=None,
+        )
 
-    def print_all_keywords(self):
+    def _get_note_file_stamp(self, note_path):
+        """Return the [size, mtime_ns] the full text index keeps for a note file, or None."""
+        manifest_entry = self._get_note_file_manifest_entry(note_path=note_path)
+        if manifest_entry is None:
+            return None
+        return manifest_entry.get_stamp()
+
+    def _get_note_file_hash(self, note_path):
+        file_hash = hashlib.sha256()
+        with open(note_path, "rb") as file:
+            for chunk in iter(lambda: file.read(65536), b""):
+                file_hash.update(chunk)
+        return file_hash.hexdigest()
+
+    def _is_note_file_unchanged(self, filename, manifest_entry, previous_manifest_entry):
+        """Compare a note file with the manifest, filling in its content hash.
+
+        Files whose size and mtime match the manifest are not read at all.
+        Files that were only touched (same content hash) get their new stat
+        recorded so they are skipped cheaply next time.
+        """
+        if manifest_entry is None:
+            return False
+        if previous_manifest_entry is not None and manifest_entry.is_same_stat(
+            previous_manifest_entry
+        ):
+            manifest_entry.content_hash = previous_manifest_entry.content_hash
+            return True
+        note_path = os.path.join(self.get_notes_dir_from_config(), filename)
+        manifest_entry.content_hash = self._get_note_file_hash(note_path=note_path)
+        if (
+            previous_manifest_entry is not None
+            and manifest_entry.content_hash == previous_manifest_entry.content_hash
+        ):
+            self.database_service.upsert_note_file_manifest_entry(
+                filename=filename, manifest_entry=manifest_entry
+            )
+            return True
+        return False
+
+    def _remove_deleted_notes_from_database(self, existing_filenames):
+        num_removed = 0
+        for note_id, filename in self.database_service.get_all_notes():
+            if filename in existing_filenames:
+                continue
+            self._remove_note_from_database(note_id=note_id, filename=filename)
+            num_removed += 1
+        return num_removed
+
+    def _remove_note_from_database(self, note_id, filename):
+        self.logger.debug(f"removing deleted note from database: {filename}")
+        self.database_service.delete_note_from_database(
+            note_id=note_id, filename=filename
+        )
+        if self._is_full_text_index_enabled():
+            self.full_text_index.remove_note(filename=filename)
+
+    def print_all_keywords(self, is_showing_counts=False, top=None):
         self.open_database()
-        keywords = self.database_service.get_all_keywords()
-        for kw in keywords:
-            print(kw)
+        if is_showing_counts or top is not None:
+            # keyword_stats answers this without joining every note's keywords
+            keyword_counts = self.database_service.get_keyword_counts(limit=top)
+            for keyword, note_count in keyword_counts:
+                if is_showing_counts:
+                    print(interface_copy.KEYWORD_NOTE_COUNT().format(note_count, keyword))
+                else:
+                    print(keyword)
+            keywords = [keyword for keyword, _ in keyword_counts]
+        else:
+            keywords = self.database_service.get_all_keywords()
+            for kw in keywords:
+                print(kw)
         if len(keywords) == 0:
             message = interface_copy.NO_KEYWORDS_IN_DATABASE()
             self.printer_helper.print_to_so(message)
 
-    def notes_list(self):
+    def print_database_diagnostics(self):
+        self.open_database()
+        print(interface_copy.DATABASE_PATH_DIAGNOSTIC().format(self._get_db_path_from_user_config()))
+        print(interface_copy.SCHEMA_VERSION_DIAGNOSTIC().format(self.database_service.get_schema_version()))
+        for name, value in self.database_service.get_connection_pragmas().items():
+            print(interface_copy.DATABASE_PRAGMA_DIAGNOSTIC().format(name, value))
+
+    def _get_database_pragmas_from_config(self):
+        return self.sqnotes_config.get(key = self.DATABASE_PRAGMAS_KEY)
+
+    def notes_list(self, limit=None, offset=0, sort=None, since=None, until=None):
+        """Print note filenames from one pass over the notes directory.
+
+        since and until are leading digits of a note timestamp, as
+        returned by parse_note_date_bound. The directory is listed rather
+        than the notes table, which is stale after notes change outside
+        SQNotes and cannot tell so without reading the directory anyway.
+        """
         self.logger.debug("printing notes list")
-        notes_dir = self.get_notes_dir_from_config()
-        files = self._get_all_note_paths()
-        filenames = [os.path.basename(file) for file in files]
-        for file in filenames:
-            self.logger.debug(f"note found: {file}")
-            print(file)
+        filenames = self._get_listed_note_filenames(
+            filenames=self._get_note_filenames_in_notes_dir(), sort=sort, since=since, until=until
+        )
+        end = None if limit is None else offset + limit
+        for filename in itertools.islice(filenames, offset, end):
+            print(filename)
+
+    def _get_listed_note_filenames(self, filenames, sort=None, since=None, until=None):
+        filenames = [
+            filename
+            for filename in filenames
+            if is_note_in_date_range(filename=filename, since=since, until=until)
+        ]
+        filenames.sort(key=get_note_sort_key(sort))
+        return filenames
 
     def check_available_text_editors(self):
         available_editors = self._get_available_text_editors()
@@ -378,12 +861,15 @@ class SQNotes:
         if notes_dir is None:
             raise NotesDirNotSelectedException()
         configured_db_path = self._get_db_path_from_user_config()
+        if self.database_service.is_connected_to(db_file_path=configured_db_path):
+            return
         
         self.logger.debug(f"opening database at {configured_db_path}")
 
         try:
             self.database_service.connect(
-                db_file_path=configured_db_path
+                db_file_path=configured_db_path,
+                pragmas=self._get_database_pragmas_from_config()
             )
         except Exception as e:
             self.logger.error(e)
@@ -394,6 +880,14 @@ class SQNotes:
             self.logger.debug("found database not set up")
             self.setup_database()
 
+        try:
+            applied_migrations = self.database_service.migrate_schema()
+        except (sqlite3.Error, SchemaMigrationException) as e:
+            self.logger.error(e)
+            raise CouldNotOpenDatabaseException()
+        for version, description, duration_ms in applied_migrations:
+            self.logger.debug(f"applied schema migration {version} ({description}) in {duration_ms:.1f} ms")
+
     def _get_input_from_text_editor(self, TEXT_EDITOR):
         with tempfile.NamedTemporaryFile(delete=False) as temp_file:
             temp_filename = temp_file.name
@@ -417,7 +911,7 @@ class SQNotes:
     def _get_new_note_name(self):
         is_use_armor = self._is_use_ascii_armor()
         extension = "txt" if is_use_armor else "txt.gpg"
-        datetime_string = datetime.now().strftime("%Y%m%d%H%M%S")
+        datetime_string = datetime.now().strftime(NOTE_TIMESTAMP_FORMAT)
         return f"{datetime_string}.{extension}"
 
     def _insert_new_note(self, note_content, notes_dir):
@@ -450,6 +944,7 @@ class SQNotes:
         
         note_added_message = interface_copy.NOTE_ADDED().format(base_filename)
         print(note_added_message)
+        self._update_full_text_index(filename=base_filename, content=note_content)
 
         try:
             note_id = self.database_service.insert_new_note_into_database(
@@ -457,6 +952,7 @@ class SQNotes:
             )
 
             self._extract_and_save_keywords(note_id=note_id, note_content=note_content)
+            self._save_note_text(note_id=note_id, note_content=note_content)
 
             self.database_service.commit_transaction()
             return note_id
@@ -487,25 +983,174 @@ class SQNotes:
                 )
                 exit(1)
 
-    def _extract_and_save_keywords(self, note_id, note_content):
+    def _extract_and_save_keywords(self, note_id, note_content, keyword_ids=None):
+        """Link a note to its hashtags, inserting keywords that are new.
+
+        keyword_ids is an optional keyword -> id map used by bulk operations
+        instead of looking up each keyword; new keywords are added to it.
+        """
         keywords = self._extract_keywords(note_content)
-        keyword_ids = []
+        note_keyword_ids = []
         for keyword in keywords:
-            keyword_id = self.database_service.insert_keyword_into_database(
-                keyword=keyword
+            if keyword_ids is None:
+                keyword_id = self.database_service.insert_keyword_into_database(
+                    keyword=keyword
+                )
+            elif keyword in keyword_ids:
+                keyword_id = keyword_ids[keyword]
+            else:
+                keyword_id = self.database_service.insert_new_keyword_into_database(
+                    keyword=keyword
+                )
+                keyword_ids[keyword] = keyword_id
+            note_keyword_ids.append(keyword_id)
+
+        self.database_service.insert_note_keywords_into_database(
+            note_id=note_id, keyword_ids=note_keyword_ids
+        )
+
+    def _get_decryption_engine(self):
+        configured_engine = self._get_user_setting(field="decryption_engine", key=DECRYPTION_ENGINE_KEY)
+        if configured_engine == DECRYPTION_ENGINE_ASYNCIO:
+            return DECRYPTION_ENGINE_ASYNCIO
+        return DECRYPTION_ENGINE_THREADS
+
+    def _get_async_encrypted_note_helper(self):
+        # asyncio is only imported by commands that decrypt with it
+        if self.async_encrypted_note_helper is None:
+            from sqnotes.async_encrypted_note_helper import AsyncEncryptedNoteHelper
+
+            self.async_encrypted_note_helper = AsyncEncryptedNoteHelper(
+                sqnotes_logger=self.sqnotes_logger
+            )
+        return self.async_encrypted_note_helper
+
+    def _get_decrypted_notes(self, note_paths):
+        """Yield (note_path, decrypted_content) in note order, using the note cache if it is on."""
+        note_cache_client = self._get_note_cache_client()
+        if note_cache_client is None:
+            return self._decrypt_notes(note_paths=note_paths)
+        return self._get_decrypted_notes_through_cache(
+            note_cache_client=note_cache_client, note_paths=note_paths
+        )
+
+    def _get_decrypted_notes_through_cache(self, note_cache_client, note_paths):
+        cached_contents = note_cache_client.get_many(note_paths=note_paths)
+        self.logger.debug(f"note cache: {len(cached_contents)} of {len(note_paths)} notes cached")
+        decrypted_notes = self._decrypt_notes(
+            note_paths=[note_path for note_path in note_paths if note_path not in cached_contents]
+        )
+        try:
+            for note_path in note_paths:
+                if note_path in cached_contents:
+                    yield note_path, cached_contents[note_path]
+                    continue
+                _, decrypted_content = next(decrypted_notes)
+                note_cache_client.put(note_path=note_path, content=decrypted_content)
+                yield note_path, decrypted_content
+        finally:
+            decrypted_notes.close()
+
+    def _decrypt_notes(self, note_paths):
+        """Yield (note_path, decrypted_content) in note order with the configured engine."""
+        if self._get_decryption_engine() == DECRYPTION_ENGINE_ASYNCIO:
+            return self._get_async_encrypted_note_helper().get_decrypted_contents(
+                note_paths=note_paths,
+                max_concurrency=self._get_decryption_workers(),
+                session=self.encrypted_note_helper.session,
             )
-            keyword_ids.append(keyword_id)
+        return self.encrypted_note_helper.get_decrypted_contents_in_memory(
+            note_paths=note_paths, max_workers=self._get_decryption_workers()
+        )
+
+    def _match_notes(self, note_paths, search_queries):
+        """Yield (note_path, (is_match, content)) in note order with the configured engine."""
+        if self._get_decryption_engine() == DECRYPTION_ENGINE_ASYNCIO:
+            return self._get_async_encrypted_note_helper().match_notes(
+                note_paths=note_paths,
+                search_queries=search_queries,
+                max_concurrency=self._get_decryption_workers(),
+                session=self.encrypted_note_helper.session,
+            )
+        return self.encrypted_note_helper.match_notes(
+            note_paths=note_paths,
+            search_queries=search_queries,
+            max_workers=self._get_decryption_workers(),
+        )
+
+    def _get_note_cache_ttl(self):
+        configured_ttl = self._get_user_setting(field="note_cache_ttl", key=NOTE_CACHE_TTL_KEY)
+        try:
+            return max(0, int(configured_ttl))
+        except (TypeError, ValueError):
+            return 0
+
+    def _get_note_cache_client(self):
+        """Return the client for the decrypted note cache, or None if the cache is off."""
+        ttl_seconds = self._get_note_cache_ttl()
+        if ttl_seconds == 0:
+            return None
+        if self.note_cache_client is None:
+            from sqnotes.note_cache import NoteCacheClient, NOTE_CACHE_SOCKET_NAME
+
+            self.note_cache_client = NoteCacheClient(
+                socket_path=os.path.join(self._get_user_config_dir(), NOTE_CACHE_SOCKET_NAME),
+                ttl_seconds=ttl_seconds,
+                logger=self.logger,
+            )
+        return self.note_cache_client
+
+    def _wipe_note_cache(self):
+        from sqnotes.note_cache import NoteCacheClient, NOTE_CACHE_SOCKET_NAME
+
+        note_cache_client = NoteCacheClient(
+            socket_path=os.path.join(self._get_user_config_dir(), NOTE_CACHE_SOCKET_NAME),
+            ttl_seconds=0,
+            logger=self.logger,
+        )
+        return note_cache_client.lock()
+
+    def lock_note_cache(self):
+        num_wiped = self._wipe_note_cache()
+        if num_wiped is None:
+            print(interface_copy.NOTE_CACHE_NOT_RUNNING())
+        else:
+            print(interface_copy.NOTE_CACHE_WIPED().format(num_wiped))
+
+    def set_note_cache_ttl(self, ttl_seconds):
+        ttl_seconds = max(0, ttl_seconds)
+        self.user_configuration_helper.set_setting_to_user_config(
+            key=NOTE_CACHE_TTL_KEY, value=str(ttl_seconds)
+        )
+        # a running daemon keeps its old TTL, so stop it; the next command starts a new one
+        self._wipe_note_cache()
+        if ttl_seconds == 0:
+            print(interface_copy.NOTE_CACHE_DISABLED())
+        else:
+            print(interface_copy.NOTE_CACHE_ENABLED().format(ttl_seconds))
 
-        for keyword_id in keyword_ids:
-            self.database_service.insert_note_keyword_into_database(note_id, keyword_id)
+    def _get_decryption_workers(self):
+        configured_workers = self._get_user_setting(field="decryption_workers", key=DECRYPTION_WORKERS_KEY)
+        try:
+            return max(1, int(configured_workers))
+        except (TypeError, ValueError):
+            return DEFAULT_DECRYPTION_WORKERS
 
     def _get_is_initialized(self):
-        value = self.user_configuration_helper.get_global_from_user_config(INITIALIZED)
-        self.logger.debug(f"checking initialized: {value}")
-        return self.user_configuration_helper.get_global_from_user_config(INITIALIZED) == "yes"
+        return self._is_user_setting_yes(field="initialized", key=INITIALIZED, is_global=True)
 
     
 
+    def _decrypt_note_into_temp_file(self, note_path):
+        note_cache_client = self._get_note_cache_client()
+        if note_cache_client is not None:
+            cached_content = note_cache_client.get_many(note_paths=[note_path]).get(note_path)
+            if cached_content is not None:
+                with tempfile.NamedTemporaryFile(mode="w", delete=False) as temp_dec_file:
+                    temp_dec_file.write(cached_content)
+                return temp_dec_file.name
+        return self.encrypted_note_helper.decrypt_note_into_temp_file(note_path=note_path)
+
     def _delete_temp_file(self, temp_file):
         if os.path.exists(temp_file):
             os.remove(temp_file)
@@ -529,7 +1174,7 @@ class SQNotes:
             )
             if validator_function is None:
                 continue
-            editor_is_supported = validator_function()
+            editor_is_supported = validator_function(probe_cache_file=self.probe_cache_file)
             if editor_is_supported:
                 available_editors.append(editor)
         return available_editors
@@ -552,7 +1197,7 @@ class SQNotes:
         return unique_tags
 
     def _get_db_path_from_user_config(self):
-        return self.user_configuration_helper.get_setting_from_user_config(key = self.DB_FILE_PATH_KEY)
+        return self._get_user_setting(field="db_file_path", key=self.DB_FILE_PATH_KEY)
 
     def _set_user_db_path(self, user_specified_directory = None):
         db_file_name = self.sqnotes_config.get(key = self.DATABASE_FILE_NAME_KEY)
@@ -572,37 +1217,37 @@ class SQNotes:
         
 
     def get_notes_dir_from_config(self):
-        self.logger.debug(f"about to call to get notes dir from config")
-        notes_dir_path = self.user_configuration_helper.get_setting_from_user_config(
-            key=NOTES_PATH_KEY
-        )
-        self.logger.debug(f"found {notes_dir_path}")
+        notes_dir_path = self._get_user_setting(field="notes_path", key=NOTES_PATH_KEY)
         if notes_dir_path is None:
             raise NotesDirNotConfiguredException()
         else:
             return notes_dir_path
 
     def _get_configured_text_editor(self):
-        text_editor = self.user_configuration_helper.get_setting_from_user_config("text_editor")
-
+        text_editor = self._get_user_setting(field="text_editor", key=TEXT_EDITOR_KEY)
         if text_editor is None:
             raise TextEditorNotConfiguredException()
         return text_editor
 
     def _is_text_editor_configured(self):
-        text_editor = self.user_configuration_helper.get_setting_from_user_config("text_editor")
+        text_editor = self._get_user_setting(field="text_editor", key=TEXT_EDITOR_KEY)
         return text_editor is not None and text_editor != ""
 
     def _get_all_note_paths(self):
         notes_dir = self.get_notes_dir_from_config()
         print(f"looking for notes in {notes_dir}")
-        extensions = ["txt.gpg", "txt"]
-        all_notes = []
-        for ex in extensions:
-            pattern = os.path.join(notes_dir, f"*.{ex}")
-            files = glob.glob(pattern)
-            all_notes.extend(files)
-        return all_notes
+        return [os.path.join(notes_dir, filename) for filename in self._get_note_filenames_in_notes_dir()]
+
+    def _get_note_filenames_in_notes_dir(self):
+        notes_dir = self.get_notes_dir_from_config()
+        # one pass; is_file() uses the directory entry's type, not a stat call
+        with os.scandir(notes_dir) as entries:
+            filenames = [
+                entry.name
+                for entry in entries
+                if is_note_filename(entry.name) and entry.is_file()
+            ]
+        return sorted(filenames)
 
     def _get_user_config_dir(self):
         configured_path =  self.sqnotes_config.get(key = self.USER_CONFIG_DIR_KEY)
@@ -677,7 +1322,7 @@ class SQNotes:
     def _check_gpg_verified(self):
         is_gpg_verified = self._get_gpg_verified()
         if not is_gpg_verified:
-            is_gpg_available = CommandValidator.verify_command(command_string=GPG)
+            is_gpg_available = CommandValidator.verify_command(command_string=GPG, probe_cache_file=self.probe_cache_file)
             if is_gpg_available:
                 self._set_gpg_verified()
             else:
@@ -687,12 +1332,16 @@ class SQNotes:
         self.user_configuration_helper.set_setting_to_user_config(key=GPG_VERIFIED_KEY, value="yes")
 
     def _get_gpg_verified(self):
-        return (
-            self.user_configuration_helper.get_setting_from_user_config(key=GPG_VERIFIED_KEY)
-            == "yes"
-        )
+        return self._is_user_setting_yes(field="gpg_verified", key=GPG_VERIFIED_KEY)
+
+    def batched_config_writes(self):
+        return self.user_configuration_helper.batched_writes()
 
     def initialize(self):
+        with self.batched_config_writes():
+            self._initialize()
+
+    def _initialize(self):
         selected_path = self.prompt_for_user_notes_path()
 
         self.user_configuration_helper.set_setting_to_user_config(
@@ -702,7 +1351,7 @@ class SQNotes:
             key=ASCII_ARMOR_CONFIG_KEY, value="yes"
         )
 
-        gpg_verified = CommandValidator.verify_command(command_string=GPG)
+        gpg_verified = CommandValidator.verify_command(command_string=GPG, probe_cache_file=self.probe_cache_file)
         if not gpg_verified:
             print(interface_copy.NEED_TO_INSTALL_GPG)
         else:
@@ -714,11 +1363,7 @@ class SQNotes:
         self.user_configuration_helper.set_global_to_user_config(key=INITIALIZED, value="yes")
 
     def _get_is_database_set_up(self):
-        is_set_up = (
-            self.user_configuration_helper.get_global_from_user_config(self.DATABASE_IS_SET_UP_KEY)
-            == "yes"
-        )
-        return is_set_up
+        return self._is_user_setting_yes(field="database_is_set_up", key=self.DATABASE_IS_SET_UP_KEY, is_global=True)
 
     def _set_database_is_set_up(self):
         self.user_configuration_helper.set_global_to_user_config(key=self.DATABASE_IS_SET_UP_KEY, value="yes")
@@ -734,10 +1379,7 @@ class SQNotes:
         self.path_input_helper.get_path_interactive()
 
     def _is_use_ascii_armor(self):
-        return (
-            self.user_configuration_helper.get_setting_from_user_config(key=ASCII_ARMOR_CONFIG_KEY)
-            == "yes"
-        )
+        return self._is_user_setting_yes(field="use_ascii_armor", key=ASCII_ARMOR_CONFIG_KEY)
 
     def _set_use_ascii_armor(self, isUseArmor):
         value = "yes" if isUseArmor else "no"
@@ -746,6 +1388,115 @@ class SQNotes:
         )
         self.logger.debug(f"set {ASCII_ARMOR_CONFIG_KEY}=yes")
 
+    def _get_search_mode(self):
+        search_mode = self._get_user_setting(field="search_mode", key=SEARCH_MODE_KEY)
+        if search_mode in SEARCH_MODES:
+            return search_mode
+        return SEARCH_MODE_SCAN
+
+    def set_search_mode(self, search_mode):
+        self.user_configuration_helper.set_setting_to_user_config(
+            key=SEARCH_MODE_KEY, value=search_mode
+        )
+        print(interface_copy.SEARCH_MODE_SET().format(search_mode))
+        self.open_database()
+        # do not leave note text behind in the database from a previous mode
+        self.database_service.clear_note_text()
+        # the next rescan has to read every note again to rebuild the search index
+        self.database_service.clear_note_files_manifest()
+        self.database_service.commit_transaction()
+        # nor an encrypted full text index that later changes would leave stale
+        self.open_full_text_index()
+        self.full_text_index.delete()
+        if search_mode in [SEARCH_MODE_INDEX, SEARCH_MODE_FTS, SEARCH_MODE_FTS_HASHED]:
+            self.printer_helper.print_to_so(interface_copy.RESCAN_TO_BUILD_SEARCH_INDEX())
+
+    def _is_full_text_index_enabled(self):
+        return self._get_search_mode() == SEARCH_MODE_INDEX
+
+    def _is_database_full_text_search_enabled(self):
+        return self._get_search_mode() in [SEARCH_MODE_FTS, SEARCH_MODE_FTS_HASHED]
+
+    def _get_fts_hash_key(self):
+        hash_key = self._get_user_setting(field="fts_hash_key", key=FTS_HASH_KEY_KEY)
+        if hash_key is None:
+            hash_key = secrets.token_hex(32)
+            self.user_configuration_helper.set_setting_to_user_config(
+                key=FTS_HASH_KEY_KEY, value=hash_key
+            )
+        return hash_key
+
+    def _get_hashed_terms(self, text):
+        hash_key = self._get_fts_hash_key().encode("utf-8")
+        return [
+            hmac.new(hash_key, term.encode("utf-8"), hashlib.sha256).hexdigest()[:16]
+            for term in TERM_PATTERN.findall(text.lower())
+        ]
+
+    def _get_note_text_for_database(self, note_content):
+        if self._get_search_mode() == SEARCH_MODE_FTS_HASHED:
+            return " ".join(self._get_hashed_terms(note_content))
+        return note_content
+
+    def _get_full_text_match_expression(self, search_queries):
+        is_hashed = self._get_search_mode() == SEARCH_MODE_FTS_HASHED
+        phrases = []
+        for query in search_queries:
+            if is_hashed:
+                terms = self._get_hashed_terms(query)
+            else:
+                terms = TERM_PATTERN.findall(query.lower())
+            if len(terms) == 0:
+                return None
+            phrase = '"' + " ".join(terms) + '"'
+            # hashed terms can only match whole words; plaintext matches word prefixes
+            phrases.append(phrase if is_hashed else phrase + "*")
+        return " AND ".join(phrases)
+
+    def _save_note_text(self, note_id, note_content):
+        if not self._is_database_full_text_search_enabled():
+            return
+        try:
+            self.database_service.upsert_note_text(
+                note_id=note_id,
+                text=self._get_note_text_for_database(note_content=note_content),
+            )
+        except FullTextSearchNotAvailableException:
+            self.printer_helper.print_to_so(interface_copy.FULL_TEXT_SEARCH_NOT_AVAILABLE())
+
+    def _get_full_text_index_path(self):
+        db_dir = os.path.dirname(self._get_db_path_from_user_config())
+        index_file_name = self.sqnotes_config.get(key=self.FULL_TEXT_INDEX_FILE_NAME_KEY)
+        return os.path.join(db_dir, index_file_name)
+
+    def open_full_text_index(self):
+        self.full_text_index.open(index_path=self._get_full_text_index_path())
+
+    def _save_full_text_index(self):
+        config = {
+            "GPG_KEY_EMAIL": self.get_gpg_key_email(),
+        }
+        try:
+            self.full_text_index.save(config=config)
+        except GPGSubprocessException as e:
+            self.logger.error(e)
+            self.printer_helper.print_to_so(interface_copy.FULL_TEXT_INDEX_NOT_UPDATED())
+
+    def _update_full_text_index(self, filename, content):
+        if not self._is_full_text_index_enabled():
+            return
+        try:
+            self.open_full_text_index()
+            note_path = os.path.join(self.get_notes_dir_from_config(), filename)
+            self.full_text_index.update_note(
+                filename=filename, content=content, stamp=self._get_note_file_stamp(note_path=note_path)
+            )
+        except (GPGSubprocessException, CouldNotReadNoteException) as e:
+            self.logger.error(e)
+            self.printer_helper.print_to_so(interface_copy.FULL_TEXT_INDEX_NOT_UPDATED())
+            return
+        self._save_full_text_index()
+
     def check_gpg_key_email(self):
         self.GPG_KEY_EMAIL = self.get_gpg_key_email()
         if self.GPG_KEY_EMAIL is None:
@@ -753,7 +1504,7 @@ class SQNotes:
             exit(1)
 
     def get_gpg_key_email(self):
-        return self.user_configuration_helper.get_setting_from_user_config(key=GPG_KEY_EMAIL_KEY)
+        return self._get_user_setting(field="gpg_key_email", key=GPG_KEY_EMAIL_KEY)
 
     def set_gpg_key_email(self, new_gpg_key_email):
         self.GPG_KEY_EMAIL = new_gpg_key_email
@@ -763,7 +1514,7 @@ class SQNotes:
         print(f"GPG Key set to: {self.GPG_KEY_EMAIL}")
 
     def check_gpg_installed(self):
-        is_can_run_gpg_version = CommandValidator.verify_command(command_string=GPG)
+        is_can_run_gpg_version = CommandValidator.verify_command(command_string=GPG, probe_cache_file=self.probe_cache_file)
         message = (
             interface_copy.GPG_VERIFIED()
             if is_can_run_gpg_version
@@ -773,6 +1524,62 @@ class SQNotes:
 
     def startup(self):
         self._setup_user_configuration()
+        self._load_settings()
+        self.user_config_stamp = self._get_user_config_stamp()
+
+    def _get_user_config_stamp(self):
+        try:
+            config_stat = os.stat(self.user_configuration_helper._get_config_file())
+        except OSError:
+            return None
+        return (config_stat.st_mtime_ns, config_stat.st_size)
+
+    def reset_between_commands(self):
+        """Let a long-running process start each command from the current state.
+
+        Re-reads the user configuration if another process changed it,
+        rolls back anything a failed command left uncommitted and drops
+        the full text index and note cache client so they are reopened
+        when next used. The database connection is kept.
+        """
+        if self._get_user_config_stamp() != self.user_config_stamp:
+            self.logger.debug("user configuration changed; reloading")
+            self.startup()
+        self.database_service.rollback_transaction()
+        self.full_text_index.close()
+        self.note_cache_client = None
+
+    def _load_settings(self):
+        self.settings = UserSettings.from_user_configuration_helper(self.user_configuration_helper)
+
+    def _get_settings(self):
+        """Return the settings snapshot, or None before startup().
+
+        The snapshot is re-read only if a setting has been written since
+        it was taken, so per-note loops do not go back to configparser.
+        """
+        if self.settings is None:
+            return None
+        if self.settings.revision != self.user_configuration_helper.revision:
+            self._load_settings()
+        return self.settings
+
+    def _get_user_setting(self, field, key):
+        """Return a UserSettings field, read from the user config before startup()."""
+        settings = self._get_settings()
+        if settings is not None:
+            return getattr(settings, field)
+        return self.user_configuration_helper.get_setting_from_user_config(key=key)
+
+    def _is_user_setting_yes(self, field, key, is_global=False):
+        settings = self._get_settings()
+        if settings is not None:
+            return getattr(settings, field)
+        if is_global:
+            value = self.user_configuration_helper.get_global_from_user_config(key=key)
+        else:
+            value = self.user_configuration_helper.get_setting_from_user_config(key=key)
+        return value == YES
 
     def _setup_user_configuration(self):
         user_config_dir = self._get_user_config_dir()
@@ -785,6 +1592,7 @@ class SQNotes:
             initial_globals=init_globals,
             initial_settings=init_user_settings
         )
+        self.probe_cache_file = CommandValidator.get_probe_cache_file(cache_dir=user_config_dir)
         
     def _get_initial_globals_from_config(self):
         return self.sqnotes_config.get(key = self.INIT_GLOBALS_KEY)
@@ -841,183 +1649,10 @@ class SQNotes:
             self.user_configuration_helper.set_setting_to_user_config("text_editor", TEXT_EDITOR)
 
 
-def __get_sqnotes():
-    injector = Injector([InjectionConfigurationModule()])
-
-    sqnotes = injector.get(SQNotes)
-    return sqnotes
-
-
 def main():
-    parser = argparse.ArgumentParser(
-        description="SQNote: Secure note-taking command-line utility.",
-    )
-
-    parser.add_argument(
-        "--debug",
-        action="store_true",
-        help="Enable debugging mode with detailed log messages",
-    )
-
-    group = parser.add_mutually_exclusive_group()
-    group.add_argument(
-        "-k", "--keywords", nargs="+", help="Keywords for keyword search"
-    )
-    group.add_argument(
-        "-s", "--search", nargs="+", help="Search term for full text search."
-    )
-    group.add_argument("-n", "--new", help="Text for new note.", type=str)
-
-    subparsers = parser.add_subparsers(dest="command", help="Subcommands")
-
-    subparsers.add_parser("new", help="Add a new note.")
-    subparsers.add_parser("init", help="Initialize app.")
-
-    subparsers.add_parser(
-        "text-editors", help="Show supported text editors available on your system."
-    )
-
-    SET_NOTES_PATH_COMMAND = "set-notes-path"
-    if SET_NOTES_PATH_INTERACTIVE_FLAG:
-        subparsers.add_parser(
-            "set-notes-path", help="Set the directory path for storing your note files."
-        )
-
-    if SET_TEXT_EDITOR_INTERACTIVE_FLAG:
-        subparsers.add_parser(
-            "config-text-editor", help="Choose your text editor (interactive)."
-        )
-
-    man_command = subparsers.add_parser("man", help="Show manual.")
-    manual_subcommands = man_command.add_subparsers(
-        dest="man_subcommand", help="Manual subcommands."
-    )
-    manual_subcommands.add_parser("encryption", help="Show manual page for encryption.")
-    manual_subcommands.add_parser("main", help="Show main manual page.")
-
-    search_subparser = subparsers.add_parser(
-        "search",
-        help="Find notes by full text search. (Slow because requires full decryption.)",
-    )
-    search_subparser.add_argument("-t", "--text", nargs="+", help="Search strings.")
-
-    set_gpg_key_subparser = subparsers.add_parser(
-        "set-gpg-key", help="Set the GPG key."
-    )
-    set_gpg_key_subparser.add_argument(
-        "-i", "--id", help="GPG key email/identifier.", type=str
-    )
-
-    use_armor_subparser = subparsers.add_parser(
-        "use-ascii-armor", help="Configure use of ASCII armor for encryption"
-    )
-    group = use_armor_subparser.add_mutually_exclusive_group(required=True)
-    group.add_argument(
-        "-y", "--yes", action="store_true", help="Set to use ASCII armor for encryption"
-    )
-    group.add_argument(
-        "-n",
-        "--no",
-        action="store_true",
-        help="Set not to use ASCII armor for encryption",
-    )
-
-    keyword_search_subparser = subparsers.add_parser(
-        "keywords",
-        help="Find notes keyword. (Fast because searches plaintext database.)",
-    )
-    keyword_search_subparser.add_argument(
-        "-k", "--keywords", nargs="+", help="Keywords to search for.", required=True
-    )
-
-    subparsers.add_parser(
-        "rescan",
-        help="Rescan notes to populate database (useful for troubleshooting certain errors)",
-    )
-    subparsers.add_parser(
-        "notes-list", help="Show a list of all notes (scans notes directory)"
-    )
-    subparsers.add_parser("print-keywords", help="Print all keywords from database.")
-
-    subparsers.add_parser(
-        "verify-gpg", help="Verify that SQNotes can run GPG for encryption/decryption"
-    )
-
-    git_parser = subparsers.add_parser("git", help="Passthrough git commands.")
-    git_parser.add_argument(
-        "git_args", nargs=argparse.REMAINDER, help="Arguments for git command"
-    )
-
-    edit_parser = subparsers.add_parser("edit", help="Edit a note.")
-    edit_parser.add_argument("-n", "--note", help="Note base filename.", type=str)
-
-    args = parser.parse_args()
-
-    sqnotes = __get_sqnotes()
-    sqnotes.startup()
-
-    if args.command == "init":
-        sqnotes.initialize()
-    elif args.command == "man":
-        manual = Manual()
-        if args.man_subcommand == "encryption":
-            manual.print_encryption_page()
-        else:
-            manual.print_main_page()
-    else:
-        if not IS_INITIALIZATION_GATE_REFACTORED_INSIDE_SQNOTES:
-            is_initialized = sqnotes._get_is_initialized()
-            if not is_initialized:
-                print(interface_copy.SQNOTES_NOT_INITIALIZED_MESSAGE())
-                exit(0)
-            
-        if args.command == "new":
-            sqnotes.new_note()
-        elif args.new:
-            sqnotes.directly_insert_note(text=args.new)
-        elif args.search:
-            sqnotes.search_notes(search_queries=args.search)
-        elif args.keywords:
-            sqnotes.search_keywords(keywords=args.keywords)
-        elif args.command == "notes-list":
-            sqnotes.notes_list()
-        elif args.command == "verify-gpg":
-            sqnotes.check_gpg_installed()
-
-        elif (
-            SET_TEXT_EDITOR_INTERACTIVE_FLAG
-            and args.command == "config-text-editor"
-        ):
-            sqnotes.choose_text_editor_interactive()
-        elif (
-            SET_NOTES_PATH_INTERACTIVE_FLAG
-            and args.command == SET_NOTES_PATH_COMMAND
-        ):
-            sqnotes.set_notes_path_interactive()
-        elif args.command == "text-editors":
-            sqnotes.check_available_text_editors()
-        elif args.command == "set-gpg-key":
-            sqnotes.set_gpg_key_email(args.id)
-        elif args.command == "use-ascii-armor":
-            if args.yes:
-                sqnotes._set_use_ascii_armor(isUseArmor=True)
-            elif args.no:
-                sqnotes._set_use_ascii_armor(isUseArmor=False)
-        elif args.command == "search":
-            sqnotes.search_notes(args.text)
-        elif args.command == "keywords":
-            sqnotes.search_keywords(args.keywords)
-        elif args.command == "edit":
-            sqnotes.edit_note(args.note)
-        elif args.command == "git":
-            sqnotes.run_git_command(args.git_args)
-        elif args.command == "print-keywords":
-            sqnotes.print_all_keywords()
-        elif args.command == "rescan":
-            sqnotes.rescan_for_database()
-
-        else:
-            parser.print_help()
+    # the CLI imports this module only for subcommands that need SQNotes
+    from sqnotes.CLI_module import SQNotesCLI
+    SQNotesCLI().main()
 
 
 if __name__ == "__main__":
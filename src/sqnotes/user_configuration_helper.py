@@ -1,6 +1,8 @@
 
 import os
 import configparser
+import tempfile
+from contextlib import contextmanager
 
 CONFIG_FILENAME = "config.ini"
 
@@ -21,6 +23,9 @@ class UserConfigurationHelper:
         self.CONFIG_DIR = None
         self.is_initialized = False
         self.user_config = None
+        self.batch_depth = 0
+        self.is_save_pending = False
+        self.revision = 0
         
     def _set_config_dir(self, config_dir):
         self.CONFIG_DIR = config_dir
@@ -52,8 +57,43 @@ class UserConfigurationHelper:
             return None
         
     def _save_config(self):
-        with open(self.CONFIG_FILE, 'w') as open_file:
-            self.user_config.write(open_file)
+        # write a temp file and rename it over config.ini so that a crash
+        # mid-write never leaves a truncated config behind
+        file_descriptor, temp_config_file = tempfile.mkstemp(dir=os.path.dirname(self.CONFIG_FILE),
+                                                             prefix=CONFIG_FILENAME)
+        try:
+            with os.fdopen(file_descriptor, 'w') as open_file:
+                self.user_config.write(open_file)
+                open_file.flush()
+                os.fsync(open_file.fileno())
+            os.replace(temp_config_file, self.CONFIG_FILE)
+        except Exception:
+            if os.path.exists(temp_config_file):
+                os.remove(temp_config_file)
+            raise
+            
+    def _save_or_defer_config(self):
+        if self.batch_depth > 0:
+            self.is_save_pending = True
+        else:
+            self._save_config()
+            
+    @contextmanager
+    def batched_writes(self):
+        """Defer config.ini writes until the outermost batch exits.
+
+        Settings changed inside the batch are visible to getters straight
+        away and are written once, even if the batch exits with an
+        exception (including SystemExit).
+        """
+        self.batch_depth += 1
+        try:
+            yield self
+        finally:
+            self.batch_depth -= 1
+            if self.batch_depth == 0 and self.is_save_pending:
+                self.is_save_pending = False
+                self._save_config()
 
     def set_global_to_user_config(self, key, value):
         if not self.is_initialized:
@@ -61,7 +101,8 @@ class UserConfigurationHelper:
         if GLOBAL_KEY not in self.user_config:
             self.user_config[GLOBAL_KEY] = {}
         self.user_config[GLOBAL_KEY][key]= value
-        self._save_config()
+        self.revision += 1
+        self._save_or_defer_config()
 
     def set_setting_to_user_config(self, key, value):
         if not self.is_initialized:
@@ -69,7 +110,8 @@ class UserConfigurationHelper:
         if SETTINGS_KEY not in self.user_config:
             self.user_config[SETTINGS_KEY] = {}
         self.user_config[SETTINGS_KEY][key]= value
-        self._save_config()
+        self.revision += 1
+        self._save_or_defer_config()
     
     def _is_config_dir_exists(self):
         return os.path.exists(self._get_config_dir())
@@ -127,8 +169,9 @@ class UserConfigurationHelper:
             self._create_configuration_groups()
             self._set_all_settings(initial_settings = initial_settings)
             self._set_all_globals(initial_globals = initial_globals)
-            self._save_config()
+            self._save_or_defer_config()
         self._set_is_initialized()
+        self.revision += 1
         return self.user_config
             
             
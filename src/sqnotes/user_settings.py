@@ -0,0 +1,66 @@
+from typing import NamedTuple, Optional
+
+from sqnotes.config_keys import (
+    ASCII_ARMOR_CONFIG_KEY,
+    GPG_VERIFIED_KEY,
+    INITIALIZED,
+    DATABASE_IS_SET_UP_KEY,
+    NOTES_PATH_KEY,
+    GPG_KEY_EMAIL_KEY,
+    TEXT_EDITOR_KEY,
+    DECRYPTION_WORKERS_KEY,
+    DECRYPTION_ENGINE_KEY,
+    NOTE_CACHE_TTL_KEY,
+    FTS_HASH_KEY_KEY,
+    DB_FILE_PATH_KEY,
+    SEARCH_MODE_KEY,
+)
+
+YES = "yes"
+
+
+class UserSettings(NamedTuple):
+    """Immutable snapshot of the user config, read once per command.
+
+    `revision` is the UserConfigurationHelper revision the snapshot was
+    read at; a newer revision means a setting has been written since.
+    """
+    revision : int
+    notes_path : Optional[str]
+    db_file_path : Optional[str]
+    gpg_key_email : Optional[str]
+    text_editor : Optional[str]
+    search_mode : Optional[str]
+    fts_hash_key : Optional[str]
+    decryption_workers : Optional[str]
+    decryption_engine : Optional[str]
+    note_cache_ttl : Optional[str]
+    use_ascii_armor : bool
+    gpg_verified : bool
+    initialized : bool
+    database_is_set_up : bool
+
+    @classmethod
+    def from_user_configuration_helper(cls, user_configuration_helper):
+        def get_setting(key):
+            return user_configuration_helper.get_setting_from_user_config(key=key)
+
+        def get_global(key):
+            return user_configuration_helper.get_global_from_user_config(key=key)
+
+        return cls(
+            revision=user_configuration_helper.revision,
+            notes_path=get_setting(NOTES_PATH_KEY),
+            db_file_path=get_setting(DB_FILE_PATH_KEY),
+            gpg_key_email=get_setting(GPG_KEY_EMAIL_KEY),
+            text_editor=get_setting(TEXT_EDITOR_KEY),
+            search_mode=get_setting(SEARCH_MODE_KEY),
+            fts_hash_key=get_setting(FTS_HASH_KEY_KEY),
+            decryption_workers=get_setting(DECRYPTION_WORKERS_KEY),
+            decryption_engine=get_setting(DECRYPTION_ENGINE_KEY),
+            note_cache_ttl=get_setting(NOTE_CACHE_TTL_KEY),
+            use_ascii_armor=get_setting(ASCII_ARMOR_CONFIG_KEY) == YES,
+            gpg_verified=get_setting(GPG_VERIFIED_KEY) == YES,
+            initialized=get_global(INITIALIZED) == YES,
+            database_is_set_up=get_global(DATABASE_IS_SET_UP_KEY) == YES
+        )
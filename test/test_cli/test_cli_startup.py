@@ -0,0 +1,41 @@
+import os
+import sys
+import subprocess
+
+import sqnotes
+
+src_path = os.path.dirname(os.path.dirname(os.path.abspath(sqnotes.__file__)))
+
+def get_modules_imported_by_cli(argv):
+    script = (
+        "import sys\n"
+        f"sys.argv = {['sqnotes'] + argv!r}\n"
+        "from sqnotes.CLI_module import SQNotesCLI\n"
+        "try:\n"
+        "    SQNotesCLI().main()\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "print(' '.join(sorted(sys.modules)), file=sys.stderr)\n"
+    )
+    environment = dict(os.environ)
+    environment['PYTHONPATH'] = src_path
+    environment.pop('TESTING', None)
+    result = subprocess.run([sys.executable, '-c', script],
+                            env=environment,
+                            stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE)
+    return result.stderr.decode('utf-8').split()
+
+def describe_cli_startup():
+
+    def it_does_not_import_the_sqnotes_dependency_graph_for_help():
+        imported_modules = get_modules_imported_by_cli(['-h'])
+        assert 'sqnotes.CLI_module' in imported_modules
+        for module in ['injector', 'yaml', 'dotenv', 'sqlite3', 'pyinputplus', 'sqnotes.sqnotes_module']:
+            assert module not in imported_modules
+
+    def it_does_not_import_the_sqnotes_dependency_graph_for_manual_pages():
+        imported_modules = get_modules_imported_by_cli(['man'])
+        assert 'sqnotes.manual' in imported_modules
+        for module in ['injector', 'yaml', 'sqlite3', 'sqnotes.sqnotes_module']:
+            assert module not in imported_modules
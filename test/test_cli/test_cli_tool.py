@@ -6,7 +6,7 @@ import io
 import sqnotes.sqnotes_module as sqnotes_module
 from sqnotes.sqnotes_module import SQNotes
 from sqnotes.manual import Manual
-from test.test_helper import get_all_mocked_print_output
+from test.test_helper import get_all_mocked_print_output, just_return
 
 class TestCLI(unittest.TestCase):
     startup_patcher = None
@@ -91,7 +91,68 @@ def describe_sqnotes_cli():
         def it_maps_print_keywords_command_to_keywords_method(mock_print_all_keywords):
             run_cli(['sqnotes', 'print-keywords'])
             mock_print_all_keywords.assert_called_once()
-        
+
+        @pytest.mark.usefixtures("mock_get_is_initialized",
+                                 "mock_startup")
+        @patch.object(SQNotes, 'search_keywords')
+        def it_passes_the_limit_offset_and_names_only_to_keyword_search(mock_search_keywords):
+            run_cli(['sqnotes', 'keywords', '-k', 'apple', '--limit', '5', '--offset', '10', '--names-only'])
+            mock_search_keywords.assert_called_once_with(keywords=['apple'], limit=5, offset=10, is_names_only=True)
+
+        @pytest.mark.usefixtures("mock_get_is_initialized",
+                                 "mock_startup")
+        @patch.object(SQNotes, 'search_keywords')
+        def it_keeps_a_limit_given_before_the_subcommand(mock_search_keywords):
+            run_cli(['sqnotes', '--limit', '1', 'keywords', '-k', 'apple', '--names-only'])
+            mock_search_keywords.assert_called_once_with(keywords=['apple'], limit=1, offset=0, is_names_only=True)
+
+        @pytest.mark.usefixtures("mock_get_is_initialized",
+                                 "mock_startup")
+        @patch.object(SQNotes, 'notes_list')
+        def it_passes_the_limit_and_offset_to_notes_list(mock_notes_list):
+            run_cli(['sqnotes', 'notes-list', '--limit', '5'])
+            mock_notes_list.assert_called_once_with(limit=5, offset=0, sort=None, since=None, until=None)
+
+        @pytest.mark.usefixtures("mock_get_is_initialized",
+                                 "mock_startup")
+        @patch.object(SQNotes, 'notes_list')
+        def it_passes_the_sort_and_dates_to_notes_list(mock_notes_list):
+            run_cli(['sqnotes', 'notes-list', '--sort', 'date', '--since', '2024-05', '--until', '2024-05-17'])
+            mock_notes_list.assert_called_once_with(limit=None, offset=0, sort='date', since='202405', until='20240517')
+
+        @pytest.mark.usefixtures("mock_get_is_initialized",
+                                 "mock_startup")
+        def it_rejects_a_date_it_cannot_parse():
+            with pytest.raises(SystemExit):
+                run_cli(['sqnotes', 'notes-list', '--since', 'yesterday'])
+
+        @pytest.mark.usefixtures("mock_get_is_initialized",
+                                 "mock_startup")
+        @patch.object(SQNotes, 'watch_notes')
+        def it_maps_watch_command_to_watch_notes_method(mock_watch_notes):
+            run_cli(['sqnotes', 'watch', '--interval', '0.5'])
+            mock_watch_notes.assert_called_once_with(poll_interval=0.5)
+
+        @pytest.mark.usefixtures("mock_get_is_initialized",
+                                 "mock_startup")
+        def it_rejects_a_negative_limit():
+            with pytest.raises(SystemExit):
+                run_cli(['sqnotes', 'search', '-t', 'apple', '--limit', '-1'])
+
+        @pytest.mark.usefixtures("mock_get_is_initialized",
+                                 "mock_startup")
+        @patch.object(SQNotes, 'print_all_keywords')
+        def it_passes_counts_and_top_to_print_keywords(mock_print_all_keywords):
+            run_cli(['sqnotes', 'print-keywords', '--counts', '--top', '5'])
+            mock_print_all_keywords.assert_called_once_with(is_showing_counts=True, top=5)
+
+        @pytest.mark.usefixtures("mock_get_is_initialized",
+                                 "mock_startup")
+        @pytest.mark.parametrize("top", ['0', '-2'])
+        def it_rejects_a_top_that_is_not_positive(top):
+            with pytest.raises(SystemExit):
+                run_cli(['sqnotes', 'print-keywords', '--top', top])
+
         @pytest.mark.usefixtures("mock_get_is_initialized",
                                  "mock_startup")
         @patch.object(SQNotes, 'rescan_for_database')
@@ -121,14 +182,14 @@ def describe_sqnotes_cli():
         @patch.object(SQNotes, 'search_notes')
         def test_search_t_command_refers_to_edit_note_method(mock_search_notes):
             run_cli(['sqnotes', 'search', '-t', 'apple', 'pear'])
-            mock_search_notes.assert_called_once_with(['apple', 'pear'])
+            mock_search_notes.assert_called_once_with(['apple', 'pear'], limit=None, offset=0, is_names_only=False)
     
         @pytest.mark.usefixtures("mock_get_is_initialized",
                                  "mock_startup")
         @patch.object(SQNotes, 'search_notes')
         def test_search_text_command_refers_to_edit_note_method(mock_search_notes):
             run_cli(['sqnotes', 'search', '--text', 'apple', 'pear'])
-            mock_search_notes.assert_called_once_with(['apple', 'pear'])
+            mock_search_notes.assert_called_once_with(['apple', 'pear'], limit=None, offset=0, is_names_only=False)
             
             
         @pytest.mark.usefixtures("mock_get_is_initialized",
@@ -151,7 +212,7 @@ def describe_sqnotes_cli():
         @patch.object(SQNotes, 'search_keywords')
         def test_main_command_with_k_option_calls_keyword_search(mock_search_keywords):
             run_cli(['sqnotes', '-k', 'apple', 'pear'])
-            mock_search_keywords.assert_called_once_with(keywords=['apple', 'pear'])
+            mock_search_keywords.assert_called_once_with(keywords=['apple', 'pear'], limit=None, offset=0, is_names_only=False)
             
         @pytest.mark.usefixtures("mock_get_is_initialized",
                                  "mock_startup")
@@ -181,7 +242,7 @@ def describe_sqnotes_cli():
         def test_s_argument_refers_to_search_notes(
                                                                 mock_search_notes):
             run_cli(['sqnotes', '-s', 'apple', 'pear'])
-            mock_search_notes.assert_called_once_with(search_queries=['apple', 'pear'])
+            mock_search_notes.assert_called_once_with(search_queries=['apple', 'pear'], limit=None, offset=0, is_names_only=False)
 
 
         
@@ -194,7 +255,7 @@ def describe_sqnotes_cli():
             def it_maps_keyword_command_to_search_keywords_method(
                                                                     mock_search_keywords):
                 run_cli(['sqnotes', 'keywords', '-k', 'apple', 'pear'])
-                mock_search_keywords.assert_called_once_with(keywords=['apple', 'pear'])
+                mock_search_keywords.assert_called_once_with(keywords=['apple', 'pear'], limit=None, offset=0, is_names_only=False)
             
             @pytest.mark.usefixtures("mock_get_is_initialized",
                                  "mock_startup")
@@ -205,3 +266,50 @@ def describe_sqnotes_cli():
                     expected_error_message = 'required: -k/--keywords'
                     assert expected_error_message in output
 
+
+
+def describe_daemon():
+
+    @pytest.mark.usefixtures("mock_get_is_initialized",
+                             "mock_startup")
+    @patch('sqnotes.daemon_client.run_in_daemon', just_return(None))
+    @patch.object(SQNotes, 'print_all_keywords')
+    def it_runs_the_command_itself_when_no_daemon_is_running(mock_print_all_keywords):
+        run_cli(['sqnotes', 'print-keywords'])
+        mock_print_all_keywords.assert_called_once()
+
+    @patch('sqnotes.daemon_client.run_in_daemon', just_return(("apple\n", "", 0)))
+    @patch.object(SQNotes, 'print_all_keywords')
+    def it_prints_the_output_of_a_running_daemon(mock_print_all_keywords):
+        output = run_cli(['sqnotes', 'print-keywords'])
+        assert output == "apple\n"
+        mock_print_all_keywords.assert_not_called()
+
+    @patch('sqnotes.daemon_client.run_in_daemon', just_return(("", "", 2)))
+    def it_exits_with_the_exit_code_from_the_daemon():
+        with pytest.raises(SystemExit) as exit_info:
+            run_cli(['sqnotes', 'keywords', '-k', 'apple', '--names-only'])
+        assert exit_info.value.code == 2
+
+    @pytest.mark.usefixtures("mock_get_is_initialized",
+                             "mock_startup")
+    @pytest.mark.parametrize("argv", [['search', '-t', 'apple'], ['keywords', '-k', 'apple'], ['-k', 'apple'], ['rescan']])
+    @patch.object(SQNotes, 'search_notes')
+    @patch.object(SQNotes, 'search_keywords')
+    @patch.object(SQNotes, 'rescan_for_database')
+    def it_does_not_send_commands_that_decrypt_notes_to_the_daemon(mock_rescan_for_database,
+                                                                   mock_search_keywords,
+                                                                   mock_search_notes,
+                                                                   argv):
+        with patch('sqnotes.daemon_client.run_in_daemon') as mock_run_in_daemon:
+            run_cli(['sqnotes'] + argv)
+        mock_run_in_daemon.assert_not_called()
+
+    @pytest.mark.usefixtures("mock_get_is_initialized",
+                             "mock_startup")
+    @patch.object(SQNotes, 'new_note')
+    def it_does_not_send_interactive_commands_to_the_daemon(mock_new_note):
+        with patch('sqnotes.daemon_client.run_in_daemon') as mock_run_in_daemon:
+            run_cli(['sqnotes', 'new'])
+        mock_run_in_daemon.assert_not_called()
+        mock_new_note.assert_called_once()
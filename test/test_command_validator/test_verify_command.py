@@ -0,0 +1,83 @@
+import os
+import pytest
+from unittest.mock import patch
+
+from sqnotes.command_validator import CommandValidator, PROBE_CACHE_FILENAME
+
+
+@pytest.fixture
+def probe_cache_file(tmp_path):
+    yield CommandValidator.get_probe_cache_file(cache_dir=str(tmp_path))
+
+
+@pytest.fixture
+def fake_binary(tmp_path):
+    binary_dir = tmp_path / 'bin'
+    binary_dir.mkdir()
+    binary_path = binary_dir / 'fake-editor'
+    binary_path.write_text('#!/bin/sh\nexit 0\n')
+    os.chmod(binary_path, 0o755)
+    with patch.dict(os.environ, {'PATH' : str(binary_dir)}):
+        yield binary_path
+
+
+def describe_verify_command():
+
+    @patch('subprocess.call')
+    def it_returns_false_without_a_subprocess_if_the_command_is_not_on_the_path(
+                                                    mock_subprocess_call,
+                                                    probe_cache_file
+                                                    ):
+        assert not CommandValidator.verify_command(command_string='sqnotes-no-such-command', probe_cache_file=probe_cache_file)
+        mock_subprocess_call.assert_not_called()
+
+    @patch('subprocess.call')
+    def it_probes_the_command_once_while_the_binary_is_unchanged(
+                                                    mock_subprocess_call,
+                                                    probe_cache_file,
+                                                    fake_binary
+                                                    ):
+        assert CommandValidator.verify_command(command_string='fake-editor', probe_cache_file=probe_cache_file)
+        assert CommandValidator.verify_command(command_string='fake-editor', probe_cache_file=probe_cache_file)
+        mock_subprocess_call.assert_called_once()
+
+    @patch('subprocess.call')
+    def it_probes_again_if_the_binary_changes(
+                                                    mock_subprocess_call,
+                                                    probe_cache_file,
+                                                    fake_binary
+                                                    ):
+        CommandValidator.verify_command(command_string='fake-editor', probe_cache_file=probe_cache_file)
+        fake_binary.write_text('#!/bin/sh\necho changed\nexit 0\n')
+        CommandValidator.verify_command(command_string='fake-editor', probe_cache_file=probe_cache_file)
+        assert mock_subprocess_call.call_count == 2
+
+    @patch('subprocess.call')
+    def it_stores_the_cache_in_the_configured_directory(
+                                                    mock_subprocess_call,
+                                                    tmp_path,
+                                                    fake_binary
+                                                    ):
+        probe_cache_file = CommandValidator.get_probe_cache_file(cache_dir=str(tmp_path))
+        CommandValidator.verify_command(command_string='fake-editor', probe_cache_file=probe_cache_file)
+        assert os.path.exists(os.path.join(tmp_path, PROBE_CACHE_FILENAME))
+
+    @patch('subprocess.call')
+    def it_does_not_cache_a_failed_probe(
+                                                    mock_subprocess_call,
+                                                    probe_cache_file,
+                                                    fake_binary
+                                                    ):
+        mock_subprocess_call.side_effect = PermissionError()
+        assert not CommandValidator.verify_command(command_string='fake-editor', probe_cache_file=probe_cache_file)
+        assert not CommandValidator.verify_command(command_string='fake-editor', probe_cache_file=probe_cache_file)
+        assert mock_subprocess_call.call_count == 2
+
+    @patch('subprocess.call')
+    def it_probes_every_time_without_a_cache_file(
+                                                    mock_subprocess_call,
+                                                    fake_binary
+                                                    ):
+        assert CommandValidator.verify_command(command_string='fake-editor')
+        assert CommandValidator.verify_command(command_string='fake-editor')
+        assert mock_subprocess_call.call_count == 2
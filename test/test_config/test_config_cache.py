@@ -0,0 +1,49 @@
+import os
+import pytest
+from unittest.mock import Mock
+
+from sqnotes.config_cache import load_cached, get_cache_path
+
+
+@pytest.fixture
+def source_file(tmp_path):
+    source_path = os.path.join(tmp_path, 'config.yaml')
+    with open(source_path, 'w') as file:
+        file.write('VERSION: 1')
+    yield source_path
+
+
+def describe_load_cached():
+
+    def it_parses_the_source_on_first_load(source_file):
+        parse = Mock(return_value={'VERSION' : 1})
+        assert load_cached(source_path=source_file, parse=parse) == {'VERSION' : 1}
+        parse.assert_called_once_with(source_file)
+        assert os.path.exists(get_cache_path(source_file))
+
+    def it_reuses_the_snapshot_while_the_source_is_unchanged(source_file):
+        load_cached(source_path=source_file, parse=Mock(return_value={'VERSION' : 1}))
+        parse = Mock(return_value={'VERSION' : 2})
+        assert load_cached(source_path=source_file, parse=parse) == {'VERSION' : 1}
+        parse.assert_not_called()
+
+    def it_reparses_when_the_source_changes(source_file):
+        load_cached(source_path=source_file, parse=Mock(return_value={'VERSION' : 1}))
+        with open(source_file, 'w') as file:
+            file.write('VERSION: 22')
+        parse = Mock(return_value={'VERSION' : 22})
+        assert load_cached(source_path=source_file, parse=parse) == {'VERSION' : 22}
+        parse.assert_called_once()
+
+    def it_reparses_when_the_snapshot_is_corrupt(source_file):
+        load_cached(source_path=source_file, parse=Mock(return_value={'VERSION' : 1}))
+        with open(get_cache_path(source_file), 'wb') as file:
+            file.write(b'not a snapshot')
+        parse = Mock(return_value={'VERSION' : 1})
+        assert load_cached(source_path=source_file, parse=parse) == {'VERSION' : 1}
+        parse.assert_called_once()
+
+    def it_parses_without_caching_if_the_source_cannot_be_read():
+        parse = Mock(return_value={})
+        assert load_cached(source_path='', parse=parse) == {}
+        parse.assert_called_once()
@@ -0,0 +1,76 @@
+from unittest.mock import patch
+import os
+import configparser
+import pytest
+from sqnotes.user_configuration_helper import UserConfigurationHelper, CONFIG_FILENAME
+
+
+def read_config_file(config_dir):
+    user_config = configparser.ConfigParser()
+    user_config.read(os.path.join(config_dir, CONFIG_FILENAME))
+    return user_config
+
+
+def describe_batched_writes():
+
+    def it_writes_the_config_once_when_the_batch_exits(
+                                    user_configuration_helper : UserConfigurationHelper
+                                    ):
+        user_configuration_helper.open_or_create_and_open_user_config_file()
+        with patch.object(UserConfigurationHelper, '_save_config') as mock_save_config:
+            with user_configuration_helper.batched_writes():
+                user_configuration_helper.set_setting_to_user_config(key='a', value='1')
+                user_configuration_helper.set_global_to_user_config(key='b', value='2')
+                mock_save_config.assert_not_called()
+            mock_save_config.assert_called_once()
+
+    def it_makes_settings_visible_before_the_batch_exits(
+                                    user_configuration_helper : UserConfigurationHelper
+                                    ):
+        user_configuration_helper.open_or_create_and_open_user_config_file()
+        with user_configuration_helper.batched_writes():
+            user_configuration_helper.set_setting_to_user_config(key='a', value='1')
+            assert user_configuration_helper.get_setting_from_user_config(key='a') == '1'
+
+    def it_writes_once_for_nested_batches(
+                                    user_configuration_helper : UserConfigurationHelper
+                                    ):
+        user_configuration_helper.open_or_create_and_open_user_config_file()
+        with patch.object(UserConfigurationHelper, '_save_config') as mock_save_config:
+            with user_configuration_helper.batched_writes():
+                with user_configuration_helper.batched_writes():
+                    user_configuration_helper.set_setting_to_user_config(key='a', value='1')
+                mock_save_config.assert_not_called()
+            mock_save_config.assert_called_once()
+
+    def it_does_not_write_if_nothing_changed(
+                                    user_configuration_helper : UserConfigurationHelper
+                                    ):
+        user_configuration_helper.open_or_create_and_open_user_config_file()
+        with patch.object(UserConfigurationHelper, '_save_config') as mock_save_config:
+            with user_configuration_helper.batched_writes():
+                pass
+            mock_save_config.assert_not_called()
+
+    def it_saves_pending_settings_if_the_batch_exits_early(
+                                    user_configuration_helper : UserConfigurationHelper,
+                                    test_temp_config_dir
+                                    ):
+        user_configuration_helper.open_or_create_and_open_user_config_file()
+        with pytest.raises(SystemExit):
+            with user_configuration_helper.batched_writes():
+                user_configuration_helper.set_setting_to_user_config(key='a', value='1')
+                exit(1)
+        assert read_config_file(test_temp_config_dir)['settings']['a'] == '1'
+
+
+def describe_save_config():
+
+    def it_replaces_the_config_file_without_leaving_temp_files(
+                                    user_configuration_helper : UserConfigurationHelper,
+                                    test_temp_config_dir
+                                    ):
+        user_configuration_helper.open_or_create_and_open_user_config_file()
+        user_configuration_helper.set_setting_to_user_config(key='a', value='1')
+        assert os.listdir(test_temp_config_dir) == [CONFIG_FILENAME]
+        assert read_config_file(test_temp_config_dir)['settings']['a'] == '1'
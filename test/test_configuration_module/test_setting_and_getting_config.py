@@ -36,6 +36,15 @@ def describe_the_user_configuration_helper():
         user_configuration_helper.set_global_to_user_config(key=key, value=value)
         assert user_configuration_helper.get_global_from_user_config(key = key) == value
         
+    def it_increments_the_revision_on_each_write(
+                                    user_configuration_helper : UserConfigurationHelper
+                                    ):
+        user_configuration_helper.open_or_create_and_open_user_config_file()
+        revision = user_configuration_helper.revision
+        user_configuration_helper.set_setting_to_user_config(key='my_key', value='apple')
+        user_configuration_helper.set_global_to_user_config(key='my_key', value='pear')
+        assert user_configuration_helper.revision == revision + 2
+        
     def it_returns_null_on_get_unknown_setting_key(
                                             user_configuration_helper : UserConfigurationHelper
                                                 ):
@@ -0,0 +1,131 @@
+import os
+import sys
+import stat
+import threading
+import pytest
+from unittest.mock import MagicMock, patch
+from sqnotes.daemon import SQNotesDaemonServer
+from sqnotes.daemon_client import run_in_daemon, DAEMON_PROTOCOL_VERSION
+from sqnotes.local_socket import PrivateUnixServer, send_request
+
+
+def run_in_daemon_at(socket_path, argv):
+    with patch('sqnotes.daemon_client.get_daemon_socket_path', lambda: socket_path):
+        return run_in_daemon(argv=argv)
+
+
+def print_argv(sqnotes, argv):
+    print(" ".join(argv))
+
+
+def print_cwd(sqnotes, argv):
+    print(os.getcwd())
+
+
+def exit_with_message(sqnotes, argv):
+    print("partial output")
+    exit("could not open database")
+
+
+def exit_with_code(sqnotes, argv):
+    print("warning", file=sys.stderr)
+    exit(3)
+
+
+def raise_error(sqnotes, argv):
+    raise RuntimeError("unexpected")
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    yield str(tmp_path / "daemon.sock")
+
+
+@pytest.fixture
+def start_server(socket_path):
+    servers = []
+
+    def start(run_command):
+        server = SQNotesDaemonServer(socket_path=socket_path,
+                                     sqnotes=MagicMock(),
+                                     run_command=run_command)
+        thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval' : 0.05})
+        thread.start()
+        servers.append((server, thread))
+        return server
+
+    yield start
+    for server, thread in servers:
+        server.shutdown()
+        thread.join(timeout=5)
+        server.remove_socket()
+
+
+def describe_sqnotes_daemon_server():
+
+    def it_returns_the_output_of_the_command(start_server, socket_path):
+        start_server(print_argv)
+        assert run_in_daemon_at(socket_path, ['keywords', '-k', 'apple']) == ("keywords -k apple\n", "", 0)
+
+    def it_runs_the_command_in_the_client_working_directory(start_server, socket_path, tmp_path):
+        start_server(print_cwd)
+        client_dir = tmp_path / "client"
+        client_dir.mkdir()
+        previous_cwd = os.getcwd()
+        os.chdir(client_dir)
+        try:
+            stdout, _, _ = run_in_daemon_at(socket_path, ['notes-list'])
+        finally:
+            os.chdir(previous_cwd)
+        assert stdout == f"{client_dir}\n"
+        assert os.getcwd() == previous_cwd
+
+    def it_returns_the_exit_code_and_stderr(start_server, socket_path):
+        start_server(exit_with_code)
+        assert run_in_daemon_at(socket_path, ['rescan']) == ("", "warning\n", 3)
+
+    def it_writes_an_exit_message_to_stderr(start_server, socket_path):
+        start_server(exit_with_message)
+        assert run_in_daemon_at(socket_path, ['search']) == ("partial output\n", "could not open database\n", 1)
+
+    def it_reports_an_unexpected_error_and_keeps_serving(start_server, socket_path):
+        server = start_server(raise_error)
+        assert run_in_daemon_at(socket_path, ['search']) == ("", "unexpected\n", 1)
+        server.run_command = print_argv
+        assert run_in_daemon_at(socket_path, ['search']) == ("search\n", "", 0)
+
+    def it_resets_sqnotes_before_each_command(start_server, socket_path):
+        server = start_server(print_argv)
+        run_in_daemon_at(socket_path, ['keywords'])
+        run_in_daemon_at(socket_path, ['keywords'])
+        assert server.sqnotes.reset_between_commands.call_count == 2
+
+    def it_does_not_run_requests_from_another_protocol_version(start_server, socket_path):
+        server = start_server(print_argv)
+        response = send_request(socket_path=socket_path,
+                                request={'version' : DAEMON_PROTOCOL_VERSION + 1, 'argv' : [], 'cwd' : '/'},
+                                timeout=5)
+        assert response == {'version' : DAEMON_PROTOCOL_VERSION}
+        server.sqnotes.reset_between_commands.assert_not_called()
+
+    def it_creates_a_socket_only_its_owner_can_use(start_server, socket_path):
+        start_server(print_argv)
+        assert stat.S_IMODE(os.stat(socket_path).st_mode) == 0o600
+
+
+def describe_private_unix_server():
+
+    def it_needs_a_subclass_that_handles_requests(socket_path):
+        with pytest.raises(TypeError):
+            PrivateUnixServer(socket_path)
+        assert not os.path.exists(socket_path)
+
+
+def describe_run_in_daemon():
+
+    def it_returns_none_when_no_daemon_is_running(socket_path):
+        assert run_in_daemon_at(socket_path, ['keywords']) is None
+
+    def it_returns_none_for_a_stale_socket_file(socket_path):
+        open(socket_path, 'w').close()
+        assert run_in_daemon_at(socket_path, ['keywords']) is None
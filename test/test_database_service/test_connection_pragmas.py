@@ -0,0 +1,38 @@
+import os
+import pytest
+
+from sqnotes.database_service import DatabaseService, DEFAULT_CONNECTION_PRAGMAS
+
+
+@pytest.fixture
+def database_file_path(tmp_path):
+    yield os.path.join(tmp_path, 'test_index.db')
+
+
+def describe_connection_pragmas():
+
+    def it_enables_wal_and_tuned_defaults(database_service : DatabaseService, database_file_path):
+        database_service.connect(db_file_path=database_file_path)
+        pragmas = database_service.get_connection_pragmas()
+        database_service._get_connection().close()
+        assert pragmas['journal_mode'] == 'wal'
+        assert pragmas['synchronous'] == 'NORMAL'
+        assert pragmas['temp_store'] == 'MEMORY'
+        assert pragmas['cache_size'] == DEFAULT_CONNECTION_PRAGMAS['cache_size']
+
+    def it_applies_configured_pragmas(database_service : DatabaseService, database_file_path):
+        database_service.connect(db_file_path=database_file_path,
+                                 pragmas={'journal_mode' : 'DELETE', 'synchronous' : 'FULL', 'cache_size' : -1000})
+        pragmas = database_service.get_connection_pragmas()
+        database_service._get_connection().close()
+        assert pragmas['journal_mode'] == 'delete'
+        assert pragmas['synchronous'] == 'FULL'
+        assert pragmas['cache_size'] == -1000
+
+    def it_ignores_unsupported_pragmas(database_service : DatabaseService, database_file_path):
+        database_service.connect(db_file_path=database_file_path,
+                                 pragmas={'foreign_keys' : 'ON', 'synchronous' : 'OFF; DROP TABLE notes'})
+        pragmas = database_service.get_connection_pragmas()
+        database_service._get_connection().close()
+        assert 'foreign_keys' not in pragmas
+        assert pragmas['synchronous'] == 'FULL'
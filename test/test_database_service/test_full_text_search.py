@@ -0,0 +1,58 @@
+import pytest
+from unittest.mock import patch
+
+from sqnotes.database_service import DatabaseService, FullTextSearchNotAvailableException
+
+
+def describe_full_text_search():
+
+    def it_finds_notes_matching_the_expression(
+                            database_service_open_in_memory : DatabaseService
+                            ):
+        apple_note_id = database_service_open_in_memory.insert_new_note_into_database(note_filename_base="apple.txt")
+        pear_note_id = database_service_open_in_memory.insert_new_note_into_database(note_filename_base="pear.txt")
+        database_service_open_in_memory.upsert_note_text(note_id=apple_note_id, text="an apple a day")
+        database_service_open_in_memory.upsert_note_text(note_id=pear_note_id, text="a pear")
+        results = database_service_open_in_memory.query_notes_by_text(match_expression='"appl"*')
+        assert results == [("apple.txt",)]
+
+    def it_ranks_better_matches_first(
+                            database_service_open_in_memory : DatabaseService
+                            ):
+        once_note_id = database_service_open_in_memory.insert_new_note_into_database(note_filename_base="once.txt")
+        often_note_id = database_service_open_in_memory.insert_new_note_into_database(note_filename_base="often.txt")
+        database_service_open_in_memory.upsert_note_text(note_id=once_note_id, text="apple " + "filler " * 50)
+        database_service_open_in_memory.upsert_note_text(note_id=often_note_id, text="apple apple apple")
+        results = database_service_open_in_memory.query_notes_by_text(match_expression='"apple"')
+        assert results == [("often.txt",), ("once.txt",)]
+
+    def it_replaces_text_on_upsert(
+                            database_service_open_in_memory : DatabaseService
+                            ):
+        note_id = database_service_open_in_memory.insert_new_note_into_database(note_filename_base="note.txt")
+        database_service_open_in_memory.upsert_note_text(note_id=note_id, text="apple")
+        database_service_open_in_memory.upsert_note_text(note_id=note_id, text="pear")
+        assert database_service_open_in_memory.query_notes_by_text(match_expression='"apple"') == []
+
+    def it_removes_all_text_on_clear(
+                            database_service_open_in_memory : DatabaseService
+                            ):
+        note_id = database_service_open_in_memory.insert_new_note_into_database(note_filename_base="note.txt")
+        database_service_open_in_memory.upsert_note_text(note_id=note_id, text="apple")
+        database_service_open_in_memory.clear_note_text()
+        assert database_service_open_in_memory.query_notes_by_text(match_expression='"apple"') == []
+
+    def it_lists_the_notes_that_have_text(
+                            database_service_open_in_memory : DatabaseService
+                            ):
+        note_id = database_service_open_in_memory.insert_new_note_into_database(note_filename_base="apple.txt")
+        database_service_open_in_memory.insert_new_note_into_database(note_filename_base="pear.txt")
+        database_service_open_in_memory.upsert_note_text(note_id=note_id, text="apple")
+        assert database_service_open_in_memory.get_filenames_with_note_text() == {"apple.txt"}
+
+    def it_raises_if_fts5_is_not_available(
+                            database_service_connected_in_memory : DatabaseService
+                            ):
+        database_service_connected_in_memory.is_full_text_search_available = False
+        with pytest.raises(FullTextSearchNotAvailableException):
+            database_service_connected_in_memory.upsert_note_text(note_id=1, text="apple")
@@ -0,0 +1,67 @@
+import pytest
+
+from sqnotes.database_service import DatabaseService
+from sqnotes.keyword_query import KeywordQueryException
+
+
+NOTE_KEYWORDS = {
+    "note1.txt" : ["project", "draft"],
+    "note2.txt" : ["project", "travel"],
+    "note3.txt" : ["projection", "travel"],
+    "note4.txt" : ["travel"],
+    "note5.txt" : [],
+}
+
+
+@pytest.fixture
+def database_service_with_keywords(database_service_open_in_memory : DatabaseService):
+    for filename, keywords in NOTE_KEYWORDS.items():
+        note_id = database_service_open_in_memory.insert_new_note_into_database(note_filename_base=filename)
+        keyword_ids = [database_service_open_in_memory.insert_keyword_into_database(keyword=keyword)
+                       for keyword in keywords]
+        database_service_open_in_memory.insert_note_keywords_into_database(note_id=note_id, keyword_ids=keyword_ids)
+    yield database_service_open_in_memory
+
+
+def get_filenames(database_service, keywords, **kwargs):
+    return [row[0] for row in database_service.query_notes_by_keywords(keywords=keywords, **kwargs)]
+
+
+def describe_query_notes_by_keywords():
+
+    def it_returns_notes_having_every_keyword(database_service_with_keywords : DatabaseService):
+        assert get_filenames(database_service_with_keywords, ["project", "travel"]) == ["note2.txt"]
+
+    def it_returns_notes_having_any_keyword_with_or(database_service_with_keywords : DatabaseService):
+        assert get_filenames(database_service_with_keywords, ["draft OR projection"]) == ["note1.txt", "note3.txt"]
+
+    def it_excludes_notes_with_not(database_service_with_keywords : DatabaseService):
+        assert get_filenames(database_service_with_keywords, ["travel NOT project"]) == ["note3.txt", "note4.txt"]
+
+    def it_returns_notes_without_a_keyword_for_a_lone_not(database_service_with_keywords : DatabaseService):
+        assert get_filenames(database_service_with_keywords, ["NOT", "travel"]) == ["note1.txt", "note5.txt"]
+
+    def it_matches_keyword_prefixes(database_service_with_keywords : DatabaseService):
+        assert get_filenames(database_service_with_keywords, ["#proj*"]) == ["note1.txt", "note2.txt", "note3.txt"]
+
+    def it_combines_nested_groups(database_service_with_keywords : DatabaseService):
+        keywords = ["proj* NOT (draft OR projection)"]
+        assert get_filenames(database_service_with_keywords, keywords) == ["note2.txt"]
+
+    def it_returns_nothing_for_an_unknown_keyword(database_service_with_keywords : DatabaseService):
+        assert get_filenames(database_service_with_keywords, ["travel", "unknown"]) == []
+
+    def it_raises_for_a_malformed_query(database_service_with_keywords : DatabaseService):
+        with pytest.raises(KeywordQueryException):
+            database_service_with_keywords.query_notes_by_keywords(keywords=["travel OR"])
+
+    def it_returns_one_page_of_notes(database_service_with_keywords : DatabaseService):
+        assert get_filenames(database_service_with_keywords, ["travel"], limit=2, offset=1) == ["note3.txt", "note4.txt"]
+
+    def it_reads_rows_while_other_queries_run(database_service_with_keywords : DatabaseService):
+        rows = database_service_with_keywords.query_notes_by_keywords(keywords=["travel"])
+        filenames = []
+        for row in rows:
+            filenames.append(row[0])
+            database_service_with_keywords.get_note_id_from_database_or_none(filename=row[0])
+        assert filenames == ["note2.txt", "note3.txt", "note4.txt"]
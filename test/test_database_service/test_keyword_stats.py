@@ -0,0 +1,65 @@
+import pytest
+from unittest.mock import patch
+
+from sqnotes.database_service import DatabaseService
+
+
+def link_keywords(database_service, filename, keywords):
+    note_id = database_service.get_note_id_from_database_or_none(filename=filename)
+    if note_id is None:
+        note_id = database_service.insert_new_note_into_database(note_filename_base=filename)
+    keyword_ids = [database_service.insert_keyword_into_database(keyword=keyword) for keyword in keywords]
+    database_service.insert_note_keywords_into_database(note_id=note_id, keyword_ids=keyword_ids)
+    return note_id
+
+
+def describe_keyword_stats():
+
+    def it_counts_the_notes_using_each_keyword(database_service_open_in_memory : DatabaseService):
+        link_keywords(database_service_open_in_memory, "note1.txt", ["apple", "pear"])
+        link_keywords(database_service_open_in_memory, "note2.txt", ["apple"])
+        assert database_service_open_in_memory.get_keyword_counts() == [("apple", 2), ("pear", 1)]
+
+    def it_does_not_count_a_keyword_linked_to_a_note_twice(database_service_open_in_memory : DatabaseService):
+        link_keywords(database_service_open_in_memory, "note1.txt", ["apple", "apple"])
+        link_keywords(database_service_open_in_memory, "note1.txt", ["apple"])
+        assert database_service_open_in_memory.get_keyword_counts() == [("apple", 1)]
+
+    def it_decrements_counts_when_the_keywords_of_a_note_are_deleted(database_service_open_in_memory : DatabaseService):
+        note_id = link_keywords(database_service_open_in_memory, "note1.txt", ["apple", "pear"])
+        link_keywords(database_service_open_in_memory, "note2.txt", ["apple"])
+        database_service_open_in_memory.delete_keywords_from_database_for_note(note_id=note_id)
+        assert database_service_open_in_memory.get_keyword_counts() == [("apple", 1)]
+
+    def it_decrements_counts_when_a_note_is_deleted(database_service_open_in_memory : DatabaseService):
+        note_id = link_keywords(database_service_open_in_memory, "note1.txt", ["apple"])
+        database_service_open_in_memory.delete_note_from_database(note_id=note_id, filename="note1.txt")
+        assert database_service_open_in_memory.get_keyword_counts() == []
+
+    def it_returns_only_the_top_keywords(database_service_open_in_memory : DatabaseService):
+        link_keywords(database_service_open_in_memory, "note1.txt", ["apple", "pear", "kiwi"])
+        link_keywords(database_service_open_in_memory, "note2.txt", ["apple", "kiwi"])
+        link_keywords(database_service_open_in_memory, "note3.txt", ["apple"])
+        assert database_service_open_in_memory.get_keyword_counts(limit=2) == [("apple", 3), ("kiwi", 2)]
+
+    @patch('time.time', lambda: 1700000000.5)
+    def it_records_when_a_keyword_was_last_used(database_service_open_in_memory : DatabaseService):
+        link_keywords(database_service_open_in_memory, "note1.txt", ["apple"])
+        cursor = database_service_open_in_memory._get_cursor()
+        cursor.execute("SELECT last_used FROM keyword_stats")
+        assert cursor.fetchone()[0] == 1700000000
+
+    def it_is_filled_from_existing_links_by_its_migration(database_service_connected_in_memory : DatabaseService):
+        database_service = database_service_connected_in_memory
+        migrations = database_service._get_migrations()
+        with patch.object(DatabaseService, '_get_migrations', return_value=migrations[:3]):
+            database_service.setup_database()
+            database_service.migrate_schema()
+        cursor = database_service._get_cursor()
+        for note_id, filename in [(1, "note1.txt"), (2, "note2.txt")]:
+            cursor.execute("INSERT INTO notes (id, filename) VALUES (?, ?)", (note_id, filename))
+        cursor.execute("INSERT INTO keywords (id, keyword) VALUES (1, 'apple'), (2, 'pear')")
+        cursor.execute("INSERT INTO note_keywords (note_id, keyword_id) VALUES (1, 1), (2, 1), (2, 2)")
+        database_service.commit_transaction()
+        database_service.migrate_schema()
+        assert database_service.get_keyword_counts() == [("apple", 2), ("pear", 1)]
@@ -0,0 +1,79 @@
+import pytest
+import sqlite3
+from unittest.mock import patch
+
+from sqnotes.database_service import DatabaseService, SchemaMigrationException
+
+
+@pytest.fixture
+def database_service_not_migrated(database_service_connected_in_memory : DatabaseService):
+    database_service_connected_in_memory.setup_database()
+    yield database_service_connected_in_memory
+
+
+def get_index_names(database_service):
+    cursor = database_service._get_cursor()
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def describe_migrate_schema():
+
+    def it_sets_the_schema_version(database_service_not_migrated : DatabaseService):
+        database_service_not_migrated.migrate_schema()
+        latest_version = database_service_not_migrated.get_latest_schema_version()
+        assert database_service_not_migrated.get_schema_version() == latest_version
+
+    def it_records_each_applied_migration_with_its_duration(database_service_not_migrated : DatabaseService):
+        applied_migrations = database_service_not_migrated.migrate_schema()
+        recorded_migrations = database_service_not_migrated.get_applied_migrations()
+        assert [m[0] for m in applied_migrations] == [m[0] for m in recorded_migrations]
+        assert [m[0] for m in recorded_migrations] == list(range(1, len(recorded_migrations) + 1))
+        assert all(m[3] >= 0 for m in recorded_migrations)
+
+    def it_only_applies_pending_migrations(database_service_open_in_memory : DatabaseService):
+        assert database_service_open_in_memory.migrate_schema() == []
+
+    def it_creates_missing_base_tables(database_service_connected_in_memory : DatabaseService):
+        database_service_connected_in_memory.migrate_schema()
+        note_id = database_service_connected_in_memory.insert_new_note_into_database(note_filename_base='a.txt')
+        assert note_id is not None
+
+    def it_rolls_back_a_failed_migration(database_service_not_migrated : DatabaseService):
+        migrations = database_service_not_migrated._get_migrations()
+
+        def failing_step():
+            database_service_not_migrated._get_cursor().execute("CREATE TABLE half_done (id INTEGER)")
+            raise sqlite3.OperationalError("failed")
+
+        with patch.object(DatabaseService, '_get_migrations', return_value=migrations[:1] + [(2, 'failing', failing_step)]):
+            with pytest.raises(SchemaMigrationException):
+                database_service_not_migrated.migrate_schema()
+        assert database_service_not_migrated.get_schema_version() == 1
+        assert not database_service_not_migrated._is_table_exists('half_done')
+
+    def describe_migration_1():
+
+        def it_adds_lookup_indexes(database_service_open_in_memory : DatabaseService):
+            index_names = get_index_names(database_service_open_in_memory)
+            assert {'idx_notes_filename',
+                    'idx_keywords_keyword',
+                    'idx_note_keywords_keyword_id_note_id'} <= index_names
+
+        def it_merges_duplicate_keywords_and_notes(database_service_not_migrated : DatabaseService):
+            cursor = database_service_not_migrated._get_cursor()
+            cursor.execute("INSERT INTO notes (id, filename) VALUES (1, 'a.txt'), (2, 'a.txt')")
+            cursor.execute("INSERT INTO keywords (id, keyword) VALUES (1, 'apple'), (2, 'apple')")
+            cursor.execute("INSERT INTO note_keywords (note_id, keyword_id) VALUES (1, 1), (2, 2)")
+            database_service_not_migrated.migrate_schema()
+            cursor.execute("SELECT id, filename FROM notes")
+            assert cursor.fetchall() == [(1, 'a.txt')]
+            cursor.execute("SELECT id, keyword FROM keywords")
+            assert cursor.fetchall() == [(1, 'apple')]
+            cursor.execute("SELECT note_id, keyword_id FROM note_keywords")
+            assert cursor.fetchall() == [(1, 1)]
+
+        def it_rejects_duplicate_keywords_after_migration(database_service_open_in_memory : DatabaseService):
+            database_service_open_in_memory.insert_new_keyword_into_database(keyword='apple')
+            with pytest.raises(sqlite3.IntegrityError):
+                database_service_open_in_memory.insert_new_keyword_into_database(keyword='apple')
@@ -0,0 +1,109 @@
+import os
+import sys
+import pytest
+import logging
+from unittest.mock import patch
+from injector import Injector
+from sqnotes.async_encrypted_note_helper import AsyncEncryptedNoteHelper
+from sqnotes.encrypted_note_helper import GPGSubprocessException, CouldNotReadNoteException
+from sqnotes.gpg_session import GPGSession
+
+# stands in for `gpg --decrypt`: copies stdin to stdout, fails on notes containing "bad"
+# and writes more than a pipe buffer of warnings for notes containing "noisy"
+FAKE_GPG_DECRYPT_COMMAND = [sys.executable, '-c', '''import sys
+data = sys.stdin.buffer.read()
+if b"noisy" in data:
+    sys.stderr.write("gpg: warning\\n" * 100000)
+if b"bad" in data:
+    sys.stderr.write("gpg: decryption failed")
+    sys.exit(2)
+sys.stdout.buffer.write(data)
+''']
+
+
+@pytest.fixture(scope='session', autouse=True)
+def set_test_environment():
+    os.environ['TESTING'] = 'true'
+
+
+@pytest.fixture
+def async_encrypted_note_helper():
+    injector = Injector()
+    helper = injector.get(AsyncEncryptedNoteHelper)
+    with patch('sqnotes.async_encrypted_note_helper.GPG_DECRYPT_COMMAND', FAKE_GPG_DECRYPT_COMMAND):
+        yield helper
+
+
+def write_notes(notes_dir, contents):
+    note_paths = []
+    for number, content in enumerate(contents):
+        note_path = notes_dir / f"note{number}.txt.gpg"
+        note_path.write_text(content)
+        note_paths.append(str(note_path))
+    return note_paths
+
+
+def describe_get_decrypted_contents():
+
+    def it_yields_results_in_input_order(async_encrypted_note_helper, tmp_path):
+        contents = [f"content of note {x}" for x in range(6)]
+        note_paths = write_notes(tmp_path, contents)
+        results = list(async_encrypted_note_helper.get_decrypted_contents(note_paths=note_paths,
+                                                                          max_concurrency=3))
+        assert results == list(zip(note_paths, contents))
+
+    def it_raises_gpg_exception_when_gpg_fails(async_encrypted_note_helper, tmp_path):
+        note_paths = write_notes(tmp_path, ["good note", "bad note", "good note"])
+        results = async_encrypted_note_helper.get_decrypted_contents(note_paths=note_paths,
+                                                                     max_concurrency=1)
+        assert next(results) == (note_paths[0], "good note")
+        with pytest.raises(GPGSubprocessException):
+            next(results)
+
+    def it_decrypts_notes_when_gpg_writes_a_lot_to_stderr(async_encrypted_note_helper, tmp_path):
+        note_paths = write_notes(tmp_path, ["noisy note"])
+        results = list(async_encrypted_note_helper.get_decrypted_contents(note_paths=note_paths,
+                                                                          max_concurrency=1))
+        assert results == [(note_paths[0], "noisy note")]
+
+    def it_raises_read_error_for_missing_note(async_encrypted_note_helper, tmp_path):
+        with pytest.raises(CouldNotReadNoteException):
+            list(async_encrypted_note_helper.get_decrypted_contents(note_paths=[str(tmp_path / "missing.txt.gpg")],
+                                                                    max_concurrency=1))
+
+
+def describe_match_notes():
+
+    def it_reports_which_notes_match(async_encrypted_note_helper, tmp_path):
+        note_paths = write_notes(tmp_path, ["an apple and a pear", "only an apple"])
+        results = list(async_encrypted_note_helper.match_notes(note_paths=note_paths,
+                                                               search_queries=["pear", "apple"],
+                                                               max_concurrency=2))
+        assert results == [(note_paths[0], (True, "an apple and a pear")),
+                           (note_paths[1], (False, None))]
+
+
+def describe_given_a_decryption_session():
+
+    @patch('sqnotes.gpg_session.gpgme', None)
+    def it_records_the_latency_of_each_note(async_encrypted_note_helper, tmp_path):
+        session = GPGSession(logger=logging.getLogger(__name__))
+        note_paths = write_notes(tmp_path, ["first note", "second note"])
+        list(async_encrypted_note_helper.get_decrypted_contents(note_paths=note_paths,
+                                                                max_concurrency=2,
+                                                                session=session))
+        assert len(session.latencies) == 2
+
+    @patch('sqnotes.gpg_session.gpgme')
+    def it_decrypts_with_the_gpg_library_when_installed(mock_gpgme, async_encrypted_note_helper, tmp_path):
+        mock_gpgme.Context.return_value.decrypt.side_effect = lambda data: (data.upper(), None, None)
+        session = GPGSession(logger=logging.getLogger(__name__))
+        note_paths = write_notes(tmp_path, ["an apple", "a pear"])
+        with patch('asyncio.create_subprocess_exec') as mock_create_subprocess_exec:
+            results = list(async_encrypted_note_helper.match_notes(note_paths=note_paths,
+                                                                   search_queries=["apple"],
+                                                                   max_concurrency=2,
+                                                                   session=session))
+        assert results == [(note_paths[0], (True, "AN APPLE")), (note_paths[1], (False, None))]
+        mock_create_subprocess_exec.assert_not_called()
+        assert len(session.latencies) == 2
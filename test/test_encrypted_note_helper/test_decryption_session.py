@@ -0,0 +1,81 @@
+import os
+import unittest
+import pytest
+from unittest.mock import patch, Mock
+from injector import Injector
+from sqnotes.encrypted_note_helper import EncryptedNoteHelper, GPGSubprocessException
+
+
+@pytest.fixture(scope='session', autouse=True)
+def set_test_environment():
+    os.environ['TESTING'] = 'true'
+
+
+@pytest.fixture
+def encrypted_note_helper():
+    injector = Injector()
+    enh = injector.get(EncryptedNoteHelper)
+    yield enh
+
+
+@pytest.fixture
+def mock_open_function():
+    mock_open_function = unittest.mock.mock_open(read_data=b'encrypted content')
+    with patch('builtins.open', mock_open_function):
+        yield mock_open_function
+
+
+@pytest.fixture
+def mock_gpgme():
+    with patch('sqnotes.gpg_session.gpgme') as mock:
+        mock.Context.return_value.decrypt.return_value = (b'decrypted content', None, None)
+        yield mock
+
+
+def describe_decryption_session():
+
+    def describe_without_gpg_library():
+
+        @pytest.mark.usefixtures('mock_open_function')
+        @patch('sqnotes.gpg_session.gpgme', None)
+        @patch('subprocess.run')
+        def it_runs_gpg_per_note_and_records_latency(mock_subprocess_run,
+                                                     encrypted_note_helper):
+            process = Mock()
+            process.returncode = 0
+            process.stdout = b'decrypted content'
+            mock_subprocess_run.return_value = process
+            with encrypted_note_helper.decryption_session() as session:
+                encrypted_note_helper.get_decrypted_content_in_memory(note_path='note1.txt')
+                encrypted_note_helper.get_decrypted_content_in_memory(note_path='note2.txt')
+            assert mock_subprocess_run.call_count == 2
+            assert len(session.latencies) == 2
+
+    def describe_with_gpg_library():
+
+        @pytest.mark.usefixtures('mock_open_function')
+        @patch('subprocess.run')
+        def it_decrypts_with_one_library_context(mock_subprocess_run,
+                                                 mock_gpgme,
+                                                 encrypted_note_helper):
+            with encrypted_note_helper.decryption_session():
+                first = encrypted_note_helper.get_decrypted_content_in_memory(note_path='note1.txt')
+                second = encrypted_note_helper.get_decrypted_content_in_memory(note_path='note2.txt')
+            assert first == second == 'decrypted content'
+            mock_gpgme.Context.assert_called_once()
+            mock_subprocess_run.assert_not_called()
+
+        @pytest.mark.usefixtures('mock_open_function')
+        def it_raises_gpg_exception_if_library_fails(mock_gpgme, encrypted_note_helper):
+            mock_gpgme.Context.return_value.decrypt.side_effect = Exception()
+            with encrypted_note_helper.decryption_session():
+                with pytest.raises(GPGSubprocessException):
+                    encrypted_note_helper.get_decrypted_content_in_memory(note_path='note1.txt')
+
+    @pytest.mark.usefixtures('mock_gpgme')
+    def it_reuses_the_outer_session_when_nested(encrypted_note_helper):
+        with encrypted_note_helper.decryption_session() as outer_session:
+            with encrypted_note_helper.decryption_session() as inner_session:
+                assert inner_session is outer_session
+            assert encrypted_note_helper.session is outer_session
+        assert encrypted_note_helper.session is None
@@ -0,0 +1,109 @@
+import io
+import os
+import pytest
+from unittest.mock import patch, MagicMock
+from injector import Injector
+from sqnotes.encrypted_note_helper import EncryptedNoteHelper, GPGSubprocessException, CouldNotReadNoteException
+from test.test_helper import as_chunks
+
+
+@pytest.fixture(scope='session', autouse=True)
+def set_test_environment():
+    os.environ['TESTING'] = 'true'
+
+
+@pytest.fixture
+def encrypted_note_helper():
+    injector = Injector()
+    enh = injector.get(EncryptedNoteHelper)
+    yield enh
+
+
+@pytest.fixture
+def note_path(tmp_path):
+    note_path = tmp_path / "note.txt.gpg"
+    note_path.write_bytes(b"ciphertext")
+    yield str(note_path)
+
+
+def get_mock_gpg_process(decrypted_data, returncode=0):
+    process = MagicMock()
+    process.stdout = io.BytesIO(decrypted_data)
+    process.returncode = None
+
+    def communicate():
+        process.returncode = returncode
+        return b"", b"gpg: decryption failed"
+    process.communicate.side_effect = communicate
+    return process
+
+
+def describe_get_decrypted_content_chunks():
+
+    @patch('subprocess.Popen')
+    def it_yields_the_decrypted_text_in_chunks(mock_popen, encrypted_note_helper, note_path):
+        mock_popen.return_value = get_mock_gpg_process(b"decrypted note text")
+        chunks = list(encrypted_note_helper.get_decrypted_content_chunks(note_path=note_path, chunk_size=4))
+        assert "".join(chunks) == "decrypted note text"
+        assert len(chunks) > 1
+
+    @patch('subprocess.Popen')
+    def it_decodes_characters_split_across_chunks(mock_popen, encrypted_note_helper, note_path):
+        mock_popen.return_value = get_mock_gpg_process("café crème".encode('utf-8'))
+        chunks = encrypted_note_helper.get_decrypted_content_chunks(note_path=note_path, chunk_size=1)
+        assert "".join(chunks) == "café crème"
+
+    @patch('subprocess.Popen')
+    def it_raises_if_gpg_returns_error_code(mock_popen, encrypted_note_helper, note_path):
+        mock_popen.return_value = get_mock_gpg_process(b"", returncode=2)
+        with pytest.raises(GPGSubprocessException):
+            list(encrypted_note_helper.get_decrypted_content_chunks(note_path=note_path))
+
+    @patch('subprocess.Popen')
+    def it_raises_if_output_is_not_utf8(mock_popen, encrypted_note_helper, note_path):
+        mock_popen.return_value = get_mock_gpg_process(b"\xff\xfe")
+        with pytest.raises(GPGSubprocessException):
+            list(encrypted_note_helper.get_decrypted_content_chunks(note_path=note_path))
+
+    def it_raises_read_error_if_note_cannot_be_opened(encrypted_note_helper, tmp_path):
+        with pytest.raises(CouldNotReadNoteException):
+            list(encrypted_note_helper.get_decrypted_content_chunks(note_path=str(tmp_path / "missing.txt.gpg")))
+
+    @patch('subprocess.Popen')
+    def it_stops_gpg_when_closed_early(mock_popen, encrypted_note_helper, note_path):
+        process = get_mock_gpg_process(b"a long decrypted note")
+        mock_popen.return_value = process
+        chunks = encrypted_note_helper.get_decrypted_content_chunks(note_path=note_path, chunk_size=4)
+        next(chunks)
+        chunks.close()
+        process.kill.assert_called_once()
+
+
+def describe_match_note():
+
+    def it_returns_content_of_a_matching_note(encrypted_note_helper):
+        with patch.object(EncryptedNoteHelper, 'get_decrypted_content_chunks',
+                          return_value=as_chunks("a note with apple and pear")):
+            result = encrypted_note_helper.match_note(note_path="note.txt.gpg", search_queries=["pear", "apple"])
+        assert result == (True, "a note with apple and pear")
+
+    def it_does_not_return_content_of_a_note_that_does_not_match(encrypted_note_helper):
+        with patch.object(EncryptedNoteHelper, 'get_decrypted_content_chunks',
+                          return_value=as_chunks("a note with apple")):
+            result = encrypted_note_helper.match_note(note_path="note.txt.gpg", search_queries=["pear"])
+        assert result == (False, None)
+
+    def it_stops_reading_a_large_note_once_all_queries_are_found(encrypted_note_helper):
+        read_chunks = []
+
+        def chunks(note_path):
+            for chunk in as_chunks("apple " + "x" * 1000):
+                read_chunks.append(chunk)
+                yield chunk
+
+        with patch.object(EncryptedNoteHelper, 'get_decrypted_content_chunks', side_effect=chunks):
+            result = encrypted_note_helper.match_note(note_path="note.txt.gpg",
+                                                      search_queries=["apple"],
+                                                      max_buffered_chars=8)
+        assert result == (True, None)
+        assert len(read_chunks) < 10
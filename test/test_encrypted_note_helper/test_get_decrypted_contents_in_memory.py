@@ -0,0 +1,62 @@
+import os
+import threading
+import pytest
+from unittest.mock import patch
+from injector import Injector
+from sqnotes.encrypted_note_helper import EncryptedNoteHelper, GPGSubprocessException
+
+
+@pytest.fixture(scope='session', autouse=True)
+def set_test_environment():
+    os.environ['TESTING'] = 'true'
+
+
+@pytest.fixture
+def encrypted_note_helper():
+    injector = Injector()
+    enh = injector.get(EncryptedNoteHelper)
+    yield enh
+
+
+def describe_get_decrypted_contents_in_memory():
+
+    def it_yields_results_in_input_order(encrypted_note_helper):
+        note_paths = [f"note{x}.txt.gpg" for x in range(10)]
+
+        def decrypt(note_path):
+            return f"content of {note_path}"
+
+        with patch.object(EncryptedNoteHelper, 'get_decrypted_content_in_memory', side_effect=decrypt):
+            results = list(encrypted_note_helper.get_decrypted_contents_in_memory(
+                note_paths=note_paths, max_workers=4))
+        assert results == [(p, f"content of {p}") for p in note_paths]
+
+    def it_decrypts_notes_concurrently(encrypted_note_helper):
+        note_paths = ['note1.txt.gpg', 'note2.txt.gpg']
+        barrier = threading.Barrier(2, timeout=5)
+
+        def decrypt(note_path):
+            # deadlocks (and times out) unless both notes are decrypting at once
+            barrier.wait()
+            return note_path
+
+        with patch.object(EncryptedNoteHelper, 'get_decrypted_content_in_memory', side_effect=decrypt):
+            results = list(encrypted_note_helper.get_decrypted_contents_in_memory(
+                note_paths=note_paths, max_workers=2))
+        assert [content for _, content in results] == note_paths
+
+    def it_raises_and_cancels_remaining_decryptions_on_error(encrypted_note_helper):
+        note_paths = [f"note{x}.txt.gpg" for x in range(50)]
+        called_paths = []
+
+        def decrypt(note_path):
+            called_paths.append(note_path)
+            if note_path == 'note0.txt.gpg':
+                raise GPGSubprocessException()
+            return note_path
+
+        with patch.object(EncryptedNoteHelper, 'get_decrypted_content_in_memory', side_effect=decrypt):
+            with pytest.raises(GPGSubprocessException):
+                list(encrypted_note_helper.get_decrypted_contents_in_memory(
+                    note_paths=note_paths, max_workers=1))
+        assert len(called_paths) < len(note_paths)
@@ -16,16 +16,20 @@ def mock_test_dir():
     test_dir = tempfile.TemporaryDirectory()
     yield test_dir
 
+def get_completed_process(returncode):
+    completed_process = MagicMock()
+    completed_process.returncode = returncode
+    return completed_process
+
 def describe_write_function():
 
     def describe_gpg_returns_successful():
 
-        @pytest.mark.usefixtures('mock_NamedTemporaryFile')
-        @patch('subprocess.call')
-        def it_calls_gpg_with_output_as_note_name( mock_subprocess_call,
+        @patch('subprocess.run')
+        def it_calls_gpg_with_output_as_temp_file_next_to_note( mock_subprocess_run,
                                                     mock_encrypted_note_helper,
                                                     mock_test_dir):
-            mock_subprocess_call.return_value = 0
+            mock_subprocess_run.return_value = get_completed_process(0)
             
 
             config = {
@@ -36,38 +40,85 @@ def describe_write_function():
             text_content = 'test content'
             mock_encrypted_note_helper.write_encrypted_note(file_path, text_content, config)
             
-            called_args, _ = mock_subprocess_call.call_args
+            called_args, _ = mock_subprocess_run.call_args
             first_call = called_args[0]
-            mock_subprocess_call.assert_called_once()
+            mock_subprocess_run.assert_called_once()
             assert first_call[4] == '--output'
-            assert first_call[5] == file_path
+            assert first_call[5] != file_path
+            assert os.path.dirname(first_call[5]) == mock_test_dir.name
 
 
-        @pytest.mark.usefixtures('mock_NamedTemporaryFile')
-        @patch('subprocess.call')
-        def test_write_function_calls_subprocess_with_gpg(mock_subprocess_call,
+        @patch('subprocess.run')
+        def test_write_function_calls_subprocess_with_gpg(mock_subprocess_run,
                                                             mock_test_dir,
                                                             mock_encrypted_note_helper):
-            mock_subprocess_call.return_value = 0 #success
+            mock_subprocess_run.return_value = get_completed_process(0)
             config = {
                 'GPG_KEY_EMAIL' : "test@test.com"
             }
             file_path = mock_test_dir.name + os.sep + 'test.txt.gpg'
             text_content = 'test content'
             mock_encrypted_note_helper.write_encrypted_note(file_path, text_content, config)
-            called_args, called_kwargs = mock_subprocess_call.call_args
+            called_args, called_kwargs = mock_subprocess_run.call_args
             first_call = called_args[0]
-            mock_subprocess_call.assert_called_once()
+            mock_subprocess_run.assert_called_once()
             assert first_call[0] == 'gpg'
 
-    def describe_gpg_raises_exception():
+        @patch('subprocess.run')
+        def it_pipes_note_content_to_gpg_stdin(mock_subprocess_run,
+                                                mock_test_dir,
+                                                mock_encrypted_note_helper):
+            mock_subprocess_run.return_value = get_completed_process(0)
+            config = {
+                'GPG_KEY_EMAIL' : "test@test.com"
+            }
+            file_path = mock_test_dir.name + os.sep + 'test.txt.gpg'
+            text_content = 'test content'
+            mock_encrypted_note_helper.write_encrypted_note(file_path, text_content, config)
+            called_args, called_kwargs = mock_subprocess_run.call_args
+            assert called_kwargs['input'] == b'test content'
+            assert called_args[0][-1] == "test@test.com"
+
         @pytest.mark.usefixtures('mock_NamedTemporaryFile')
-        @patch('subprocess.call')
-        def it_raises_exception(mock_subprocess_call,
+        @patch('subprocess.run')
+        def it_does_not_write_plaintext_to_a_temp_file(mock_subprocess_run,
+                                                        mock_NamedTemporaryFile,
+                                                        mock_test_dir,
+                                                        mock_encrypted_note_helper):
+            mock_subprocess_run.return_value = get_completed_process(0)
+            config = {
+                'GPG_KEY_EMAIL' : "test@test.com"
+            }
+            file_path = mock_test_dir.name + os.sep + 'test.txt.gpg'
+            mock_encrypted_note_helper.write_encrypted_note(file_path, 'test content', config)
+            mock_NamedTemporaryFile.assert_not_called()
+
+        @patch('subprocess.run')
+        def it_renames_encrypted_temp_file_onto_note(mock_subprocess_run,
+                                                    mock_test_dir,
+                                                    mock_encrypted_note_helper):
+            def write_ciphertext(command, **kwargs):
+                output_path = command[command.index('--output') + 1]
+                with open(output_path, 'w') as output_file:
+                    output_file.write("ciphertext")
+                return get_completed_process(0)
+            mock_subprocess_run.side_effect = write_ciphertext
+            config = {
+                'GPG_KEY_EMAIL' : "test@test.com"
+            }
+            file_path = mock_test_dir.name + os.sep + 'test.txt.gpg'
+            mock_encrypted_note_helper.write_encrypted_note(file_path, 'test content', config)
+            with open(file_path, 'r') as note_file:
+                assert note_file.read() == "ciphertext"
+            assert os.listdir(mock_test_dir.name) == ['test.txt.gpg']
+
+    def describe_gpg_raises_exception():
+        @patch('subprocess.run')
+        def it_raises_exception(mock_subprocess_run,
                                 mock_test_dir,
                                 mock_encrypted_note_helper):
             
-            mock_subprocess_call.side_effect = Exception
+            mock_subprocess_run.side_effect = Exception
             config = {
                 'GPG_KEY_EMAIL' : "test@test.com"
             }
@@ -77,13 +128,12 @@ def describe_write_function():
                 mock_encrypted_note_helper.write_encrypted_note(file_path, text_content, config)
 
     def describe_gpg_returns_error_code():
-        @pytest.mark.usefixtures('mock_NamedTemporaryFile')
-        @patch('subprocess.call')
-        def ir_raises_exception( mock_subprocess_call,
+        @patch('subprocess.run')
+        def ir_raises_exception( mock_subprocess_run,
                                 mock_test_dir,
                                 mock_encrypted_note_helper):
             
-            mock_subprocess_call.return_value = 1
+            mock_subprocess_run.return_value = get_completed_process(1)
             config = {
                 'GPG_KEY_EMAIL' : "test@test.com"
             }
@@ -91,4 +141,20 @@ def describe_write_function():
             text_content = 'test content'
             with pytest.raises(GPGSubprocessException):
                 mock_encrypted_note_helper.write_encrypted_note(file_path, text_content, config)
-        
+
+        @patch('subprocess.run')
+        def it_leaves_existing_note_and_no_temp_file(mock_subprocess_run,
+                                                    mock_test_dir,
+                                                    mock_encrypted_note_helper):
+            mock_subprocess_run.return_value = get_completed_process(2)
+            config = {
+                'GPG_KEY_EMAIL' : "test@test.com"
+            }
+            file_path = mock_test_dir.name + os.sep + 'test.txt.gpg'
+            with open(file_path, 'w') as note_file:
+                note_file.write("old ciphertext")
+            with pytest.raises(GPGSubprocessException):
+                mock_encrypted_note_helper.write_encrypted_note(file_path, 'test content', config)
+            with open(file_path, 'r') as note_file:
+                assert note_file.read() == "old ciphertext"
+            assert os.listdir(mock_test_dir.name) == ['test.txt.gpg']
@@ -0,0 +1,104 @@
+import json
+import os
+import pytest
+from unittest.mock import patch
+from injector import Injector
+from sqnotes.encrypted_note_helper import EncryptedNoteHelper
+from sqnotes.full_text_index import FullTextIndex, FullTextIndexNotOpenException
+
+
+@pytest.fixture
+def mock_plaintext_encryption():
+
+    def write_encrypted_note(_, note_file_path, note_content, config):
+        with open(note_file_path, 'w') as file:
+            file.write(note_content)
+
+    def get_decrypted_content_in_memory(_, note_path):
+        with open(note_path, 'r') as file:
+            return file.read()
+
+    with patch.object(EncryptedNoteHelper, 'write_encrypted_note', write_encrypted_note):
+        with patch.object(EncryptedNoteHelper, 'get_decrypted_content_in_memory', get_decrypted_content_in_memory):
+            yield
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    yield str(tmp_path / "sqnotes_fulltext_index.gpg")
+
+
+@pytest.fixture
+def full_text_index(index_path, mock_plaintext_encryption):
+    injector = Injector()
+    full_text_index : FullTextIndex = injector.get(FullTextIndex)
+    full_text_index.open(index_path=index_path)
+    yield full_text_index
+
+
+def describe_full_text_index():
+
+    def it_raises_if_used_before_open():
+        full_text_index = Injector().get(FullTextIndex)
+        with pytest.raises(FullTextIndexNotOpenException):
+            full_text_index.get_indexed_notes()
+
+    def describe_find_candidate_notes():
+
+        def it_finds_notes_containing_all_queries(full_text_index : FullTextIndex):
+            full_text_index.update_note(filename='a.txt.gpg', content='Apple and pear')
+            full_text_index.update_note(filename='b.txt.gpg', content='apple only')
+            candidates = full_text_index.find_candidate_notes(search_queries=['apple', 'PEAR'])
+            assert candidates == {'a.txt.gpg'}
+
+        def it_matches_queries_inside_longer_words(full_text_index : FullTextIndex):
+            full_text_index.update_note(filename='a.txt.gpg', content='pineapple')
+            candidates = full_text_index.find_candidate_notes(search_queries=['apple'])
+            assert candidates == {'a.txt.gpg'}
+
+        def it_returns_none_for_queries_without_words(full_text_index : FullTextIndex):
+            full_text_index.update_note(filename='a.txt.gpg', content='apple')
+            assert full_text_index.find_candidate_notes(search_queries=['??']) is None
+
+        def it_forgets_old_content_when_note_is_updated(full_text_index : FullTextIndex):
+            full_text_index.update_note(filename='a.txt.gpg', content='apple')
+            full_text_index.update_note(filename='a.txt.gpg', content='pear')
+            assert full_text_index.find_candidate_notes(search_queries=['apple']) == set()
+
+    def describe_save():
+
+        def it_writes_an_index_that_can_be_reopened(full_text_index : FullTextIndex, index_path):
+            full_text_index.update_note(filename='a.txt.gpg', content='apple pear apple')
+            full_text_index.save(config={'GPG_KEY_EMAIL' : 'test@test.com'})
+
+            reopened_index = Injector().get(FullTextIndex)
+            reopened_index.open(index_path=index_path)
+            assert reopened_index.get_indexed_notes() == {'a.txt.gpg'}
+            assert reopened_index.terms['apple'] == {'a.txt.gpg' : [0, 2]}
+
+        def it_keeps_the_stamp_of_each_note(full_text_index : FullTextIndex, index_path):
+            full_text_index.update_note(filename='a.txt.gpg', content='apple', stamp=[5, 1000])
+            full_text_index.save(config={'GPG_KEY_EMAIL' : 'test@test.com'})
+
+            reopened_index = Injector().get(FullTextIndex)
+            reopened_index.open(index_path=index_path)
+            assert reopened_index.get_note_stamp(filename='a.txt.gpg') == [5, 1000]
+
+        def it_reads_an_index_without_stamps(full_text_index : FullTextIndex, index_path):
+            with open(index_path, 'w') as file:
+                json.dump({'version' : 1, 'notes' : {'a.txt.gpg' : {'apple' : [0]}}}, file)
+            assert full_text_index.get_indexed_notes() == {'a.txt.gpg'}
+            assert full_text_index.get_note_stamp(filename='a.txt.gpg') is None
+
+        def it_does_not_write_if_unchanged(full_text_index : FullTextIndex, index_path):
+            full_text_index.save(config={'GPG_KEY_EMAIL' : 'test@test.com'})
+            assert not os.path.exists(index_path)
+
+    def describe_delete():
+
+        def it_removes_the_stored_index(full_text_index : FullTextIndex, index_path):
+            full_text_index.update_note(filename='a.txt.gpg', content='apple')
+            full_text_index.save(config={'GPG_KEY_EMAIL' : 'test@test.com'})
+            full_text_index.delete()
+            assert not os.path.exists(index_path)
+            assert full_text_index.get_indexed_notes() == set()
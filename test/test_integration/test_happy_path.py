@@ -27,9 +27,7 @@ def describe_sqnotes_integration():
         
         @pytest.mark.usefixtures(
             "mock_check_gpg_verified",
-            "mock_write_plaintext_to_temp_file",
-            "mock_call_gpg_subprocess_to_write_encrypted",
-            "mock_get_temp_plaintext_file"
+            "mock_call_gpg_subprocess_to_write_encrypted"
         )
         def it_creates_a_new_note_in_notes_dir (
                             sqnotes_with_initialized_user_data : SQNotes,
@@ -125,7 +123,7 @@ def describe_sqnotes_integration():
             
         @pytest.mark.usefixtures(
             "mock_check_gpg_verified",
-            "mock_get_decrypted_content_in_memory_integration"
+            "mock_get_decrypted_content_chunks_integration"
         )
         def it_returns_note_by_text_search (
                                         sqnotes_with_notes : SQNotes,
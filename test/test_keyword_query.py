@@ -0,0 +1,83 @@
+import pytest
+from sqnotes.keyword_query import (
+    parse_keyword_query,
+    KeywordQueryPlanner,
+    KeywordQueryException,
+    KeywordTerm,
+    AndQuery,
+    OrQuery,
+    NotQuery,
+)
+
+
+def get_planner(note_counts, num_notes=100):
+    return KeywordQueryPlanner(get_note_count=lambda term: note_counts[term.keyword],
+                               get_num_notes=lambda: num_notes)
+
+
+def describe_parse_keyword_query():
+
+    def it_joins_plain_keywords_with_and():
+        assert parse_keyword_query(["apple", "pear"]) == AndQuery([KeywordTerm("apple"), KeywordTerm("pear")])
+
+    def it_strips_the_hash_from_keywords():
+        assert parse_keyword_query(["#apple"]) == KeywordTerm("apple")
+
+    def it_reads_a_trailing_star_as_a_prefix():
+        assert parse_keyword_query(["#proj*"]) == KeywordTerm("proj", is_prefix=True)
+
+    def it_binds_and_tighter_than_or():
+        assert parse_keyword_query(["a OR b AND c"]) == OrQuery([
+            KeywordTerm("a"),
+            AndQuery([KeywordTerm("b"), KeywordTerm("c")])
+        ])
+
+    def it_binds_not_to_the_next_term():
+        assert parse_keyword_query(["a", "NOT", "b", "c"]) == AndQuery([
+            KeywordTerm("a"), NotQuery(KeywordTerm("b")), KeywordTerm("c")
+        ])
+
+    def it_groups_with_parentheses():
+        assert parse_keyword_query(["NOT (a OR b)"]) == NotQuery(OrQuery([KeywordTerm("a"), KeywordTerm("b")]))
+
+    @pytest.mark.parametrize("arguments", [[], ["a OR"], ["(a"], ["a )"], ["AND a"], ["#"]])
+    def it_rejects_malformed_queries(arguments):
+        with pytest.raises(KeywordQueryException):
+            parse_keyword_query(arguments)
+
+
+def describe_keyword_query_planner():
+
+    def it_intersects_the_most_selective_keyword_first():
+        planner = get_planner({"common" : 90, "rare" : 2})
+        sql, parameters = planner.compile(parse_keyword_query(["common", "rare"]))
+        assert " INTERSECT " in sql
+        assert parameters == ["rare", "common"]
+
+    def it_applies_not_with_except_after_intersecting():
+        planner = get_planner({"a" : 5, "b" : 3})
+        sql, parameters = planner.compile(parse_keyword_query(["a NOT b"]))
+        assert " EXCEPT " in sql
+        assert parameters == ["a", "b"]
+
+    def it_uses_union_for_or():
+        planner = get_planner({"a" : 5, "b" : 3})
+        sql, _ = planner.compile(parse_keyword_query(["a OR b"]))
+        assert " UNION " in sql
+
+    def it_knows_an_and_with_a_missing_keyword_is_empty():
+        planner = get_planner({"a" : 5, "missing" : 0})
+        assert planner.is_known_empty(parse_keyword_query(["a missing"]))
+        assert not planner.is_known_empty(parse_keyword_query(["a OR missing"]))
+        assert not planner.is_known_empty(parse_keyword_query(["NOT a"]))
+
+    def it_looks_up_each_keyword_count_once():
+        looked_up = []
+
+        def get_note_count(term):
+            looked_up.append(term.keyword)
+            return 1
+
+        planner = KeywordQueryPlanner(get_note_count=get_note_count, get_num_notes=lambda: 10)
+        planner.compile(parse_keyword_query(["a (a OR b) b"]))
+        assert sorted(looked_up) == ["a", "b"]
@@ -0,0 +1,116 @@
+import os
+import stat
+import logging
+import threading
+import pytest
+from sqnotes.note_cache import DecryptedNoteCache, NoteCacheServer, NoteCacheClient
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    yield FakeClock()
+
+
+@pytest.fixture
+def note_path(tmp_path):
+    note_path = tmp_path / "note1.txt.gpg"
+    note_path.write_text("ciphertext")
+    yield str(note_path)
+
+
+@pytest.fixture
+def running_server(tmp_path):
+    socket_path = str(tmp_path / "cache.sock")
+    server = NoteCacheServer(socket_path=socket_path,
+                             note_cache=DecryptedNoteCache(ttl_seconds=30))
+    server.timeout = 0.05
+    thread = threading.Thread(target=server.serve_until_idle)
+    thread.start()
+    yield server
+    server.is_locked = True
+    thread.join(timeout=5)
+
+
+@pytest.fixture
+def client(running_server):
+    client = NoteCacheClient(socket_path=running_server.socket_path,
+                             ttl_seconds=30,
+                             logger=logging.getLogger(__name__))
+    # never start a real daemon from the tests
+    client.is_daemon_start_attempted = True
+    yield client
+
+
+def describe_decrypted_note_cache():
+
+    def it_returns_cached_content_for_an_unchanged_note(clock):
+        note_cache = DecryptedNoteCache(ttl_seconds=60, clock=clock)
+        note_cache.put(note_path="note1", stamp=[1, 2], content="apple")
+        assert note_cache.get(note_path="note1", stamp=[1, 2]) == "apple"
+
+    def it_misses_when_the_note_file_changed(clock):
+        note_cache = DecryptedNoteCache(ttl_seconds=60, clock=clock)
+        note_cache.put(note_path="note1", stamp=[1, 2], content="apple")
+        assert note_cache.get(note_path="note1", stamp=[1, 3]) is None
+        assert len(note_cache) == 0
+
+    def it_expires_notes_after_the_ttl(clock):
+        note_cache = DecryptedNoteCache(ttl_seconds=60, clock=clock)
+        note_cache.put(note_path="note1", stamp=[1, 2], content="apple")
+        clock.now = 61
+        assert note_cache.get(note_path="note1", stamp=[1, 2]) is None
+
+    def it_evicts_the_least_recently_used_note(clock):
+        note_cache = DecryptedNoteCache(ttl_seconds=60, max_notes=2, clock=clock)
+        note_cache.put(note_path="note1", stamp=[1, 1], content="apple")
+        note_cache.put(note_path="note2", stamp=[2, 2], content="pear")
+        note_cache.get(note_path="note1", stamp=[1, 1])
+        note_cache.put(note_path="note3", stamp=[3, 3], content="kiwi")
+        assert note_cache.get(note_path="note2", stamp=[2, 2]) is None
+        assert note_cache.get(note_path="note1", stamp=[1, 1]) == "apple"
+
+    def it_zeroes_note_bodies_when_wiped(clock):
+        note_cache = DecryptedNoteCache(ttl_seconds=60, clock=clock)
+        note_cache.put(note_path="note1", stamp=[1, 2], content="apple")
+        _, _, content = note_cache.entries["note1"]
+        assert note_cache.wipe() == 1
+        assert content == bytearray(len("apple"))
+
+
+def describe_note_cache_server():
+
+    def it_makes_the_socket_private_to_its_owner(running_server):
+        socket_mode = stat.S_IMODE(os.stat(running_server.socket_path).st_mode)
+        assert socket_mode == 0o600
+
+    def it_serves_notes_put_by_a_client(client, note_path):
+        client.put(note_path=note_path, content="apple")
+        assert client.get_many(note_paths=[note_path]) == {note_path : "apple"}
+
+    def it_does_not_serve_a_note_changed_since_it_was_cached(client, note_path):
+        client.put(note_path=note_path, content="apple")
+        with open(note_path, "a") as note_file:
+            note_file.write("more ciphertext")
+        assert client.get_many(note_paths=[note_path]) == {}
+
+    def it_wipes_and_stops_when_locked(client, running_server, note_path):
+        client.put(note_path=note_path, content="apple")
+        assert client.lock() == 1
+        assert running_server.is_locked
+
+    def it_treats_a_missing_daemon_as_a_miss(tmp_path, note_path):
+        client = NoteCacheClient(socket_path=str(tmp_path / "missing.sock"),
+                                 ttl_seconds=30,
+                                 logger=logging.getLogger(__name__))
+        client.is_daemon_start_attempted = True
+        assert client.get_many(note_paths=[note_path]) == {}
+        assert client.lock() is None
@@ -0,0 +1,55 @@
+import pytest
+
+from sqnotes.note_filenames import (
+    SORT_BY_DATE,
+    SORT_BY_NAME,
+    get_note_sort_key,
+    get_note_timestamp,
+    is_note_filename,
+    is_note_in_date_range,
+    parse_note_date_bound,
+)
+
+
+def describe_note_filenames():
+
+    def it_recognizes_encrypted_and_armored_notes():
+        assert is_note_filename("20240517093000.txt.gpg")
+        assert is_note_filename("20240517093000.txt")
+        assert not is_note_filename("notes.md")
+        assert not is_note_filename(".hidden.txt")
+
+    def it_reads_the_timestamp_from_a_note_filename():
+        assert get_note_timestamp("20240517093000.txt.gpg") == "20240517093000"
+        assert get_note_timestamp("groceries.txt.gpg") is None
+
+    def describe_parse_note_date_bound():
+
+        def it_keeps_the_digits_of_the_given_precision():
+            assert parse_note_date_bound("2024") == "2024"
+            assert parse_note_date_bound("2024-05-17") == "20240517"
+            assert parse_note_date_bound("2024-05-17T09:30") == "202405170930"
+
+        @pytest.mark.parametrize("value", ["yesterday", "2024-13", "2024-05-1", "2024-02-30"])
+        def it_rejects_values_that_are_not_dates(value):
+            with pytest.raises(ValueError, match=f"'{value}' is not a date"):
+                parse_note_date_bound(value)
+
+    def describe_is_note_in_date_range():
+
+        def it_includes_the_whole_period_of_each_bound():
+            assert is_note_in_date_range("20240501000000.txt.gpg", since="202405", until="202405")
+            assert is_note_in_date_range("20240531235959.txt.gpg", since="202405", until="202405")
+            assert not is_note_in_date_range("20240601000000.txt.gpg", until="202405")
+            assert not is_note_in_date_range("20240430235959.txt.gpg", since="202405")
+
+        def it_excludes_notes_without_a_timestamp_only_when_filtering():
+            assert is_note_in_date_range("groceries.txt.gpg")
+            assert not is_note_in_date_range("groceries.txt.gpg", since="2024")
+
+    def it_sorts_notes_without_a_timestamp_last_by_date():
+        filenames = ["b.txt", "20240517093000.txt.gpg", "20230101000000.txt", "a.txt"]
+        assert sorted(filenames, key=get_note_sort_key(SORT_BY_DATE)) == [
+            "20230101000000.txt", "20240517093000.txt.gpg", "a.txt", "b.txt"
+        ]
+        assert sorted(filenames, key=get_note_sort_key(SORT_BY_NAME)) == sorted(filenames)
@@ -0,0 +1,113 @@
+import os
+
+import pytest
+
+from sqnotes.note_watcher import (
+    MAX_SETTLE_TIME,
+    NoteDirectoryWatcher,
+    NoteFileChanges,
+    get_note_file_changes,
+    get_note_files_snapshot,
+)
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def watcher(tmp_path, clock):
+    (tmp_path / "note1.txt.gpg").write_text("apple")
+    return NoteDirectoryWatcher(notes_dir=str(tmp_path), poll_interval=2.0, clock=clock, sleep=clock.sleep)
+
+
+def poll_after(watcher, clock, seconds):
+    clock.sleep(seconds)
+    return watcher.poll()
+
+
+def describe_get_note_files_snapshot():
+
+    def it_records_the_size_and_mtime_of_each_note(tmp_path):
+        note_path = tmp_path / "note1.txt.gpg"
+        note_path.write_text("apple")
+        note_stat = os.stat(note_path)
+        assert get_note_files_snapshot(str(tmp_path)) == {
+            "note1.txt.gpg" : (note_stat.st_size, note_stat.st_mtime_ns)
+        }
+
+    def it_skips_files_that_are_not_notes(tmp_path):
+        (tmp_path / "sqnotes_index.db").write_text("")
+        (tmp_path / ".note.txt.swp").write_text("")
+        (tmp_path / "folder.txt").mkdir()
+        assert get_note_files_snapshot(str(tmp_path)) == {}
+
+
+def describe_get_note_file_changes():
+
+    def it_finds_added_changed_and_removed_notes():
+        previous_snapshot = {"a.txt" : (1, 1), "b.txt" : (1, 1), "c.txt" : (1, 1)}
+        snapshot = {"a.txt" : (1, 1), "b.txt" : (2, 2), "d.txt" : (1, 1)}
+        assert get_note_file_changes(previous_snapshot, snapshot) == NoteFileChanges(
+            added=["d.txt"], changed=["b.txt"], removed=["c.txt"]
+        )
+
+
+def describe_note_directory_watcher():
+
+    def it_does_not_scan_before_the_poll_interval(watcher, clock, tmp_path):
+        (tmp_path / "note2.txt.gpg").write_text("pear")
+        assert poll_after(watcher, clock, 1.0) is None
+        assert watcher.first_change_time is None
+
+    def it_reports_changes_once_the_directory_is_quiet(watcher, clock, tmp_path):
+        (tmp_path / "note2.txt.gpg").write_text("pear")
+        assert poll_after(watcher, clock, 2.0) is None
+        assert poll_after(watcher, clock, 0.5) == NoteFileChanges(added=["note2.txt.gpg"])
+        assert poll_after(watcher, clock, 2.0) is None
+
+    def it_reports_a_burst_of_changes_as_one_batch(watcher, clock, tmp_path):
+        (tmp_path / "note2.txt.gpg").write_text("pear")
+        assert poll_after(watcher, clock, 2.0) is None
+        (tmp_path / "note3.txt.gpg").write_text("kiwi")
+        os.remove(tmp_path / "note1.txt.gpg")
+        assert poll_after(watcher, clock, 0.5) is None
+        assert poll_after(watcher, clock, 0.5) == NoteFileChanges(
+            added=["note2.txt.gpg", "note3.txt.gpg"], removed=["note1.txt.gpg"]
+        )
+
+    def it_reports_nothing_for_a_note_added_and_removed_within_a_burst(watcher, clock, tmp_path):
+        (tmp_path / "note2.txt.gpg").write_text("pear")
+        assert poll_after(watcher, clock, 2.0) is None
+        os.remove(tmp_path / "note2.txt.gpg")
+        assert poll_after(watcher, clock, 0.5) is None
+        assert poll_after(watcher, clock, 0.5) is None
+        assert watcher.first_change_time is None
+
+    def it_reports_changes_that_never_settle_after_the_max_settle_time(watcher, clock, tmp_path):
+        changes = None
+        for note_number in range(int(MAX_SETTLE_TIME / 0.5) + 2):
+            (tmp_path / f"burst{note_number}.txt.gpg").write_text("pear")
+            changes = poll_after(watcher, clock, 2.0 if note_number == 0 else 0.5)
+            if changes is not None:
+                break
+        assert changes is not None
+        assert clock.now <= 2.0 + MAX_SETTLE_TIME
+
+    def it_waits_for_the_next_batch(watcher, clock, tmp_path):
+        (tmp_path / "note1.txt.gpg").write_text("apple pie")
+        assert watcher.wait_for_changes() == NoteFileChanges(changed=["note1.txt.gpg"])
+        assert clock.now == 2.5
@@ -0,0 +1,34 @@
+from sqnotes.query_matcher import IncrementalQueryMatcher
+
+
+def describe_incremental_query_matcher():
+
+    def it_matches_when_all_queries_are_found():
+        matcher = IncrementalQueryMatcher(search_queries=["apple", "pear"])
+        assert not matcher.feed("an apple ")
+        assert matcher.feed("and a pear")
+
+    def it_ignores_case():
+        matcher = IncrementalQueryMatcher(search_queries=["Apple"])
+        assert matcher.feed("APPLE pie")
+
+    def it_finds_a_query_split_across_chunks():
+        matcher = IncrementalQueryMatcher(search_queries=["banana"])
+        assert not matcher.feed("a ban")
+        assert not matcher.feed("a")
+        assert matcher.feed("na split")
+
+    def it_does_not_match_when_a_query_is_missing():
+        matcher = IncrementalQueryMatcher(search_queries=["apple", "kiwi"])
+        for chunk in ["apple ", "pear ", "banana"]:
+            matcher.feed(chunk)
+        assert not matcher.is_matched()
+
+    def it_keeps_only_a_short_tail_between_chunks():
+        matcher = IncrementalQueryMatcher(search_queries=["pear"])
+        matcher.feed("x" * 10000)
+        assert len(matcher.tail) == 3
+
+    def it_matches_immediately_with_no_queries():
+        matcher = IncrementalQueryMatcher(search_queries=[])
+        assert matcher.is_matched()
@@ -0,0 +1,32 @@
+from sqnotes.result_window import ResultWindow
+
+
+def take_all(result_window, num_results):
+    return [result_window.take() for _ in range(num_results)]
+
+
+def describe_result_window():
+
+    def it_takes_every_result_by_default():
+        assert take_all(ResultWindow(), 3) == [True, True, True]
+
+    def it_skips_results_before_the_offset():
+        assert take_all(ResultWindow(offset=2), 4) == [False, False, True, True]
+
+    def it_is_full_after_the_limit():
+        result_window = ResultWindow(limit=2, offset=1)
+        assert take_all(result_window, 4) == [False, True, True, False]
+        assert result_window.is_full()
+
+    def it_is_full_at_once_with_a_limit_of_zero():
+        assert ResultWindow(limit=0).is_full()
+
+    def it_is_empty_until_a_result_falls_inside_the_window():
+        result_window = ResultWindow(offset=1)
+        take_all(result_window, 1)
+        assert result_window.is_empty()
+        take_all(result_window, 1)
+        assert not result_window.is_empty()
+
+    def it_is_empty_with_a_limit_of_zero():
+        assert ResultWindow(limit=0).is_empty()
@@ -0,0 +1,48 @@
+from unittest.mock import patch
+
+import pytest
+from sqnotes.sqnotes_module import SQNotes
+from sqnotes.encrypted_note_helper import EncryptedNoteHelper
+from sqnotes.async_encrypted_note_helper import AsyncEncryptedNoteHelper
+from sqnotes.database_service import DatabaseService
+from test.test_helper import get_all_mocked_print_output, as_generator
+
+
+def describe_decryption_engine():
+
+    @pytest.mark.usefixtures("mock_get_notes_dir_from_config", "mock_get_all_note_paths", "mock_print")
+    def it_uses_the_thread_pool_by_default(sqnotes_obj : SQNotes):
+        with patch.object(EncryptedNoteHelper, 'match_notes', return_value=as_generator([])) as mock_match_notes:
+            sqnotes_obj.search_notes(search_queries=["apple"])
+        mock_match_notes.assert_called_once()
+
+    @pytest.mark.usefixtures("mock_get_notes_dir_from_config", "mock_get_all_note_paths", "mock_print")
+    def it_uses_asyncio_when_configured(sqnotes_obj : SQNotes, user_config_data):
+        user_config_data['settings']['decryption_engine'] = 'asyncio'
+        user_config_data['settings']['decryption_workers'] = '3'
+        with patch.object(AsyncEncryptedNoteHelper, 'match_notes', return_value=as_generator([])) as mock_match_notes:
+            sqnotes_obj.search_notes(search_queries=["apple"])
+        assert mock_match_notes.call_args.kwargs['max_concurrency'] == 3
+
+    @pytest.mark.usefixtures("mock_get_notes_dir_from_config", "mock_get_all_note_paths", "mock_print")
+    def it_passes_the_decryption_session_to_the_asyncio_engine(sqnotes_obj : SQNotes, user_config_data):
+        user_config_data['settings']['decryption_engine'] = 'asyncio'
+        sessions = []
+
+        def match_notes(self, session, **kwargs):
+            sessions.append(session)
+            return as_generator([])
+
+        with patch.object(AsyncEncryptedNoteHelper, 'match_notes', match_notes):
+            sqnotes_obj.search_notes(search_queries=["apple"])
+        assert sessions[0] is not None
+
+    @pytest.mark.usefixtures("mock_get_notes_dir_from_config", "mock_open_database")
+    def it_prints_keyword_matches_from_the_asyncio_engine(sqnotes_obj : SQNotes, user_config_data, mock_print):
+        user_config_data['settings']['decryption_engine'] = 'asyncio'
+        decrypted_notes = iter([("notes/note1.txt", "first #apple"), ("notes/note2.txt", "second #apple")])
+        with patch.object(DatabaseService, 'query_notes_by_keywords', return_value=[('note1.txt',), ('note2.txt',)]):
+            with patch.object(AsyncEncryptedNoteHelper, 'get_decrypted_contents', return_value=decrypted_notes):
+                sqnotes_obj.search_keywords(keywords=["apple"])
+        output = get_all_mocked_print_output(mocked_print=mock_print)
+        assert output.index("first #apple") < output.index("second #apple")
@@ -6,7 +6,7 @@ from test.test_helper import do_nothing
 
 def describe_extract_and_save_keywords():
     
-    @patch.object(DatabaseService, 'insert_note_keyword_into_database', do_nothing)
+    @patch.object(DatabaseService, 'insert_note_keywords_into_database', do_nothing)
     @patch.object(DatabaseService, 'insert_keyword_into_database')
     @patch.object(SQNotes, '_extract_keywords')
     def it_calls_to_insert_each_new_keyword(mock_extract_keywords,
@@ -19,6 +19,22 @@ def describe_extract_and_save_keywords():
         call_args_list = mock_insert_keyword_into_database.call_args_list
         assert call_args_list[0].kwargs['keyword'] == 'apple'
         assert call_args_list[1].kwargs['keyword'] == 'pear'
+
+    @patch.object(DatabaseService, 'insert_note_keywords_into_database', do_nothing)
+    @patch.object(DatabaseService, 'insert_new_keyword_into_database')
+    @patch.object(DatabaseService, 'insert_keyword_into_database')
+    @patch.object(SQNotes, '_extract_keywords')
+    def it_only_inserts_keywords_missing_from_the_keyword_id_map(mock_extract_keywords,
+                                        mock_insert_keyword_into_database,
+                                        mock_insert_new_keyword_into_database,
+                                        sqnotes_obj : SQNotes):
+        mock_extract_keywords.return_value = ['apple', 'pear']
+        mock_insert_new_keyword_into_database.return_value = 7
+        keyword_ids = {'apple' : 3}
+        sqnotes_obj._extract_and_save_keywords(11, 'test #apple #pear', keyword_ids=keyword_ids)
+        mock_insert_keyword_into_database.assert_not_called()
+        mock_insert_new_keyword_into_database.assert_called_once_with(keyword='pear')
+        assert keyword_ids == {'apple' : 3, 'pear' : 7}
     
 def describe_extract_keywords():
     
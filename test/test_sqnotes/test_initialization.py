@@ -34,6 +34,20 @@ def describe_sqnotes_initialization():
         
         
     
+    @pytest.mark.usefixtures("mock_prompt_for_user_notes_path")
+    @patch.object(CommandValidator, 'verify_command', get_true)
+    @patch.object(SQNotes, 'choose_text_editor_interactive', do_nothing)
+    @patch.object(UserConfigurationHelper, 'set_setting_to_user_config', do_nothing)
+    @patch.object(UserConfigurationHelper, 'set_global_to_user_config', do_nothing)
+    @patch.object(UserConfigurationHelper, 'batched_writes')
+    def it_batches_user_config_writes(
+                                        mock_batched_writes,
+                                        sqnotes_obj : SQNotes
+                                        ):
+        sqnotes_obj.initialize()
+        mock_batched_writes.assert_called_once()
+        
+    
     def describe_sets_notes_path_without_error():
     
         @patch.object(SQNotes, 'prompt_for_user_notes_path', lambda x: 'notes_path')
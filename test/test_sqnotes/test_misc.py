@@ -63,8 +63,10 @@ def describe_sqnotes():
 
     def describe_list_files():
         
-        @pytest.mark.usefixtures('mock_get_notes_dir_from_config')
-        @patch.object(SQNotes, '_get_all_note_paths')
+        @pytest.mark.usefixtures('mock_get_notes_dir_from_config',
+                                 'mock_open_database',
+                                 'database_service_open_in_memory')
+        @patch.object(SQNotes, '_get_note_filenames_in_notes_dir')
         def it_prints_all_files(
                                     mock_get_notes,
                                     sqnotes_obj,
@@ -0,0 +1,45 @@
+from unittest.mock import patch
+
+import pytest
+from sqnotes.sqnotes_module import SQNotes
+from sqnotes.encrypted_note_helper import EncryptedNoteHelper
+from sqnotes.note_cache import NoteCacheClient
+from sqnotes import interface_copy
+from test.test_helper import get_all_mocked_print_output, as_generator
+
+
+def describe_note_cache():
+
+    @pytest.mark.usefixtures("mock_get_notes_dir_from_config", "mock_get_all_note_paths")
+    def it_does_not_use_the_cache_by_default(sqnotes_obj : SQNotes, mock_print):
+        with patch.object(NoteCacheClient, 'get_many') as mock_get_many:
+            with patch.object(EncryptedNoteHelper, 'match_notes', return_value=as_generator([])):
+                sqnotes_obj.search_notes(search_queries=["apple"])
+        mock_get_many.assert_not_called()
+
+    @pytest.mark.usefixtures("mock_get_notes_dir_from_config", "mock_get_all_note_paths")
+    def it_only_decrypts_notes_missing_from_the_cache(sqnotes_obj : SQNotes, user_config_data, mock_print):
+        user_config_data['settings']['note_cache_ttl'] = '300'
+        decrypted_notes = (note for note in [("note2.txt", "apple in note2")])
+        with patch.object(NoteCacheClient, 'get_many',
+                          return_value={"note1.txt" : "apple in note1", "note3.txt" : "pear"}):
+            with patch.object(NoteCacheClient, 'put') as mock_put:
+                with patch.object(EncryptedNoteHelper, 'get_decrypted_contents_in_memory',
+                                  return_value=decrypted_notes) as mock_decrypt:
+                    sqnotes_obj.search_notes(search_queries=["apple"])
+        assert mock_decrypt.call_args.kwargs['note_paths'] == ["note2.txt"]
+        mock_put.assert_called_once_with(note_path="note2.txt", content="apple in note2")
+        output = get_all_mocked_print_output(mocked_print=mock_print)
+        assert output.index("apple in note1") < output.index("apple in note2")
+        assert "pear" not in output
+
+    def it_prints_when_no_cache_is_running(sqnotes_obj : SQNotes, mock_print):
+        with patch.object(NoteCacheClient, 'lock', return_value=None):
+            sqnotes_obj.lock_note_cache()
+        mock_print.assert_called_once_with(interface_copy.NOTE_CACHE_NOT_RUNNING())
+
+    def it_stops_a_running_daemon_when_the_ttl_changes(sqnotes_obj : SQNotes, user_config_data, mock_print):
+        with patch.object(NoteCacheClient, 'lock', return_value=3) as mock_lock:
+            sqnotes_obj.set_note_cache_ttl(120)
+        mock_lock.assert_called_once()
+        assert sqnotes_obj._get_note_cache_ttl() == 120
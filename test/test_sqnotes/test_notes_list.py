@@ -0,0 +1,65 @@
+import pytest
+from unittest.mock import patch
+from sqnotes.sqnotes_module import SQNotes
+
+
+@pytest.fixture
+def sqnotes_with_notes_dir(sqnotes_obj : SQNotes, mock_get_notes_dir_from_config):
+    yield sqnotes_obj
+
+
+def add_note_files(notes_dir, filenames):
+    for filename in filenames:
+        (notes_dir / filename).touch()
+
+
+def get_printed(mock_print):
+    return [args[0] for args, _ in mock_print.call_args_list if args]
+
+
+def describe_notes_list():
+
+    def it_lists_the_notes_in_the_notes_directory_by_name(
+        sqnotes_with_notes_dir : SQNotes, test_temp_notes_dir, mock_print
+    ):
+        add_note_files(test_temp_notes_dir, ["b.txt", "a.txt.gpg"])
+        sqnotes_with_notes_dir.notes_list()
+        assert get_printed(mock_print) == ["a.txt.gpg", "b.txt"]
+
+    def it_does_not_open_the_database(
+        sqnotes_with_notes_dir : SQNotes, test_temp_notes_dir, mock_print
+    ):
+        add_note_files(test_temp_notes_dir, ["a.txt.gpg"])
+        with patch.object(SQNotes, "open_database") as mock_open_database:
+            sqnotes_with_notes_dir.notes_list()
+        mock_open_database.assert_not_called()
+
+    def it_ignores_files_that_are_not_notes(
+        sqnotes_with_notes_dir : SQNotes, test_temp_notes_dir, mock_print
+    ):
+        add_note_files(test_temp_notes_dir, ["a.txt.gpg"])
+        (test_temp_notes_dir / "sqnotes_index.db").touch()
+        (test_temp_notes_dir / "subdir.txt").mkdir()
+        sqnotes_with_notes_dir.notes_list()
+        assert get_printed(mock_print) == ["a.txt.gpg"]
+
+    def it_lists_notes_by_date_with_undated_notes_last(
+        sqnotes_with_notes_dir : SQNotes, test_temp_notes_dir, mock_print
+    ):
+        filenames = ["groceries.txt.gpg", "20240601120000.txt.gpg", "20240517093000.txt.gpg", "20230101000000.txt"]
+        add_note_files(test_temp_notes_dir, filenames)
+        sqnotes_with_notes_dir.notes_list(sort="date")
+        assert get_printed(mock_print) == [
+            "20230101000000.txt",
+            "20240517093000.txt.gpg",
+            "20240601120000.txt.gpg",
+            "groceries.txt.gpg",
+        ]
+
+    def it_filters_sorts_and_pages_the_notes(
+        sqnotes_with_notes_dir : SQNotes, test_temp_notes_dir, mock_print
+    ):
+        filenames = ["groceries.txt.gpg", "20240601120000.txt.gpg", "20240517093000.txt.gpg", "20230101000000.txt"]
+        add_note_files(test_temp_notes_dir, filenames)
+        sqnotes_with_notes_dir.notes_list(sort="date", since="2024", limit=1, offset=1)
+        assert get_printed(mock_print) == ["20240601120000.txt.gpg"]
@@ -3,7 +3,7 @@
 import pytest
 from unittest.mock import patch
 from sqnotes.sqnotes_module import SQNotes, CouldNotOpenDatabaseException
-from sqnotes.database_service import DatabaseService
+from sqnotes.database_service import DatabaseService, SchemaMigrationException
 from test.test_helper import just_return, do_nothing
 from conftest import sqnotes_obj
 
@@ -11,7 +11,8 @@ def describe_open_database():
     
     def describe_database_is_set_up():
     
-        @pytest.mark.usefixtures('mock_get_database_file_path',
+        @pytest.mark.usefixtures('mock_migrate_schema',
+                                 'mock_get_database_file_path',
                                  'mock_get_notes_dir_from_config')
         @patch.object(SQNotes, '_get_is_database_set_up', just_return(True))
         @patch.object(SQNotes, 'setup_database', do_nothing)
@@ -23,9 +24,24 @@ def describe_open_database():
                                          ):
             sqnotes_obj.open_database()
             mock_dbservice_connect.assert_called_once()
+
+        @pytest.mark.usefixtures('mock_migrate_schema',
+                                 'mock_get_database_file_path',
+                                 'mock_get_notes_dir_from_config')
+        @patch.object(SQNotes, '_get_is_database_set_up', just_return(True))
+        @patch.object(SQNotes, '_get_database_pragmas_from_config', just_return({'synchronous' : 'FULL'}))
+        @patch.object(DatabaseService, 'connect')
+        def it_passes_configured_pragmas_to_database_service(
+                                                mock_dbservice_connect,
+                                                sqnotes_obj : SQNotes
+                                         ):
+            sqnotes_obj.open_database()
+            _, kwargs = mock_dbservice_connect.call_args
+            assert kwargs['pragmas'] == {'synchronous' : 'FULL'}
             
             
-        @pytest.mark.usefixtures('mock_get_database_file_path',
+        @pytest.mark.usefixtures('mock_migrate_schema',
+                                 'mock_get_database_file_path',
                                  'mock_get_notes_dir_from_config')
         @patch.object(SQNotes, '_get_is_database_set_up', just_return(True))
         @patch.object(SQNotes, 'setup_database')
@@ -41,7 +57,8 @@ def describe_open_database():
         def describe_error_on_connecting_to_database():
         
         
-            @pytest.mark.usefixtures('mock_get_database_file_path',
+            @pytest.mark.usefixtures('mock_migrate_schema',
+                                     'mock_get_database_file_path',
                                      'mock_get_notes_dir_from_config')
             @patch.object(SQNotes, '_get_is_database_set_up', just_return(True))
             @patch.object(SQNotes, 'setup_database', do_nothing)
@@ -57,7 +74,8 @@ def describe_open_database():
     def describe_database_is_not_set_up():
             
             
-        @pytest.mark.usefixtures('mock_get_database_file_path',
+        @pytest.mark.usefixtures('mock_migrate_schema',
+                                 'mock_get_database_file_path',
                                  'mock_get_notes_dir_from_config')
         @patch.object(SQNotes, '_get_is_database_set_up', just_return(False))
         @patch.object(SQNotes, 'setup_database', do_nothing)
@@ -70,7 +88,8 @@ def describe_open_database():
             mock_dbservice_connect.assert_called_once()
             
             
-        @pytest.mark.usefixtures('mock_get_database_file_path',
+        @pytest.mark.usefixtures('mock_migrate_schema',
+                                 'mock_get_database_file_path',
                                  'mock_get_notes_dir_from_config')
         @patch.object(SQNotes, '_get_is_database_set_up', just_return(False))
         @patch.object(DatabaseService, 'connect', do_nothing)
@@ -86,7 +105,8 @@ def describe_open_database():
         def describe_error_on_connecting_to_database():
         
         
-            @pytest.mark.usefixtures('mock_get_database_file_path',
+            @pytest.mark.usefixtures('mock_migrate_schema',
+                                     'mock_get_database_file_path',
                                      'mock_get_notes_dir_from_config')
             @patch.object(SQNotes, '_get_is_database_set_up', just_return(False))
             @patch.object(SQNotes, 'setup_database', do_nothing)
@@ -100,6 +120,44 @@ def describe_open_database():
                     sqnotes_obj.open_database()
             
             
+    def describe_schema_migration():
+        
+        @pytest.mark.usefixtures('mock_get_database_file_path',
+                                 'mock_get_notes_dir_from_config')
+        @patch.object(SQNotes, '_get_is_database_set_up', just_return(True))
+        @patch.object(DatabaseService, 'connect', do_nothing)
+        def it_migrates_the_database_schema(
+                                                mock_migrate_schema,
+                                                sqnotes_obj : SQNotes
+                                         ):
+            sqnotes_obj.open_database()
+            mock_migrate_schema.assert_called_once()
+
+        @pytest.mark.usefixtures('mock_get_database_file_path',
+                                 'mock_get_notes_dir_from_config')
+        @patch.object(SQNotes, '_get_is_database_set_up', just_return(True))
+        @patch.object(DatabaseService, 'connect', do_nothing)
+        def it_raises_could_not_open_database_if_migration_fails(
+                                                mock_migrate_schema,
+                                                sqnotes_obj : SQNotes
+                                         ):
+            mock_migrate_schema.side_effect = SchemaMigrationException()
+            with pytest.raises(CouldNotOpenDatabaseException):
+                sqnotes_obj.open_database()
+
+    def describe_already_connected():
+
+        @pytest.mark.usefixtures('mock_migrate_schema',
+                                 'mock_get_database_file_path',
+                                 'mock_get_notes_dir_from_config')
+        @patch.object(SQNotes, '_get_is_database_set_up', just_return(True))
+        def it_reuses_the_connection_to_the_configured_database(sqnotes_obj : SQNotes):
+            sqnotes_obj.open_database()
+            connection = sqnotes_obj.database_service._get_connection()
+            sqnotes_obj.open_database()
+            assert sqnotes_obj.database_service._get_connection() is connection
+
+
 def describe_setup_database():
     
     @pytest.mark.usefixtures('mock_print')
@@ -122,6 +180,3 @@ def describe_setup_database():
                                                      ):
         sqnotes_obj.setup_database()
         mock_set_database_is_set_up.assert_called_once()
-    
-    
-            
@@ -4,6 +4,7 @@ import pytest
 from unittest.mock import patch
 from sqnotes.sqnotes_module import SQNotes
 from sqnotes.database_service import DatabaseService
+from test.test_helper import get_all_mocked_print_output
 
 def describe_print_all_keywords():
     
@@ -16,4 +17,21 @@ def describe_print_all_keywords():
             ):
         mock_get_all_keywords.return_value = []
         sqnotes_obj.print_all_keywords()
-        mock_get_all_keywords.assert_called_once()
\ No newline at end of file
+        mock_get_all_keywords.assert_called_once()
+    
+    @pytest.mark.usefixtures("mock_open_database")
+    @patch.object(DatabaseService, 'get_all_keywords')
+    @patch.object(DatabaseService, 'get_keyword_counts')
+    def it_prints_keyword_counts_from_keyword_stats(
+                                            mock_get_keyword_counts,
+                                            mock_get_all_keywords,
+                                            mock_print,
+                                            sqnotes_obj : SQNotes
+            ):
+        mock_get_keyword_counts.return_value = [("apple", 3), ("pear", 1)]
+        sqnotes_obj.print_all_keywords(is_showing_counts=True, top=2)
+        mock_get_keyword_counts.assert_called_once_with(limit=2)
+        mock_get_all_keywords.assert_not_called()
+        output = get_all_mocked_print_output(mocked_print=mock_print)
+        assert "     3  apple" in output
+        assert "     1  pear" in output
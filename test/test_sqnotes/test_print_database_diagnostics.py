@@ -0,0 +1,22 @@
+
+
+import pytest
+from unittest.mock import patch
+from sqnotes.sqnotes_module import SQNotes
+from sqnotes.database_service import DatabaseService
+from test.test_helper import get_all_mocked_print_output_to_string, just_return
+
+def describe_print_database_diagnostics():
+
+    @pytest.mark.usefixtures("mock_open_database", "mock_get_database_file_path")
+    @patch.object(DatabaseService, 'get_schema_version', just_return(3))
+    @patch.object(DatabaseService, 'get_connection_pragmas', just_return({'journal_mode' : 'wal', 'synchronous' : 'NORMAL'}))
+    def it_prints_the_effective_pragmas(
+                                            mock_print,
+                                            sqnotes_obj : SQNotes
+            ):
+        sqnotes_obj.print_database_diagnostics()
+        output = get_all_mocked_print_output_to_string(mock_print)
+        assert 'schema version: 3' in output
+        assert 'journal_mode: wal' in output
+        assert 'synchronous: NORMAL' in output
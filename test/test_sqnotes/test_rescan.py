@@ -14,13 +14,36 @@ def set_test_environment():
     os.environ['TESTING'] = 'true'
     
 
+@pytest.fixture
+def mock_note_files_manifest():
+    with patch.object(DatabaseService, 'get_note_files_manifest') as mock_get_manifest,\
+            patch.object(DatabaseService, 'upsert_note_file_manifest_entry'),\
+            patch.object(DatabaseService, 'get_all_notes') as mock_get_all_notes,\
+            patch.object(DatabaseService, 'get_keyword_ids') as mock_get_keyword_ids:
+        mock_get_manifest.return_value = {}
+        mock_get_keyword_ids.return_value = {}
+        mock_get_all_notes.return_value = []
+        yield mock_get_manifest
+
     
+def get_keywords_for_note(database_service, filename):
+    cursor = database_service._get_cursor()
+    cursor.execute('''
+        SELECT k.keyword FROM keywords k
+        JOIN note_keywords nk ON nk.keyword_id = k.id
+        JOIN notes n ON n.id = nk.note_id
+        WHERE n.filename = ?
+    ''', (filename,))
+    return {row[0] for row in cursor.fetchall()}
+
+
 def describe_rescan_notes():
     
     
     def describe_all_notes_found_in_database():
     
-        @pytest.mark.usefixtures("mock_commit_transaction",
+        @pytest.mark.usefixtures("mock_note_files_manifest",
+                                 "mock_commit_transaction",
                                  "mock_extract_and_save_keywords",
                                  "mock_open_database")
         @patch.object(SQNotes, 'get_notes_dir_from_config')
@@ -44,7 +67,8 @@ def describe_rescan_notes():
             assert call_args_list[1].kwargs == {'note_id': 2}
     
     
-        @pytest.mark.usefixtures("mock_commit_transaction",
+        @pytest.mark.usefixtures("mock_note_files_manifest",
+                                 "mock_commit_transaction",
                                  "mock_open_database",
                                  "mock_delete_keywords_from_database_for_note")
         @patch.object(SQNotes, 'get_notes_dir_from_config')
@@ -63,15 +87,16 @@ def describe_rescan_notes():
             sqnotes_obj.rescan_for_database()
             
             call_args_list = mock_extract_and_save_keywords.call_args_list
-            assert call_args_list[0].kwargs == {'note_id': 3, 'note_content' : 'content1'}
-            assert call_args_list[1].kwargs == {'note_id': 2, 'note_content' : 'content2'}
+            assert (call_args_list[0].kwargs['note_id'], call_args_list[0].kwargs['note_content']) == (3, 'content1')
+            assert (call_args_list[1].kwargs['note_id'], call_args_list[1].kwargs['note_content']) == (2, 'content2')
     
     
-        @pytest.mark.usefixtures("mock_open_database",
+        @pytest.mark.usefixtures("mock_note_files_manifest",
+                                 "mock_open_database",
                                  "mock_delete_keywords_from_database_for_note")
         @patch.object(SQNotes, 'get_notes_dir_from_config')
         @patch.object(SQNotes, '_get_all_note_paths')
-        def it_commits_the_transaction_for_each_note (
+        def it_commits_the_transaction_once_for_all_notes (
                                                             mock_get_all_note_paths,
                                                             mock_get_notes_dir,
                                                             mock_get_decrypted_content_in_memory,
@@ -87,13 +112,14 @@ def describe_rescan_notes():
             mock_insert_new_note_into_database.side_effect = []
             sqnotes_obj.rescan_for_database()
             num_commit_transaction_calls = len(mock_commit_transaction.call_args_list)
-            assert num_commit_transaction_calls == 3
+            assert num_commit_transaction_calls == 1
     
     
     def describe_some_notes_not_found_in_database():
         """some notes from the notes directory not found in database"""
         
-        @pytest.mark.usefixtures("mock_commit_transaction",
+        @pytest.mark.usefixtures("mock_note_files_manifest",
+                                 "mock_commit_transaction",
                                  "mock_extract_and_save_keywords",
                                  "mock_open_database")
         @patch.object(DatabaseService, 'insert_new_note_into_database')
@@ -120,7 +146,8 @@ def describe_rescan_notes():
             assert call_args_list[1].kwargs == {'note_id': 2}
     
     
-        @pytest.mark.usefixtures("mock_commit_transaction",
+        @pytest.mark.usefixtures("mock_note_files_manifest",
+                                 "mock_commit_transaction",
                                  "mock_extract_and_save_keywords",
                                  "mock_open_database")
         @patch.object(DatabaseService, 'insert_new_note_into_database')
@@ -148,7 +175,8 @@ def describe_rescan_notes():
             assert second_call_kwargs['note_filename_base'] == 'file3'
             
 
-        @pytest.mark.usefixtures("mock_commit_transaction",
+        @pytest.mark.usefixtures("mock_note_files_manifest",
+                                 "mock_commit_transaction",
                                  "mock_open_database",
                                  "mock_delete_keywords_from_database_for_note")
         @patch.object(SQNotes, 'get_notes_dir_from_config')
@@ -168,16 +196,17 @@ def describe_rescan_notes():
             mock_insert_new_note_into_database.side_effect = [5]
             sqnotes_obj.rescan_for_database()
             call_args_list = mock_extract_and_save_keywords.call_args_list
-            assert call_args_list[0].kwargs == {'note_id': 3, 'note_content' : 'content1'}
-            assert call_args_list[1].kwargs == {'note_id': 5, 'note_content' : 'content2'}
-            assert call_args_list[2].kwargs == {'note_id': 1, 'note_content' : 'content3'}
+            assert (call_args_list[0].kwargs['note_id'], call_args_list[0].kwargs['note_content']) == (3, 'content1')
+            assert (call_args_list[1].kwargs['note_id'], call_args_list[1].kwargs['note_content']) == (5, 'content2')
+            assert (call_args_list[2].kwargs['note_id'], call_args_list[2].kwargs['note_content']) == (1, 'content3')
         
         
-        @pytest.mark.usefixtures("mock_open_database",
+        @pytest.mark.usefixtures("mock_note_files_manifest",
+                                 "mock_open_database",
                                  "mock_delete_keywords_from_database_for_note")
         @patch.object(SQNotes, 'get_notes_dir_from_config')
         @patch.object(SQNotes, '_get_all_note_paths')
-        def it_commits_the_transaction_for_each_note (
+        def it_commits_the_transaction_once_for_all_notes (
                                                             mock_get_all_note_paths,
                                                             mock_get_notes_dir,
                                                             mock_get_decrypted_content_in_memory,
@@ -193,8 +222,85 @@ def describe_rescan_notes():
             mock_insert_new_note_into_database.side_effect = [5]
             sqnotes_obj.rescan_for_database()
             num_commit_transaction_calls = len(mock_commit_transaction.call_args_list)
-            assert num_commit_transaction_calls == 3
+            assert num_commit_transaction_calls == 1
+        
+        
+        
+        
+
+    def describe_incremental_rescan():
+        
+        @pytest.fixture
+        def sqnotes_with_database(sqnotes_obj, database_service_open_in_memory, mock_get_notes_dir_from_config):
+            with patch.object(SQNotes, 'open_database'):
+                yield sqnotes_obj
+        
+        @pytest.fixture
+        def mock_decrypt_from_plaintext():
+            
+            def handler(note_path):
+                with open(note_path, 'r') as file:
+                    return file.read()
+            
+            with patch.object(EncryptedNoteHelper, 'get_decrypted_content_in_memory', side_effect=handler) as mock:
+                yield mock
+        
+        @pytest.mark.usefixtures("mock_print")
+        def it_does_not_decrypt_unchanged_notes(sqnotes_with_database, 
+                                                mock_decrypt_from_plaintext,
+                                                test_temp_notes_dir):
+            (test_temp_notes_dir / 'note1.txt.gpg').write_text('#apple')
+            (test_temp_notes_dir / 'note2.txt.gpg').write_text('#pear')
+            sqnotes_with_database.rescan_for_database()
+            assert mock_decrypt_from_plaintext.call_count == 2
+            
+            sqnotes_with_database.rescan_for_database()
+            assert mock_decrypt_from_plaintext.call_count == 2
+        
+        @pytest.mark.usefixtures("mock_print")
+        def it_decrypts_modified_notes(sqnotes_with_database,
+                                       mock_decrypt_from_plaintext,
+                                       database_service,
+                                       test_temp_notes_dir):
+            note_path = test_temp_notes_dir / 'note1.txt.gpg'
+            note_path.write_text('#apple')
+            sqnotes_with_database.rescan_for_database()
+            note_path.write_text('#banana #kiwi')
+            sqnotes_with_database.rescan_for_database()
+            assert mock_decrypt_from_plaintext.call_count == 2
+            assert get_keywords_for_note(database_service, 'note1.txt.gpg') == {'banana', 'kiwi'}
         
+        @pytest.mark.usefixtures("mock_print")
+        def it_skips_notes_that_were_only_touched(sqnotes_with_database,
+                                                  mock_decrypt_from_plaintext,
+                                                  test_temp_notes_dir):
+            note_path = test_temp_notes_dir / 'note1.txt.gpg'
+            note_path.write_text('#apple')
+            sqnotes_with_database.rescan_for_database()
+            stat = os.stat(note_path)
+            os.utime(note_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+            sqnotes_with_database.rescan_for_database()
+            assert mock_decrypt_from_plaintext.call_count == 1
         
+        @pytest.mark.usefixtures("mock_print")
+        def it_removes_deleted_notes_from_database(sqnotes_with_database,
+                                                   mock_decrypt_from_plaintext,
+                                                   database_service,
+                                                   test_temp_notes_dir):
+            note_path = test_temp_notes_dir / 'note1.txt.gpg'
+            note_path.write_text('#apple')
+            sqnotes_with_database.rescan_for_database()
+            os.remove(note_path)
+            sqnotes_with_database.rescan_for_database()
+            assert database_service.get_all_notes() == []
+            assert get_keywords_for_note(database_service, 'note1.txt.gpg') == set()
+            assert database_service.get_note_files_manifest() == {}
         
-        
\ No newline at end of file
+        @pytest.mark.usefixtures("mock_print")
+        def it_decrypts_every_note_on_full_rescan(sqnotes_with_database,
+                                                  mock_decrypt_from_plaintext,
+                                                  test_temp_notes_dir):
+            (test_temp_notes_dir / 'note1.txt.gpg').write_text('#apple')
+            sqnotes_with_database.rescan_for_database()
+            sqnotes_with_database.rescan_for_database(is_full_rescan=True)
+            assert mock_decrypt_from_plaintext.call_count == 2
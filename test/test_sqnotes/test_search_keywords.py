@@ -4,11 +4,13 @@ from unittest.mock import patch, mock_open, MagicMock, call, Mock
 import os
 import pytest
 from sqnotes.sqnotes_module import SQNotes, GPGSubprocessException
-from test.test_helper import get_all_mocked_print_output
+from test.test_helper import get_all_mocked_print_output, as_generator
 from sqnotes.encrypted_note_helper import EncryptedNoteHelper
 import logging
 from test.test_sqnotes_initializer import get_test_sqnotes
 from sqnotes.database_service import DatabaseService
+from sqnotes.keyword_query import KeywordQueryException
+from sqnotes import interface_copy
 
 
 logger = logging.getLogger(__name__)
@@ -31,7 +33,74 @@ def describe_search_keywords():
                                                             ):
         test_keywords = ['apple', 'pear']
         sqnotes_obj.search_keywords(keywords=test_keywords)
-        mock_query_notes_by_keywords.assert_called_once_with(keywords = test_keywords)
+        mock_query_notes_by_keywords.assert_called_once_with(keywords = test_keywords, limit=None, offset=0)
+
+    @pytest.mark.usefixtures("mock_get_notes_dir_from_config",
+                             "mock_open_database")
+    @patch.object(DatabaseService, 'query_notes_by_keywords')
+    def it_passes_the_limit_and_offset_to_the_database_service(
+                                                            mock_query_notes_by_keywords,
+                                                            sqnotes_obj : SQNotes
+                                                            ):
+        sqnotes_obj.search_keywords(keywords=['apple'], limit=10, offset=20)
+        assert mock_query_notes_by_keywords.call_args_list[0] == call(keywords=['apple'], limit=10, offset=20)
+
+    @pytest.mark.usefixtures("mock_get_notes_dir_from_config",
+                             "mock_open_database")
+    @patch.object(DatabaseService, 'query_notes_by_keywords')
+    def it_reports_an_empty_window_when_notes_match(
+                                                            mock_query_notes_by_keywords,
+                                                            sqnotes_obj : SQNotes,
+                                                            mock_print
+                                                            ):
+        mock_query_notes_by_keywords.side_effect = lambda keywords, limit=None, offset=0: as_generator(
+            [('note1.txt',)][offset:None if limit is None else offset + limit]
+        )
+        sqnotes_obj.search_keywords(keywords=['apple'], offset=1, is_names_only=True)
+        output = get_all_mocked_print_output(mocked_print=mock_print)
+        assert interface_copy.NO_RESULTS_IN_WINDOW() in output
+        assert "No notes found" not in output
+
+    @pytest.mark.usefixtures("mock_get_notes_dir_from_config",
+                             "mock_open_database")
+    @patch.object(DatabaseService, 'query_notes_by_keywords', lambda self, **kwargs: as_generator([]))
+    def it_reports_no_notes_found_when_no_note_matches(
+                                                            sqnotes_obj : SQNotes,
+                                                            mock_print
+                                                            ):
+        sqnotes_obj.search_keywords(keywords=['apple'], limit=0)
+        output = get_all_mocked_print_output(mocked_print=mock_print)
+        assert "No notes found with keywords: ['apple']" in output
+
+    @pytest.mark.usefixtures("mock_get_notes_dir_from_config",
+                             "mock_open_database")
+    @patch.object(DatabaseService, 'query_notes_by_keywords', lambda self, **kwargs: as_generator([('note1.txt',), ('note2.txt',)]))
+    @patch.object(EncryptedNoteHelper, 'decryption_session')
+    @patch.object(SQNotes, '_get_decrypted_notes')
+    def it_prints_only_note_names_without_decrypting(
+                                                            mock_get_decrypted_notes,
+                                                            mock_decryption_session,
+                                                            sqnotes_obj : SQNotes,
+                                                            mock_print
+                                                            ):
+        sqnotes_obj.search_keywords(keywords=['apple'], is_names_only=True)
+        assert [call.args[0] for call in mock_print.call_args_list] == ['note1.txt', 'note2.txt']
+        mock_get_decrypted_notes.assert_not_called()
+        mock_decryption_session.assert_not_called()
+
+    @pytest.mark.usefixtures("mock_get_notes_dir_from_config",
+                             "mock_open_database")
+    @patch.object(DatabaseService, 'query_notes_by_keywords')
+    def it_exits_with_a_message_for_an_invalid_keyword_query(
+                                                            mock_query_notes_by_keywords,
+                                                            sqnotes_obj : SQNotes,
+                                                            mock_print
+                                                            ):
+        mock_query_notes_by_keywords.side_effect = KeywordQueryException("missing ')' in keyword query")
+        with pytest.raises(SystemExit):
+            sqnotes_obj.search_keywords(keywords=['(apple'])
+        output = get_all_mocked_print_output(mocked_print=mock_print)
+        assert "Invalid keyword query: missing ')'" in output
         
         
     
@@ -1,6 +1,11 @@
 import pytest
+from unittest.mock import patch
 from sqnotes.sqnotes_module import SQNotes, GPGSubprocessException
+from sqnotes.encrypted_note_helper import EncryptedNoteHelper
+from sqnotes.database_service import DatabaseService
 from test.test_helper import (
+    as_chunks,
+    as_generator,
     get_all_mocked_print_output,
     get_all_mocked_print_output_to_string,
 )
@@ -15,13 +20,13 @@ def describe_search_notes():
             "mock_get_notes_dir_from_config", "mock_get_all_note_paths"
         )
         def it_prints_notes_that_match_search_term(
-            mock_print, mock_get_decrypted_content_in_memory, sqnotes_obj: SQNotes
+            mock_print, mock_get_decrypted_content_chunks, sqnotes_obj: SQNotes
         ):
             search_queries = ["apple"]
-            mock_get_decrypted_content_in_memory.side_effect = [
-                "a note with apple in it",
-                "a second note with apple in it",
-                "a note without the search term",
+            mock_get_decrypted_content_chunks.side_effect = [
+                as_chunks("a note with apple in it"),
+                as_chunks("a second note with apple in it"),
+                as_chunks("a note without the search term"),
             ]
             sqnotes_obj.search_notes(search_queries=search_queries)
             mock_print.assert_called()
@@ -36,16 +41,16 @@ def describe_search_notes():
             "mock_get_notes_dir_from_config", "mock_get_all_note_paths"
         )
         def it_prints_notes_that_match_search_terms(
-            mock_print, mock_get_decrypted_content_in_memory, sqnotes_obj: SQNotes
+            mock_print, mock_get_decrypted_content_chunks, sqnotes_obj: SQNotes
         ):
             search_queries = ["apple", "pear"]
             first_note = "a note with apple in it"
             second_note = "a second note with apple and pear in it"
             third_note = "a note without the search term"
-            mock_get_decrypted_content_in_memory.side_effect = [
-                first_note,
-                second_note,
-                third_note,
+            mock_get_decrypted_content_chunks.side_effect = [
+                as_chunks(first_note),
+                as_chunks(second_note),
+                as_chunks(third_note),
             ]
             sqnotes_obj.search_notes(search_queries=search_queries)
             mock_print.assert_called()
@@ -60,10 +65,10 @@ def describe_search_notes():
             "mock_get_notes_dir_from_config", "mock_get_all_note_paths", "mock_print"
         )
         def it_exits_with_GPG_Error(
-            mock_get_decrypted_content_in_memory, sqnotes_obj: SQNotes
+            mock_get_decrypted_content_chunks, sqnotes_obj: SQNotes
         ):
             search_queries = ["apple", "pear"]
-            mock_get_decrypted_content_in_memory.side_effect = GPGSubprocessException()
+            mock_get_decrypted_content_chunks.side_effect = GPGSubprocessException()
             with pytest.raises(SystemExit) as excinfo:
                 sqnotes_obj.search_notes(search_queries=search_queries)
             assert excinfo.value.code == sqnotes_obj.GPG_ERROR
@@ -72,10 +77,10 @@ def describe_search_notes():
             "mock_get_notes_dir_from_config", "mock_get_all_note_paths"
         )
         def it_prints_error_message(
-            mock_get_decrypted_content_in_memory, sqnotes_obj, mock_print_to_so
+            mock_get_decrypted_content_chunks, sqnotes_obj, mock_print_to_so
         ):
             search_queries = ["apple", "pear"]
-            mock_get_decrypted_content_in_memory.side_effect = GPGSubprocessException()
+            mock_get_decrypted_content_chunks.side_effect = GPGSubprocessException()
             with pytest.raises(SystemExit):
                 sqnotes_obj.search_notes(search_queries=search_queries)
             output = get_all_mocked_print_output_to_string(
@@ -87,3 +92,260 @@ def describe_search_notes():
                 + interface_copy.EXITING()
             )
             assert expected_message in output
+
+    def describe_decryption_workers():
+
+        @pytest.mark.usefixtures(
+            "mock_get_notes_dir_from_config", "mock_get_all_note_paths", "mock_print"
+        )
+        def it_uses_configured_number_of_workers(
+            mock_get_decrypted_content_chunks, sqnotes_obj: SQNotes, user_config_data
+        ):
+            user_config_data["settings"]["decryption_workers"] = "2"
+            with patch.object(
+                EncryptedNoteHelper,
+                "match_notes",
+                return_value=as_generator([]),
+            ) as mock_get_contents:
+                sqnotes_obj.search_notes(search_queries=["apple"])
+            assert mock_get_contents.call_args.kwargs["max_workers"] == 2
+
+        @pytest.mark.usefixtures(
+            "mock_get_notes_dir_from_config", "mock_get_all_note_paths"
+        )
+        def it_prints_matching_notes_in_note_order(
+            mock_print, mock_get_decrypted_content_chunks, sqnotes_obj: SQNotes
+        ):
+            mock_get_decrypted_content_chunks.side_effect = lambda note_path: as_chunks(f"apple in {note_path}")
+            sqnotes_obj.search_notes(search_queries=["apple"])
+            output = get_all_mocked_print_output(mocked_print=mock_print)
+            assert output.index("apple in note1.txt") < output.index("apple in note2.txt") < output.index("apple in note3.txt")
+
+    def describe_given_a_note_too_large_to_buffer():
+
+        @pytest.mark.usefixtures(
+            "mock_get_notes_dir_from_config", "mock_get_all_note_paths"
+        )
+        def it_decrypts_the_note_again_to_print_it(
+            mock_print, mock_get_decrypted_content_chunks, sqnotes_obj: SQNotes
+        ):
+            mock_get_decrypted_content_chunks.side_effect = lambda note_path: as_chunks(f"apple in {note_path}")
+            with patch.object(
+                EncryptedNoteHelper,
+                "match_note",
+                side_effect=lambda note_path, search_queries: (note_path == "note2.txt", None),
+            ):
+                sqnotes_obj.search_notes(search_queries=["apple"])
+            output = "".join(args[0] for args, _ in mock_print.call_args_list if args)
+            assert "apple in note2.txt" in output
+            assert "note1.txt" not in output
+
+    def describe_given_a_limit_and_offset():
+
+        @pytest.mark.usefixtures(
+            "mock_get_notes_dir_from_config", "mock_get_all_note_paths"
+        )
+        def it_prints_only_the_matches_inside_the_window(
+            mock_print, mock_get_decrypted_content_chunks, sqnotes_obj: SQNotes
+        ):
+            mock_get_decrypted_content_chunks.side_effect = lambda note_path: as_chunks(f"apple in {note_path}")
+            sqnotes_obj.search_notes(search_queries=["apple"], limit=1, offset=1)
+            output = get_all_mocked_print_output(mocked_print=mock_print)
+            assert "apple in note2.txt" in output
+            assert "apple in note1.txt" not in output
+            assert "apple in note3.txt" not in output
+
+        @pytest.mark.usefixtures(
+            "mock_get_notes_dir_from_config", "mock_get_all_note_paths", "mock_print"
+        )
+        def it_stops_reading_matches_once_the_limit_is_reached(sqnotes_obj: SQNotes):
+            read_notes = []
+
+            def match_notes(self, note_paths, **kwargs):
+                for note_path in note_paths:
+                    read_notes.append(note_path)
+                    yield note_path, (True, f"apple in {note_path}")
+
+            with patch.object(EncryptedNoteHelper, "match_notes", match_notes):
+                sqnotes_obj.search_notes(search_queries=["apple"], limit=1)
+            assert read_notes == ["note1.txt"]
+
+        @pytest.mark.usefixtures(
+            "mock_get_notes_dir_from_config", "mock_get_all_note_paths"
+        )
+        @pytest.mark.parametrize("limit, offset", [(0, 0), (None, 3)])
+        def it_reports_an_empty_window_when_notes_match(
+            limit, offset, mock_print, mock_get_decrypted_content_chunks, sqnotes_obj: SQNotes
+        ):
+            mock_get_decrypted_content_chunks.side_effect = lambda note_path: as_chunks(f"apple in {note_path}")
+            sqnotes_obj.search_notes(search_queries=["apple"], limit=limit, offset=offset)
+            output = get_all_mocked_print_output(mocked_print=mock_print)
+            assert interface_copy.NO_RESULTS_IN_WINDOW() in output
+            assert "apple in" not in output
+
+    def describe_names_only():
+
+        @pytest.mark.usefixtures(
+            "mock_get_notes_dir_from_config", "mock_get_all_note_paths"
+        )
+        def it_prints_the_names_of_matching_notes(
+            mock_print, mock_get_decrypted_content_chunks, sqnotes_obj: SQNotes
+        ):
+            mock_get_decrypted_content_chunks.side_effect = lambda note_path: as_chunks(
+                "apple" if note_path != "note2.txt" else "pear"
+            )
+            sqnotes_obj.search_notes(search_queries=["apple"], is_names_only=True)
+            assert [args[0] for args, _ in mock_print.call_args_list] == ["note1.txt", "note3.txt"]
+
+    def describe_search_mode_index():
+
+        @pytest.fixture
+        def sqnotes_with_index(sqnotes_obj: SQNotes, user_config_data, tmp_path):
+            user_config_data["settings"]["search_mode"] = "index"
+            with patch.object(
+                SQNotes,
+                "_get_full_text_index_path",
+                return_value=str(tmp_path / "index.gpg"),
+            ):
+                with patch.object(EncryptedNoteHelper, "write_encrypted_note"):
+                    yield sqnotes_obj
+
+        @pytest.mark.usefixtures("mock_get_notes_dir_from_config", "mock_print")
+        def it_only_decrypts_indexed_notes_that_may_match(
+            mock_get_decrypted_content_in_memory, sqnotes_with_index: SQNotes
+        ):
+            sqnotes_with_index.open_full_text_index()
+            sqnotes_with_index.full_text_index.update_note(filename="note1.txt", content="apple")
+            sqnotes_with_index.full_text_index.update_note(filename="note2.txt", content="pear")
+            with patch.object(
+                SQNotes, "_get_all_note_paths", return_value=["note1.txt", "note2.txt"]
+            ):
+                sqnotes_with_index.search_notes(search_queries=["apple"])
+            decrypted_paths = [
+                call.kwargs["note_path"]
+                for call in mock_get_decrypted_content_in_memory.call_args_list
+            ]
+            assert decrypted_paths == ["note1.txt"]
+
+        @pytest.mark.usefixtures("mock_get_notes_dir_from_config", "mock_print")
+        def it_indexes_notes_missing_from_the_index(
+            mock_get_decrypted_content_in_memory, sqnotes_with_index: SQNotes
+        ):
+            mock_get_decrypted_content_in_memory.side_effect = ["a note about pears"]
+            with patch.object(
+                SQNotes, "_get_all_note_paths", return_value=["note3.txt"]
+            ):
+                sqnotes_with_index.search_notes(search_queries=["apple"])
+            assert sqnotes_with_index.full_text_index.find_candidate_notes(
+                search_queries=["pears"]
+            ) == {"note3.txt"}
+
+        @pytest.mark.usefixtures("mock_print")
+        def it_searches_and_reindexes_notes_changed_since_they_were_indexed(
+            mock_get_decrypted_content_in_memory, sqnotes_with_index: SQNotes, tmp_path
+        ):
+            note_path = tmp_path / "note1.txt"
+            note_path.write_text("an old note")
+            sqnotes_with_index.open_full_text_index()
+            sqnotes_with_index.full_text_index.update_note(
+                filename="note1.txt",
+                content="an old note",
+                stamp=sqnotes_with_index._get_note_file_stamp(note_path=str(note_path)),
+            )
+            # changed outside SQNotes, so the stamp no longer matches
+            note_path.write_text("a new note about apples")
+            mock_get_decrypted_content_in_memory.side_effect = ["a new note about apples"]
+            with patch.object(
+                SQNotes, "_get_all_note_paths", return_value=[str(note_path)]
+            ):
+                sqnotes_with_index.search_notes(search_queries=["apple"])
+            assert mock_get_decrypted_content_in_memory.call_count == 1
+            assert sqnotes_with_index.full_text_index.find_candidate_notes(
+                search_queries=["apples"]
+            ) == {"note1.txt"}
+            assert sqnotes_with_index.full_text_index.get_note_stamp(
+                filename="note1.txt"
+            ) == sqnotes_with_index._get_note_file_stamp(note_path=str(note_path))
+
+        @pytest.mark.usefixtures("mock_open_database")
+        def it_deletes_the_index_and_asks_for_a_rescan_when_chosen(
+            sqnotes_with_index: SQNotes, mock_print_to_so, tmp_path
+        ):
+            index_path = tmp_path / "index.gpg"
+            index_path.write_text("a stale index")
+            with patch.object(DatabaseService, "clear_note_text"), patch.object(
+                DatabaseService, "clear_note_files_manifest"
+            ), patch.object(DatabaseService, "commit_transaction"):
+                sqnotes_with_index.set_search_mode("index")
+            assert not index_path.exists()
+            output = get_all_mocked_print_output_to_string(mocked_print=mock_print_to_so)
+            assert interface_copy.RESCAN_TO_BUILD_SEARCH_INDEX() in output
+
+    def describe_search_mode_fts():
+
+        @pytest.fixture
+        def sqnotes_with_fts(
+            sqnotes_obj: SQNotes, user_config_data, database_service_open_in_memory
+        ):
+            user_config_data["settings"]["search_mode"] = "fts"
+            with patch.object(SQNotes, "open_database"):
+                yield sqnotes_obj
+
+        @pytest.mark.usefixtures("mock_print")
+        def it_only_decrypts_notes_returned_by_the_database(
+            mock_get_decrypted_content_chunks,
+            sqnotes_with_fts: SQNotes,
+            mock_get_notes_dir_from_config,
+            test_temp_notes_dir,
+        ):
+            for filename, content in [("note1.txt", "apple"), ("note2.txt", "pear")]:
+                (test_temp_notes_dir / filename).touch()
+                note_id = sqnotes_with_fts.database_service.insert_new_note_into_database(
+                    note_filename_base=filename
+                )
+                sqnotes_with_fts._save_note_text(note_id=note_id, note_content=content)
+            sqnotes_with_fts.search_notes(search_queries=["apple"])
+            decrypted_paths = [
+                call.kwargs["note_path"]
+                for call in mock_get_decrypted_content_chunks.call_args_list
+            ]
+            assert decrypted_paths == [str(test_temp_notes_dir / "note1.txt")]
+
+        @pytest.mark.usefixtures("mock_print")
+        def it_also_searches_notes_missing_from_the_database(
+            mock_get_decrypted_content_chunks,
+            sqnotes_with_fts: SQNotes,
+            mock_get_notes_dir_from_config,
+            test_temp_notes_dir,
+        ):
+            (test_temp_notes_dir / "note1.txt").touch()
+            note_id = sqnotes_with_fts.database_service.insert_new_note_into_database(
+                note_filename_base="note1.txt"
+            )
+            sqnotes_with_fts._save_note_text(note_id=note_id, note_content="pear")
+            # added outside SQNotes
+            (test_temp_notes_dir / "note2.txt").touch()
+            mock_get_decrypted_content_chunks.side_effect = lambda note_path: as_chunks("an apple")
+            sqnotes_with_fts.search_notes(search_queries=["apple"], is_names_only=True)
+            decrypted_paths = [
+                call.kwargs["note_path"]
+                for call in mock_get_decrypted_content_chunks.call_args_list
+            ]
+            assert decrypted_paths == [str(test_temp_notes_dir / "note2.txt")]
+
+        def it_builds_a_prefix_phrase_for_each_query(sqnotes_with_fts: SQNotes):
+            match_expression = sqnotes_with_fts._get_full_text_match_expression(
+                search_queries=["Apple pie", "pear"]
+            )
+            assert match_expression == '"apple pie"* AND "pear"*'
+
+        def it_does_not_store_plaintext_in_hashed_mode(
+            sqnotes_with_fts: SQNotes, user_config_data
+        ):
+            user_config_data["settings"]["search_mode"] = "fts-hashed"
+            note_text = sqnotes_with_fts._get_note_text_for_database(
+                note_content="secret apple"
+            )
+            assert "secret" not in note_text
+            assert "apple" not in note_text
+            assert note_text.split(" ") == sqnotes_with_fts._get_hashed_terms("SECRET apple")
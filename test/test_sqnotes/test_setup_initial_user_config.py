@@ -1,8 +1,10 @@
 
+import os
 import pytest
 from unittest.mock import patch
 from sqnotes.sqnotes_module import SQNotes
 from sqnotes.user_configuration_helper import UserConfigurationHelper
+from sqnotes.command_validator import PROBE_CACHE_FILENAME
 from test.test_helper import just_return
 
 
@@ -26,6 +28,17 @@ def describe_sqnotes():
             mock_get_user_config_dir.return_value = test_config_dir
             sqnotes_obj._setup_user_configuration()
             mock_set_config_dir.assert_called_once_with(config_dir = test_config_dir)
+
+        @patch.object(SQNotes, '_get_user_config_dir', lambda self: '/some/path')
+        @patch.object(UserConfigurationHelper, '_set_config_dir')
+        @patch.object(UserConfigurationHelper, 'open_or_create_and_open_user_config_file')
+        def it_keeps_the_command_probe_cache_in_the_user_config_dir(
+                                                                        mock_open_or_create_and_open_user_config,
+                                                                        mock_set_config_dir,
+                                                                        sqnotes_obj : SQNotes
+                                                                    ):
+            sqnotes_obj._setup_user_configuration()
+            assert sqnotes_obj.probe_cache_file == os.path.join('/some/path', PROBE_CACHE_FILENAME)
          
         
         @patch.object(SQNotes, '_get_initial_user_settings_from_config')
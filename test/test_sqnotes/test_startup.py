@@ -21,4 +21,26 @@ def describe_sqnotes_startup():
 
 
 
-    
\ No newline at end of file
+    
+
+def describe_reset_between_commands():
+
+    @patch.object(SQNotes, '_get_user_config_stamp', lambda self: (1, 10))
+    def it_does_not_reload_an_unchanged_configuration(sqnotes_obj):
+        sqnotes_obj.user_config_stamp = (1, 10)
+        with patch.object(SQNotes, 'startup') as mock_startup:
+            sqnotes_obj.reset_between_commands()
+        mock_startup.assert_not_called()
+
+    @patch.object(SQNotes, '_get_user_config_stamp', lambda self: (2, 12))
+    def it_reloads_a_changed_configuration(sqnotes_obj):
+        sqnotes_obj.user_config_stamp = (1, 10)
+        with patch.object(SQNotes, 'startup') as mock_startup:
+            sqnotes_obj.reset_between_commands()
+        mock_startup.assert_called_once()
+
+    @patch.object(SQNotes, '_get_user_config_stamp', lambda self: None)
+    def it_closes_the_full_text_index(sqnotes_obj):
+        sqnotes_obj.full_text_index.open(index_path="index.gpg")
+        sqnotes_obj.reset_between_commands()
+        assert not sqnotes_obj.full_text_index.is_open()
@@ -0,0 +1,48 @@
+from unittest.mock import patch
+
+import pytest
+from sqnotes.sqnotes_module import SQNotes
+from sqnotes.user_configuration_helper import UserConfigurationHelper
+from sqnotes.config_keys import GPG_KEY_EMAIL_KEY
+
+
+@pytest.fixture
+def sqnotes_started(sqnotes_obj : SQNotes):
+    with patch.object(SQNotes, '_setup_user_configuration'):
+        sqnotes_obj.startup()
+    yield sqnotes_obj
+
+
+def describe_user_settings_snapshot():
+
+    def it_reads_settings_once_for_repeated_lookups(sqnotes_started : SQNotes):
+        with patch.object(UserConfigurationHelper, 'get_setting_from_user_config') as mock_get_setting:
+            for _ in range(3):
+                sqnotes_started.get_notes_dir_from_config()
+                sqnotes_started._is_use_ascii_armor()
+                sqnotes_started.get_gpg_key_email()
+            mock_get_setting.assert_not_called()
+
+    def it_returns_values_from_the_user_config(sqnotes_started : SQNotes, user_config_data):
+        assert sqnotes_started.get_notes_dir_from_config() == user_config_data['settings']['notes_path']
+
+    def it_rereads_settings_after_a_write(sqnotes_started : SQNotes):
+        sqnotes_started.get_gpg_key_email()
+        with patch.object(UserConfigurationHelper, 'get_setting_from_user_config') as mock_get_setting:
+            mock_get_setting.return_value = 'new@example.com'
+            sqnotes_started.user_configuration_helper.revision += 1
+            assert sqnotes_started.get_gpg_key_email() == 'new@example.com'
+            assert sqnotes_started.get_gpg_key_email() == 'new@example.com'
+            calls_for_gpg_key = [call for call in mock_get_setting.call_args_list
+                                 if call.kwargs.get('key') == GPG_KEY_EMAIL_KEY]
+            assert len(calls_for_gpg_key) == 1
+
+    def it_is_immutable(sqnotes_started : SQNotes):
+        with pytest.raises(AttributeError):
+            sqnotes_started.settings.notes_path = 'elsewhere'
+
+    def it_reads_the_user_config_before_startup(sqnotes_obj : SQNotes, user_config_data):
+        assert sqnotes_obj.settings is None
+        user_config_data['settings']['armor'] = 'yes'
+        assert sqnotes_obj.get_notes_dir_from_config() == user_config_data['settings']['notes_path']
+        assert sqnotes_obj._is_use_ascii_armor() is True
@@ -0,0 +1,126 @@
+import os
+import pytest
+from unittest.mock import patch
+from sqnotes.sqnotes_module import SQNotes, GPGSubprocessException
+from sqnotes.encrypted_note_helper import EncryptedNoteHelper
+from sqnotes.database_service import DatabaseService
+from sqnotes.note_watcher import NoteDirectoryWatcher, NoteFileChanges
+from sqnotes import interface_copy
+from test.test_helper import get_all_mocked_print_output_to_string
+from test.test_sqnotes.test_rescan import get_keywords_for_note
+
+
+@pytest.fixture
+def sqnotes_with_database(sqnotes_obj, database_service_open_in_memory, mock_get_notes_dir_from_config):
+    with patch.object(SQNotes, 'open_database'):
+        yield sqnotes_obj
+
+
+@pytest.fixture
+def mock_decrypt_from_plaintext():
+
+    def handler(note_path):
+        with open(note_path, 'r') as file:
+            return file.read()
+
+    with patch.object(EncryptedNoteHelper, 'get_decrypted_content_in_memory', side_effect=handler) as mock:
+        yield mock
+
+
+def describe_watch_notes():
+
+    def describe_reindex_note_files():
+
+        def it_indexes_only_the_changed_notes(sqnotes_with_database,
+                                              mock_decrypt_from_plaintext,
+                                              database_service,
+                                              test_temp_notes_dir):
+            (test_temp_notes_dir / 'note1.txt.gpg').write_text('#apple')
+            (test_temp_notes_dir / 'note2.txt.gpg').write_text('#pear')
+            sqnotes_with_database._reindex_note_files(changed_filenames=['note2.txt.gpg'], removed_filenames=[])
+            assert mock_decrypt_from_plaintext.call_count == 1
+            assert get_keywords_for_note(database_service, 'note2.txt.gpg') == {'pear'}
+            assert get_keywords_for_note(database_service, 'note1.txt.gpg') == set()
+
+        def it_removes_deleted_notes(sqnotes_with_database,
+                                     mock_decrypt_from_plaintext,
+                                     database_service,
+                                     test_temp_notes_dir):
+            note_path = test_temp_notes_dir / 'note1.txt.gpg'
+            note_path.write_text('#apple')
+            sqnotes_with_database._reindex_note_files(changed_filenames=['note1.txt.gpg'], removed_filenames=[])
+            os.remove(note_path)
+            sqnotes_with_database._reindex_note_files(changed_filenames=[], removed_filenames=['note1.txt.gpg'])
+            assert database_service.get_all_notes() == []
+            assert database_service.get_keyword_counts() == []
+
+        def it_does_not_decrypt_a_note_that_was_only_touched(sqnotes_with_database,
+                                                             mock_decrypt_from_plaintext,
+                                                             test_temp_notes_dir):
+            note_path = test_temp_notes_dir / 'note1.txt.gpg'
+            note_path.write_text('#apple')
+            sqnotes_with_database._reindex_note_files(changed_filenames=['note1.txt.gpg'], removed_filenames=[])
+            note_stat = os.stat(note_path)
+            os.utime(note_path, ns=(note_stat.st_atime_ns, note_stat.st_mtime_ns + 10**9))
+            sqnotes_with_database._reindex_note_files(changed_filenames=['note1.txt.gpg'], removed_filenames=[])
+            assert mock_decrypt_from_plaintext.call_count == 1
+
+        @pytest.mark.usefixtures("mock_decrypt_from_plaintext")
+        def it_commits_the_batch_once(sqnotes_with_database, test_temp_notes_dir):
+            for filename in ['note1.txt.gpg', 'note2.txt.gpg', 'note3.txt.gpg']:
+                (test_temp_notes_dir / filename).write_text('#apple')
+            with patch.object(DatabaseService, 'commit_transaction') as mock_commit_transaction:
+                sqnotes_with_database._reindex_note_files(
+                    changed_filenames=['note1.txt.gpg', 'note2.txt.gpg', 'note3.txt.gpg'], removed_filenames=[]
+                )
+            mock_commit_transaction.assert_called_once()
+
+    def describe_index_note_file_changes():
+
+        @pytest.mark.usefixtures("mock_print")
+        def it_rolls_back_the_batch_if_a_note_cannot_be_decrypted(sqnotes_with_database,
+                                                                   database_service,
+                                                                   mock_print_to_so,
+                                                                   test_temp_notes_dir):
+            for filename in ['note1.txt.gpg', 'note2.txt.gpg']:
+                (test_temp_notes_dir / filename).write_text('#apple')
+            with patch.object(EncryptedNoteHelper, 'get_decrypted_content_in_memory',
+                              side_effect=['#apple', GPGSubprocessException()]):
+                sqnotes_with_database._index_note_file_changes(
+                    changes=NoteFileChanges(added=['note1.txt.gpg', 'note2.txt.gpg'])
+                )
+            assert database_service.get_all_notes() == []
+            output = get_all_mocked_print_output_to_string(mocked_print=mock_print_to_so)
+            assert interface_copy.NOTE_CHANGES_NOT_INDEXED() in output
+
+        @pytest.mark.usefixtures("mock_print", "mock_print_to_so")
+        def it_discards_the_full_text_index_changes_of_a_failed_batch(sqnotes_with_database,
+                                                                       user_config_data,
+                                                                       test_temp_notes_dir,
+                                                                       tmp_path):
+            user_config_data["settings"]["search_mode"] = "index"
+            for filename in ['note1.txt.gpg', 'note2.txt.gpg', 'note3.txt.gpg']:
+                (test_temp_notes_dir / filename).write_text('#apple')
+            with patch.object(SQNotes, "_get_full_text_index_path", return_value=str(tmp_path / "index.gpg")),\
+                    patch.object(EncryptedNoteHelper, "write_encrypted_note"),\
+                    patch.object(EncryptedNoteHelper, 'get_decrypted_content_in_memory',
+                                 side_effect=['apple', GPGSubprocessException(), 'kiwi']):
+                sqnotes_with_database._index_note_file_changes(
+                    changes=NoteFileChanges(added=['note1.txt.gpg', 'note2.txt.gpg'])
+                )
+                sqnotes_with_database._index_note_file_changes(
+                    changes=NoteFileChanges(added=['note3.txt.gpg'])
+                )
+                full_text_index = sqnotes_with_database.full_text_index
+                assert not full_text_index.is_note_indexed(filename='note1.txt.gpg')
+                assert full_text_index.is_note_indexed(filename='note3.txt.gpg')
+
+    @pytest.mark.usefixtures("mock_print", "mock_get_notes_dir_from_config")
+    def it_rescans_then_indexes_each_batch_until_interrupted(sqnotes_obj):
+        changes = NoteFileChanges(added=['note1.txt.gpg'])
+        with patch.object(SQNotes, 'rescan_for_database') as mock_rescan,\
+                patch.object(SQNotes, '_index_note_file_changes') as mock_index_note_file_changes,\
+                patch.object(NoteDirectoryWatcher, 'wait_for_changes', side_effect=[changes, KeyboardInterrupt()]):
+            sqnotes_obj.watch_notes(poll_interval=1.0)
+        mock_rescan.assert_called_once()
+        mock_index_note_file_changes.assert_called_once_with(changes=changes)